@@ -0,0 +1,58 @@
+"""Compares ``grades_filter`` with the row by row implementation it replaced.
+
+Run from the root of the repository::
+
+    $ python benchmarks/bench_grades_filter.py
+    $ python benchmarks/bench_grades_filter.py 10000 100000 1000000
+
+The row by row baseline takes several minutes for 1000000 rows.
+"""
+import sys
+import os
+import timeit
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import studentpathway as sp
+from synthetic import results_data
+
+
+def grades_filter_rows(data, grades={85:"H", 75: "D", 65:"C", 50: "P", np.NaN: "S", 0: "F"}, avoid={'S'}):
+    """Row by row implementation of ``grades_filter`` used as the baseline."""
+    filtered_data = data.copy()
+
+    mark_list = [mark for mark in grades if not np.isnan(mark)]
+
+    for index, row in filtered_data.iterrows():
+        if row['grade'] in avoid:
+            filtered_data.loc[index, 'mark'] = None
+            continue
+
+        if not np.isnan(row['mark']):
+            for mark in mark_list:
+                if row['mark'] >= mark:
+                    filtered_data.loc[index, 'grade'] = grades[mark]
+                    break
+        else:
+            filtered_data.loc[index, 'mark'] = np.NaN
+            filtered_data.loc[index, 'grade'] = None
+
+    return filtered_data
+
+
+def main(sizes):
+    print(f"{'rows':>10} {'rows (s)':>12} {'vectorized (s)':>15} {'speedup':>9}")
+
+    for rows in sizes:
+        data = results_data(rows)
+
+        vectorized = min(timeit.repeat(lambda: sp.grades_filter(data), number=1, repeat=3))
+        baseline = timeit.timeit(lambda: grades_filter_rows(data), number=1)
+
+        print(f"{rows:>10} {baseline:>12.3f} {vectorized:>15.4f} {baseline / vectorized:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or [10000, 100000, 1000000])
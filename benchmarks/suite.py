@@ -0,0 +1,249 @@
+"""Benchmarks of the public functions of studentpathway on synthetic data.
+
+Every benchmark records the best wall time of ``--repeat`` runs and the peak memory
+allocated during one run (``tracemalloc``). The results can be saved as a JSON baseline
+and later runs compared with it; the comparison fails when a benchmark is slower or uses
+more memory than ``--tolerance`` times the baseline.
+
+Run from the root of the repository::
+
+    $ python benchmarks/suite.py
+    $ python benchmarks/suite.py --rows 1000000 --units 1000
+    $ python benchmarks/suite.py --only adjacency --repeat 5
+    $ python benchmarks/suite.py --save benchmarks/baseline.json
+    $ python benchmarks/suite.py --compare benchmarks/baseline.json --tolerance 1.5
+"""
+import sys
+import os
+import io
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+from functools import partial
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+
+import studentpathway as sp
+import synthetic
+
+
+class Context:
+    """Synthetic data and intermediate results shared by the benchmarks.
+
+    :param rows: Number of results.
+    :param units: Number of units.
+    :param graph_units: Number of units of the network graph.
+    :param directory: Directory of the csv files.
+    """
+
+    def __init__(self, rows, units, graph_units, directory):
+        self.rows = rows
+        self.units = units
+        self.graph_units = graph_units
+        self.directory = directory
+        self._cache = dict()
+
+    def get(self, name, build):
+        """Returns the value ``name``, built once with ``build()``."""
+        if name not in self._cache:
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                self._cache[name] = build()
+        return self._cache[name]
+
+    @property
+    def data(self):
+        return self.get("data", lambda: synthetic.combined_data(self.rows, units=self.units))
+
+    @property
+    def units_data(self):
+        return self.get("units_data", lambda: synthetic.units_data(self.units))
+
+    @property
+    def data_file(self):
+        def build():
+            path = os.path.join(self.directory, "final_data.csv")
+            self.data.to_csv(path, index=False)
+            return path
+        return self.get("data_file", build)
+
+    @property
+    def units_file(self):
+        def build():
+            path = os.path.join(self.directory, "units.csv")
+            self.units_data.to_csv(path, index=False)
+            return path
+        return self.get("units_file", build)
+
+    @property
+    def M(self):
+        return self.get("M", lambda: np.asarray(sp.sequence_matrix(self.data.copy())[0]))
+
+    @property
+    def tensor(self):
+        return self.get("tensor", lambda: sp.sequence_tensor(self.data.copy(), self.units_data))
+
+    @property
+    def P(self):
+        return self.get("P", lambda: sp.adjacency_tensor(self.tensor[0])[1])
+
+    @property
+    def unit_students(self):
+        return self.get("unit_students", lambda: sp.sort_students_by_units(*self.tensor, sem=1))
+
+    @property
+    def shared_students(self):
+        """Students of the first semester and transitions of fewer rows and units,
+        so the units share enough students for ``monte_carlo_projections`` to simulate them."""
+        def build():
+            data = synthetic.combined_data(max(self.rows // 5, 1), units=max(self.units // 4, 1))
+            T, students, units = sp.sequence_tensor(data, synthetic.units_data(max(self.units // 4, 1)))
+            return sp.sort_students_by_units(T, students, units, sem=1), sp.adjacency_tensor(T)[1]
+        return self.get("shared_students", build)
+
+
+# Benchmarks as (name, setup, function): ``setup(context)`` returns the arguments of ``function``
+# and is not measured. Every run gets new arguments because some functions change their input.
+BENCHMARKS = [
+    ("get_data.csv", lambda c: (c.data_file,), sp.get_data),
+    ("get_data.dataframe", lambda c: (c.data,), sp.get_data),
+    ("cohort_filter", lambda c: (c.data_file, "Bachelor of Engineering", c.units_file), sp.cohort_filter),
+    ("grades_filter", lambda c: (c.data,), sp.grades_filter),
+    ("categorical_filter", lambda c: (c.data,), sp.categorical_filter),
+    ("student_scores", lambda c: (c.data,), sp.student_scores),
+    ("sequence_matrix", lambda c: (c.data.copy(),), sp.sequence_matrix),
+    ("sequence_tensor", lambda c: (c.data.copy(), c.units_data), sp.sequence_tensor),
+    ("sequence_tensor.sparse", lambda c: (c.data.copy(), c.units_data), partial(sp.sequence_tensor, sparse=True)),
+    ("adjacency_matrix", lambda c: (c.M,), sp.adjacency_matrix),
+    ("adjacency_tensor", lambda c: (c.tensor[0],), sp.adjacency_tensor),
+    ("sort_students_by_units", lambda c: c.tensor, sp.sort_students_by_units),
+    ("sort_students_by_units.compact", lambda c: c.tensor, partial(sp.sort_students_by_units, compact=True)),
+    ("projections", lambda c: (c.unit_students, c.P), sp.projections),
+    ("monte_carlo_projections", lambda c: (c.unit_students, c.P),
+     partial(sp.monte_carlo_projections, replicates=10000, seed=0)),
+    ("monte_carlo_projections.shared", lambda c: c.shared_students,
+     partial(sp.monte_carlo_projections, replicates=10000, seed=0)),
+    ("multi_step_projections", lambda c: (c.unit_students, c.P), partial(sp.multi_step_projections, horizons=8)),
+    ("network_graph", lambda c: (c.P[:c.graph_units, :c.graph_units], c.tensor[2][:c.graph_units]),
+     partial(sp.network_graph, figure_size=(10, 10), resolution=50, save_figure=False, show_weights=False)),
+]
+
+
+def measure(context, setup, function, repeat):
+    """Returns the best wall time in seconds and the peak memory in bytes of a benchmark.
+
+    :param context: Context of the benchmarks.
+    :param setup: function returning the arguments of ``function``.
+    :param function: function measured.
+    :param repeat: Number of timed runs.
+
+    :return: Dictionary with the time and the peak memory.
+    """
+    times = []
+    for _ in range(repeat):
+        args = setup(context)
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            start = time.perf_counter()
+            function(*args)
+            times.append(time.perf_counter() - start)
+        plt.close("all")
+
+    args = setup(context)
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            function(*args)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        plt.close("all")
+
+    return {"time": min(times), "peak_memory": peak_memory}
+
+def compare(results, baseline, tolerance):
+    """Returns the regressions of the results compared with the baseline.
+
+    :param results: Dictionary of the results of the benchmarks.
+    :param baseline: Dictionary of the results of the baseline.
+    :param tolerance: Ratio of the baseline above which a result is a regression.
+
+    :return: list of messages of the regressions.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline or "error" in result or "error" in baseline[name]:
+            continue
+
+        for metric in ("time", "peak_memory"):
+            ratio = result[metric] / max(baseline[name][metric], 1e-9)
+            if ratio > tolerance:
+                regressions.append(f"{name}: {metric} is {ratio:.2f}x the baseline")
+
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks of studentpathway on synthetic data.")
+    parser.add_argument("--rows", type=int, default=100000, help="Number of results. (Default=100000)")
+    parser.add_argument("--units", type=int, default=400, help="Number of units. (Default=400)")
+    parser.add_argument("--graph-units", type=int, default=30, help="Number of units of network_graph. (Default=30)")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed runs. (Default=3)")
+    parser.add_argument("--only", default="", help="Runs the benchmarks whose name contains this text.")
+    parser.add_argument("--save", help="Saves the results to this JSON file.")
+    parser.add_argument("--compare", help="Compares the results with this JSON baseline.")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="Ratio of a regression. (Default=1.5)")
+    args = parser.parse_args(argv)
+
+    results = dict()
+
+    print(f"{'benchmark':<32} {'time (s)':>10} {'peak (MiB)':>11}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        context = Context(args.rows, args.units, args.graph_units, directory)
+
+        for name, setup, function in BENCHMARKS:
+            if args.only not in name:
+                continue
+
+            try:
+                results[name] = measure(context, setup, function, args.repeat)
+            except Exception as e:
+                results[name] = {"error": f"{type(e).__name__}: {e}"}
+                print(f"{name:<32} {results[name]['error']}")
+                continue
+
+            print(f"{name:<32} {results[name]['time']:>10.4f} {results[name]['peak_memory'] / 1024 ** 2:>11.1f}")
+
+    report = {"rows": args.rows, "units": args.units, "results": results}
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+
+        if (baseline["rows"], baseline["units"]) != (args.rows, args.units):
+            print(f"The baseline is for {baseline['rows']} rows and {baseline['units']} units.")
+            return 2
+
+        regressions = compare(results, baseline["results"], args.tolerance)
+        for regression in regressions:
+            print(regression)
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+import pandas as pd
+import numpy as np
+
+GRADES = {85: "H", 75: "D", 65: "C", 50: "P", 0: "F"}
+
+
+def results_data(rows, students=None, units=400, start_year=2015, years=5, seed=0):
+    """Returns a synthetic pandas dataframe with the columns of the results data.
+
+    :param rows: Number of rows.
+    :param students: Number of students. (Default=``rows // 20``)
+    :param units: Number of units. (Default=400)
+    :param start_year: First year of the outcome dates. (Default=2015)
+    :param years: Number of years of the outcome dates. (Default=5)
+    :param seed: Seed of the random generator. (Default=0)
+
+    :return: Pandas dataframe.
+    """
+    rng = np.random.default_rng(seed)
+
+    if students is None:
+        students = max(rows // 20, 1)
+
+    unit_codes = 300000 + np.arange(units)
+
+    # Autumn results in June and Spring results in November
+    year = start_year + rng.integers(0, years, rows)
+    spring = rng.random(rows) < 0.5
+    outcome_date = pd.to_datetime({"year": year, "month": np.where(spring, 11, 6), "day": 20})
+
+    mark = np.round(rng.uniform(0, 100, rows), 0)
+    mark[rng.random(rows) < 0.02] = np.nan
+
+    grade = np.full(rows, "F", dtype=object)
+    for threshold, letter in sorted(GRADES.items()):
+        grade[mark >= threshold] = letter
+    grade[np.isnan(mark)] = "S"
+
+    unit = rng.integers(0, units, rows)
+
+    return pd.DataFrame({"student_id": rng.integers(0, students, rows),
+                         "course_code": "3740",
+                         "unit_cohort": "Undergraduate",
+                         "unit_code": unit_codes[unit],
+                         "unit_name": pd.Series(unit).map("Unit {}".format),
+                         "outcome_date": outcome_date,
+                         "teaching_calendar": np.where(spring, "Spring Session", "Autumn Session"),
+                         "grade": grade,
+                         "mark": mark})
+
+COHORTS = {"Bachelor of Engineering": 0.7, "Bachelor of Science": 0.2, "Bachelor of Arts": 0.1}
+
+PROGRAMS = ["Common", "Civil", "Electrical", "Mechanical", "Robotics"]
+
+
+def enrolments_data(students, start_year=2015, years=5, seed=0):
+    """Returns a synthetic pandas dataframe with the columns of the enrolments data.
+
+    Every student of ``results_data`` has one enrolment.
+
+    :param students: Number of students.
+    :param start_year: First year of the course start dates. (Default=2015)
+    :param years: Number of years of the course start dates. (Default=5)
+    :param seed: Seed of the random generator. (Default=0)
+
+    :return: Pandas dataframe.
+    """
+    rng = np.random.default_rng(seed)
+
+    start_year = start_year + rng.integers(0, years, students)
+    birth_year = start_year - rng.integers(17, 30, students)
+
+    status = rng.choice(["ENROLLED", "COMPLETED", "DISCONTIN", "LAPSED"], students, p=[0.6, 0.25, 0.1, 0.05])
+    campus = rng.integers(0, 4, students)
+
+    return pd.DataFrame({"student_id": np.arange(students),
+                         "course_code": "3740",
+                         "student_cohort": rng.choice(list(COHORTS), students, p=list(COHORTS.values())),
+                         "school_name": "School of Engineering",
+                         "course_start_date": pd.to_datetime({"year": start_year, "month": 2, "day": 20}),
+                         "course_attempt_status": status,
+                         "gender": rng.choice(["M", "F", "X"], students, p=[0.7, 0.29, 0.01]),
+                         "campus_code": campus,
+                         "campus_name": pd.Series(campus).map("Campus {}".format),
+                         "citizenship": rng.choice(["AUS", "INT"], students, p=[0.8, 0.2]),
+                         "indigenous_type": rng.choice(["N", "Y"], students, p=[0.97, 0.03]),
+                         "date_of_birth": pd.to_datetime({"year": birth_year, "month": 1 + rng.integers(0, 12, students), "day": 1}),
+                         "discontinued_date": pd.NaT,
+                         "lapsed_date": pd.NaT})
+
+def units_data(units=400, seed=0):
+    """Returns a synthetic pandas dataframe with the columns of ``engineering_units.csv``.
+
+    The unit codes are the unit codes of ``results_data``.
+
+    :param units: Number of units. (Default=400)
+    :param seed: Seed of the random generator. (Default=0)
+
+    :return: Pandas dataframe.
+    """
+    rng = np.random.default_rng(seed)
+
+    return pd.DataFrame({"unit_code": 300000 + np.arange(units),
+                         "unit_name": pd.Series(np.arange(units)).map("Unit {}".format),
+                         "year": 1 + rng.integers(0, 4, units),
+                         "semester": rng.choice(["Autumn", "Spring"], units),
+                         "program": rng.choice(PROGRAMS, units)})
+
+def combined_data(rows, students=None, units=400, start_year=2015, years=5, seed=0):
+    """Returns synthetic results joined with the enrolments of their students, like ``final_data.csv``.
+
+    :param rows: Number of rows.
+    :param students: Number of students. (Default=``rows // 20``)
+    :param units: Number of units. (Default=400)
+    :param start_year: First year of the dates. (Default=2015)
+    :param years: Number of years of the dates. (Default=5)
+    :param seed: Seed of the random generator. (Default=0)
+
+    :return: Pandas dataframe.
+    """
+    if students is None:
+        students = max(rows // 20, 1)
+
+    results = results_data(rows, students, units, start_year, years, seed)
+    enrolments = enrolments_data(students, start_year, years, seed)
+
+    enrolments = enrolments.drop(columns=["course_code", "school_name"])
+
+    return results.merge(enrolments, on="student_id", how="left", sort=False)
@@ -51,6 +51,12 @@ units_df = sp.special_units_year(units_data, year_map={"AU": '4', "OE": '4', "Sp
 d_stu_score = sp.study_score(d_stu3, round_upto=4)
 
 
+# Assigning the programs of all the students at once.
+# The index of the programs is built once and reused for every student.
+program_index = sp.ProgramIndex(program)
+
+student_programs = sp.get_student_programs(feature_data, program_index)
+
 # Getting scores of all the students
 # This returns a dictionary mapping the student id to their scores.
 student_scores = sp.student_scores(feature_data, round_upto=2)
@@ -3,3 +3,6 @@ from studentpathway.dataprocessing import *
 
 import studentpathway.adjacency
 from studentpathway.adjacency import *
+
+import studentpathway.instrumentation
+from studentpathway.instrumentation import log_to_console, add_metrics_hook, remove_metrics_hook, collect_metrics
@@ -2,8 +2,16 @@ from .adjacency_matrix import adjacency_matrix
 from .sequence_matrix import sequence_matrix
 from .network_graph import network_graph
 from .tensors import *
+from .stream import sequence_tensor_stream, stream_to_tensor
+from .incremental import IncrementalAdjacency
+from .montecarlo import monte_carlo_projections
+from .forecast import MatrixPowers, multi_step_projections
 
 import studentpathway.adjacency.adjacency_matrix
 import studentpathway.adjacency.sequence_matrix
 import studentpathway.adjacency.network_graph
 import studentpathway.adjacency.tensors
+import studentpathway.adjacency.stream
+import studentpathway.adjacency.incremental
+import studentpathway.adjacency.montecarlo
+import studentpathway.adjacency.forecast
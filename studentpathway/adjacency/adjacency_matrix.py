@@ -1,19 +1,122 @@
 import pandas as pd
 import numpy as np
-from datetime import datetime
 import sys
 import copy
-from tqdm import tqdm
+import scipy.sparse
+from .parallel import sharded_counts
+from ..instrumentation import logger, stage, array_bytes, progress
 
 
-def adjacency_matrix(M):
+ENGINES = ("vectorized", "loop")
+
+
+def _values(A):
+    """Returns the distinct values of a dense or sparse matrix.
+
+    :param A: numpy.ndarray or scipy.sparse matrix.
+
+    :return: numpy.ndarray of the sorted distinct values.
+    """
+    if scipy.sparse.issparse(A):
+        values = A.tocoo().data
+        if A.nnz < A.shape[0] * A.shape[1]:
+            values = np.append(values, 0)
+        return np.unique(values)
+
+    return np.unique(A)
+
+def _one_hot(A, v):
+    """Returns the matrix with ones where ``A`` is equal to ``v`` and zeros elsewhere.
+
+    :param A: numpy.ndarray or scipy.sparse matrix.
+    :param v: value to encode.
+
+    :return: numpy.ndarray, or scipy.sparse.csr_matrix for a sparse ``A`` and a non-zero ``v``.
+    """
+    if scipy.sparse.issparse(A):
+        if v == 0:
+            return np.where(A.toarray() == 0, 1.0, 0.0)
+
+        coo = A.tocoo()
+        mask = coo.data == v
+        return scipy.sparse.csr_matrix((np.ones(np.count_nonzero(mask)), (coo.row[mask], coo.col[mask])),
+                                       shape=A.shape)
+
+    return np.where(A == v, 1.0, 0.0)
+
+def _transition_counts(A, B):
+    """Returns the count of students moving from the units of ``A`` to the units of ``B``.
+
+    Element ``[i, j]`` counts the students ``s`` with ``B[s, j] - A[s, i] == 1`` and ``B[s, j] != 1``,
+    which is the per-pair rule of the loop engine evaluated for all the unit pairs at once.
+    Every pair of values ``(v, w)`` found in the matrices that satisfies the rule contributes
+    the product of the one-hot matrices ``(A == v).T @ (B == w)``.
+
+    :param A: sequence matrix of (m, n) dimensions providing the units ``i``. Can be a scipy.sparse matrix.
+    :param B: sequence matrix of (m, k) dimensions providing the units ``j``. Can be a scipy.sparse matrix.
+
+    :return: count matrix of (n, k) dimensions.
+    """
+    counts = np.zeros((A.shape[1], B.shape[1]))
+
+    for w in _values(B):
+        if w == 1:
+            continue
+
+        for v in _values(A):
+            delta = w - v
+            if delta >= 0 and np.absolute(delta) == 1:
+                product = _one_hot(A, v).T @ _one_hot(B, w)
+                if scipy.sparse.issparse(product):
+                    product = product.toarray()
+                counts += np.asarray(product)
+
+    return counts
+
+def _transition_probabilities(_P, totals):
+    """Returns the adjacency matrix with the subject-wise probability from the count matrix.
+
+    :param _P: count matrix of (n, n) dimensions.
+    :param totals: number of students that have taken each of the n units.
+
+    :return: adjacency matrix of (n, n) dimensions.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        P = np.where((totals == 0)[np.newaxis, :] | (_P == 0), 0, _P / totals[:, np.newaxis])
+
+    return P
+
+def _matrix_counts(T, rows=slice(None)):
+    """Returns the rows of the count matrix of a sequence matrix.
+
+    :param T: list holding the sequence matrix.
+    :param rows: slice of the units ``i`` of the rows. (Default=all the units)
+
+    :return: count matrix of (len(rows), n) dimensions.
+    """
+    M = T[0]
+
+    return _transition_counts(M[:, rows], M)
+
+def adjacency_matrix(M, engine="vectorized", n_jobs=None):
     """Return adjacency matrices
 
+    ``engine="vectorized"`` (Default) computes the whole matrices with a few matrix products.
+    ``engine="loop"`` computes every pair of units one at a time and is kept as the reference implementation.
+    Both engines return identical matrices.
+    ``n_jobs`` splits the rows of the vectorized engine between processes sharing ``M`` in shared memory.
+
     :param M: sequence matrix of (m, n) dimensions matrix of type numpy.ndarray
+    :param engine: engine used to compute the matrices, ``"vectorized"`` or ``"loop"``. (Default=``"vectorized"``)
+    :param n_jobs: Number of processes of the vectorized engine, ``-1`` uses all the CPUs.
+        Must be None with the loop engine. (Default=None)
 
     :returns _P: graph projection matrix of (n, n) dimensions.
     :returns P: adjaceny matrix of (n, n) dimensions with subject-wise probability.
 
+    :raises TypeError: Sequence Matrix is not of type numpy.ndarray.
+    :raises ValueError: Unknown engine, invalid ``n_jobs``, or ``n_jobs`` with the loop engine.
+
     :Example:
 
     >>> import studentpathway as sp
@@ -21,38 +124,58 @@ def adjacency_matrix(M):
     >>> data = pd.read_csv("students_data/combined_data/eng_data.csv")
     >>> M, students, units = sp.sequence_matrix(data)
     >>> _P, P = sp.adjacency_matrix(M)
+    >>> _P, P = sp.adjacency_matrix(M, engine="loop")
+    >>> _P, P = sp.adjacency_matrix(M, n_jobs=-1)
     """
 
-    # Calculating start time
-    start_time = datetime.now()
-
     # Checking for numpy ndarray
-    print("Checking for numpy array...", end="")
     if not isinstance(M, np.ndarray):
         raise TypeError("Sequence Matrix is not of type numpy.ndarray")
 
-    print(u'\N{check mark}')
+    logger.debug("adjacency_matrix: sequence matrix of %d students and %d units", *M.shape)
+
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine}. Use one of {ENGINES}.")
+
+    if engine == "loop" and n_jobs is not None:
+        raise ValueError("n_jobs is only used by the vectorized engine.")
+
+    with stage("adjacency_matrix", engine=engine, rows=M.shape[0], units=M.shape[1]) as record:
+        # Summing up the columns
+        Mj = np.where(M > 0, 1, 0)
+        Mj_total = np.sum(Mj, axis=0)
+
+        if engine == "vectorized":
+            _P = sharded_counts(_matrix_counts, [M], n_jobs)
+            P = _transition_probabilities(_P, Mj_total)
+        else:
+            _P, P = _adjacency_matrix_loop(M, Mj_total)
+
+        record["array_bytes"] = array_bytes(M, _P, P)
+
+    return _P, P
+
+def _adjacency_matrix_loop(M, Mj_total):
+    """Returns the adjacency matrices computed one pair of units at a time.
+
+    :param M: sequence matrix of (m, n) dimensions.
+    :param Mj_total: number of students that have taken each of the n units.
+
+    :returns _P: graph projection matrix of (n, n) dimensions.
+    :returns P: adjaceny matrix of (n, n) dimensions with subject-wise probability.
+    """
 
     # Getting the dimensions for _P matrix from M matrix's columns
     _P_dim = M.shape[1]
 
-    # Getting total number of students from M matrix's rows
-    total_students = M.shape[0]
-
     # Creating a zeros _P matrix of size of units from M
     _P = np.zeros((_P_dim, _P_dim))
 
     # Creating a zeros P matrix of size of units from M
     P = copy.deepcopy(_P)
 
-    # Summing up the columns
-    Mj = np.where(M > 0, 1, 0)
-    Mj_total = np.sum(Mj, axis=0)
-
-    # Initiating progress bar
-    loop = tqdm(total=_P_dim, position=0, leave=False)
     # P matrix generation
-    for i in range(_P_dim):
+    for i in progress(range(_P_dim), _P_dim, "adjacency_matrix"):
         for j in range(_P_dim):
             delta = M[:, j] - M[:, i]
             d = np.absolute(delta)
@@ -62,13 +185,4 @@ def adjacency_matrix(M):
             else:
                 P[i][j] = _P[i][j]/Mj_total[i]
 
-        loop.set_description("Generating...".format(i+1))
-        loop.update(1)
-
-    loop.close()
-
-    # Calculating elapsed time
-    elapsed_time = datetime.now() - start_time
-    print(f"Time elapsed (hh:mm:ss.ms) {elapsed_time}")
-
     return _P, P
@@ -0,0 +1,123 @@
+import numpy as np
+import scipy.sparse
+from ..instrumentation import stage, array_bytes
+
+
+class MatrixPowers:
+    """Cache of the powers of a matrix of transitions.
+
+    A power is computed from a cached power below it, or from nothing, times the powers of 2 of the remainder
+    computed by repeated squaring. The start leaving the fewest powers of 2 is used,
+    so the consecutive powers cost one product each and a power ``k`` costs at most about ``2 * log2(k)`` products.
+
+    :param P: Probability of student transitions of (n, n) dimensions. Can be a scipy.sparse matrix.
+
+    :raises ValueError: ``P`` is not a square matrix.
+
+    :Example:
+
+    >>> import studentpathway as sp
+    >>> _P, P = sp.adjacency_tensor(T)
+    >>> powers = sp.MatrixPowers(P)
+    >>> P4 = powers.power(4)
+    """
+
+    def __init__(self, P):
+        if not scipy.sparse.issparse(P):
+            P = np.asarray(P, dtype=float)
+
+        if len(P.shape) != 2 or P.shape[0] != P.shape[1]:
+            raise ValueError(f"P must be a square matrix, not of {P.shape} dimensions.")
+
+        self.P = P
+        self.powers = {1: P}
+
+    def _square_power(self, k):
+        """Returns the power ``k`` of a power of 2 by repeated squaring."""
+        if k not in self.powers:
+            half = self._square_power(k // 2)
+            self.powers[k] = half @ half
+
+        return self.powers[k]
+
+    def power(self, k):
+        """Returns the power ``k`` of the matrix.
+
+        :param k: Positive power.
+
+        :return: numpy.ndarray, or scipy.sparse matrix for a sparse matrix.
+
+        :raises ValueError: ``k`` is not positive.
+        """
+        if k < 1:
+            raise ValueError(f"The power must be positive, not {k}.")
+
+        if k in self.powers:
+            return self.powers[k]
+
+        # Cached power below k, or 0, leaving the fewest powers of 2 in the remainder
+        start = min([j for j in self.powers if j < k] + [0], key=lambda j: (bin(k - j).count("1") - (j == 0), -j))
+        result = self.powers.get(start)
+
+        remainder = k - start
+        bit = 1
+        while remainder:
+            if remainder & 1:
+                square = self._square_power(bit)
+                result = square if result is None else result @ square
+            remainder >>= 1
+            bit <<= 1
+
+        self.powers[k] = result
+
+        return result
+
+def multi_step_projections(students, P, horizons=4):
+    """Returns the projected number of students of every unit several semesters ahead.
+
+    The count of the units ``k`` semesters ahead is the product of the current counts with the power ``k`` of ``P``,
+    which is the expected count of the projections chained ``k`` times without rounding.
+    The powers are cached in a ``MatrixPowers``, which can be passed as ``P`` to reuse the powers for several cohorts.
+
+    :param students: A dictionary of students in every unit, its compact form from ``sort_students_by_units``,
+        or numpy.ndarray of the number of students of every unit.
+    :param P: Probability of student transitions of (n, n) dimensions, or MatrixPowers of it.
+    :param horizons: Number of semesters ``H`` to project, or list of the semesters to project. (Default=4)
+
+    :return: numpy.ndarray of (H, n) projected counts, with a row for every semester.
+
+    :raises ValueError: ``P`` is not of the size of the units, or a semester is not positive.
+
+    :Example:
+
+    >>> import studentpathway as sp
+    >>> students_dict = sp.sort_students_by_units(T1, students1, units1)
+    >>> _P0, P0 = sp.adjacency_tensor(T0)
+    >>> counts = sp.multi_step_projections(students_dict, P0, horizons=8)
+    >>> powers = sp.MatrixPowers(P0)
+    >>> counts = sp.multi_step_projections(students_dict, powers, horizons=[2, 4, 8])
+    """
+
+    if isinstance(students, dict):
+        counts = np.array([len(v) for v in students.values()], dtype=float)
+    elif isinstance(students, tuple):
+        counts = np.diff(students[3]).astype(float)
+    else:
+        counts = np.asarray(students, dtype=float)
+
+    powers = P if isinstance(P, MatrixPowers) else MatrixPowers(P)
+
+    if powers.P.shape[0] != len(counts):
+        raise ValueError(f"P must be of ({len(counts)}, {len(counts)}) dimensions for the units of students.")
+
+    steps = range(1, horizons + 1) if np.isscalar(horizons) else horizons
+
+    with stage("multi_step_projections", units=len(counts), horizons=len(steps)) as record:
+        projected = np.zeros((len(steps), len(counts)))
+
+        for h, k in enumerate(steps):
+            projected[h] = np.asarray(counts @ powers.power(k)).ravel()
+
+        record["array_bytes"] = array_bytes(list(powers.powers.values()), projected)
+
+    return projected
@@ -0,0 +1,330 @@
+import pandas as pd
+import numpy as np
+from .tensors import _sequence_coo, _coo_to_tensor, _mid_dimensions
+from .adjacency_matrix import _transition_counts, _transition_probabilities
+
+
+class IncrementalAdjacency:
+    """Adjacency matrix of the sequence tensor updated one teaching period at a time.
+
+    The count matrix of ``adjacency_tensor`` is a sum, for every pair of layers of the tensor,
+    of the transitions of every student. The state keeps these sums for every pair of layers
+    and the number of students of every unit in every layer.
+    ``update`` re-walks only the students of the new results: their previous contributions are subtracted
+    and the contributions of their whole updated sequence are added.
+    ``adjacency_tensor`` then returns the same matrices as ``adjacency_tensor(sequence_tensor(...))``
+    computed over all the results.
+    The results of the students are kept so that the semesters of a student can be recomputed.
+    They are stored in one chunk per update sorted by student, with the chunks holding the results of every student,
+    so an update reads the results of its students only and its time does not depend on the results already stored.
+
+    :param units_data: Pandas dataframe of unit data. (Default=None)
+    :param sem_separator_month: Month number used to separate the semesters. (Default=8)
+    :param unit_header: Column heading for unit name. (Default="unit_code")
+    :param id_header: Column heading for student id. (Default="student_id")
+    :param date_header: Column heading for outcome date. (Default="outcome_date")
+    :param units_from_students_data: Bool (Default=True)
+
+    :Example:
+
+    >>> import studentpathway as sp
+    >>> state = sp.IncrementalAdjacency()
+    >>> state.update(results_2017)
+    >>> state.update(results_2018)
+    >>> _P, P = state.adjacency_tensor()
+    >>> state.save("adjacency_state.npz")
+    >>> state = sp.IncrementalAdjacency.load("adjacency_state.npz")
+    """
+
+    def __init__(self,
+                 units_data=None,
+                 sem_separator_month=8,
+                 unit_header="unit_code",
+                 id_header="student_id",
+                 date_header="outcome_date",
+                 units_from_students_data=True):
+        self.sem_separator_month = sem_separator_month
+        self.unit_header = unit_header
+        self.id_header = id_header
+        self.date_header = date_header
+
+        self.fixed_units = isinstance(units_data, pd.DataFrame) and not units_from_students_data
+
+        self.students = []
+        self.units = list(units_data[unit_header].unique()) if self.fixed_units else []
+
+        # Code of every student id
+        self._student_lookup = dict()
+
+        # Results of every update as (student_codes, unit_codes, dates) sorted by student,
+        # and the chunks holding the results of every student
+        self._chunks = []
+        self._student_chunks = []
+
+        # Counts between the layers k and k, k - 1 and k, k and k + 1
+        unit_number = len(self.units)
+        self._same = np.zeros((0, unit_number, unit_number))
+        self._up = np.zeros((0, unit_number, unit_number))
+        self._down = np.zeros((0, unit_number, unit_number))
+
+        # Number of students of every unit in every layer
+        self._unit_counts = np.zeros((0, unit_number), dtype=np.int64)
+
+    @property
+    def Tj_total(self):
+        """Number of times every unit was taken."""
+        return self._unit_counts.sum(axis=0)
+
+    def update(self, students_data):
+        """Adds the results of a teaching period.
+
+        :param students_data: Pandas dataframe of the new results.
+
+        :return: the updated state.
+
+        :raises ValueError: A unit of the new results is not in the units data.
+        """
+        if not len(students_data):
+            return self
+
+        unit_codes = self._unit_index(students_data[self.unit_header])
+        student_codes = self._student_index(students_data[self.id_header])
+        dates = pd.to_datetime(students_data[self.date_header], dayfirst=True).to_numpy(dtype="datetime64[ns]")
+
+        changed = np.unique(student_codes)
+
+        # Removing the contributions of the previous results of the students
+        previous = self._results(changed)
+        self._add(*previous, -1)
+
+        order = np.argsort(student_codes, kind="stable")
+        chunk = (student_codes[order], unit_codes[order], dates[order])
+
+        self._chunks.append(chunk)
+        for code in changed:
+            self._student_chunks[code].append(len(self._chunks) - 1)
+
+        # Adding the contributions of all the results of the students
+        self._add(*[np.concatenate([p, c]) for p, c in zip(previous, chunk)], 1)
+
+        return self
+
+    def adjacency_tensor(self):
+        """Returns the adjacency matrices of all the results.
+
+        :return: count matrix and adjacency matrix of (n, n) dimensions.
+        """
+        unit_number = len(self.units)
+
+        depth = np.count_nonzero(self._unit_counts.sum(axis=1))
+
+        if not depth:
+            _P = np.zeros((unit_number, unit_number))
+            return _P, _transition_probabilities(_P, self.Tj_total)
+
+        # Count top dimension
+        _P = self._same[0].copy()
+
+        # Units whose contributions did not terminate yet
+        active = np.ones(unit_number, dtype=bool)
+
+        for k in _mid_dimensions(depth):
+            active &= self._unit_counts[k] != 0
+
+            if not active.any():
+                break
+
+            _P[:, active] += self._up[k][:, active] + self._same[k][:, active] + self._down[k][:, active]
+
+        # Count bottom dimension
+        if active.any():
+            _P[:, active] += self._same[depth - 1][:, active]
+
+        return _P, _transition_probabilities(_P, self.Tj_total)
+
+    def save(self, path):
+        """Saves the state in a ``.npz`` file.
+
+        :param path: path to the file.
+        """
+        student_codes, unit_codes, dates = self._results()
+
+        np.savez_compressed(path,
+                            students=np.asarray(self.students),
+                            units=np.asarray(self.units),
+                            student_codes=student_codes,
+                            unit_codes=unit_codes,
+                            dates=dates,
+                            same=self._same,
+                            up=self._up,
+                            down=self._down,
+                            unit_counts=self._unit_counts,
+                            fixed_units=self.fixed_units,
+                            sem_separator_month=self.sem_separator_month,
+                            headers=np.array([self.unit_header, self.id_header, self.date_header]))
+
+    @classmethod
+    def load(cls, path):
+        """Returns the state saved in a ``.npz`` file.
+
+        :param path: path to the file.
+
+        :return: IncrementalAdjacency.
+        """
+        with np.load(path) as data:
+            unit_header, id_header, date_header = data["headers"].tolist()
+
+            state = cls(sem_separator_month=int(data["sem_separator_month"]),
+                        unit_header=unit_header,
+                        id_header=id_header,
+                        date_header=date_header)
+
+            state.fixed_units = bool(data["fixed_units"])
+            state.students = data["students"].tolist()
+            state.units = data["units"].tolist()
+
+            state._student_lookup = {student: code for code, student in enumerate(state.students)}
+            state._student_chunks = [[] for _ in state.students]
+
+            student_codes = data["student_codes"]
+            if len(student_codes):
+                order = np.argsort(student_codes, kind="stable")
+                state._chunks = [(student_codes[order], data["unit_codes"][order], data["dates"][order])]
+                for code in np.unique(student_codes):
+                    state._student_chunks[code].append(0)
+
+            state._same = data["same"]
+            state._up = data["up"]
+            state._down = data["down"]
+            state._unit_counts = data["unit_counts"]
+
+        return state
+
+    def _results(self, codes=None):
+        """Returns the stored results of some students.
+
+        Only the chunks holding results of the students are searched.
+
+        :param codes: numpy.ndarray of the sorted codes of the students. (Default=all the students)
+
+        :return: student codes, unit codes and outcome dates of the results.
+        """
+        if codes is None:
+            chunks = self._chunks
+        else:
+            touched = sorted(set().union(*(self._student_chunks[code] for code in codes)))
+            chunks = []
+            for c in touched:
+                chunk = self._chunks[c]
+                starts = np.searchsorted(chunk[0], codes, side="left")
+                lengths = np.searchsorted(chunk[0], codes, side="right") - starts
+
+                # Positions of the ranges of results of the students in the chunk
+                ends = np.cumsum(lengths)
+                positions = np.arange(ends[-1]) - np.repeat(ends - lengths - starts, lengths)
+                chunks.append(tuple(array[positions] for array in chunk))
+
+        if not chunks:
+            return (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype="datetime64[ns]"))
+
+        return tuple(np.concatenate(arrays) for arrays in zip(*chunks))
+
+    def _student_index(self, ids):
+        """Returns the codes of the students, adding the new students.
+
+        :param ids: Pandas series of student ids.
+
+        :return: numpy.ndarray of the codes.
+        """
+        inverse, unique_ids = pd.factorize(ids)
+
+        codes = np.array([self._student_lookup.get(student, -1) for student in unique_ids], dtype=np.int64)
+
+        for i in np.flatnonzero(codes < 0):
+            codes[i] = len(self.students)
+            self._student_lookup[unique_ids[i]] = codes[i]
+            self.students.append(unique_ids[i])
+            self._student_chunks.append([])
+
+        return codes[inverse]
+
+    def _unit_index(self, units):
+        """Returns the codes of the units, adding the new units.
+
+        :param units: Pandas series of units.
+
+        :return: numpy.ndarray of the codes.
+
+        :raises ValueError: A unit is not in the units data.
+        """
+        codes = pd.Index(self.units).get_indexer(units)
+
+        if (codes < 0).any():
+            if self.fixed_units:
+                missing = units.to_numpy()[codes < 0][0]
+                raise ValueError(f"{missing} is not in the units data.")
+
+            self.units.extend(pd.unique(units.to_numpy()[codes < 0]))
+            codes = pd.Index(self.units).get_indexer(units)
+            self._resize(len(self._unit_counts), len(self.units))
+
+        return codes.astype(np.int64)
+
+    def _resize(self, depth, unit_number):
+        """Grows the state to ``depth`` layers and ``unit_number`` units.
+
+        :param depth: Number of layers.
+        :param unit_number: Number of units.
+        """
+        old_depth, old_units = self._unit_counts.shape
+
+        if depth <= old_depth and unit_number <= old_units:
+            return
+
+        depth = max(depth, old_depth)
+        unit_number = max(unit_number, old_units)
+
+        def grow(array, shape):
+            grown = np.zeros(shape, dtype=array.dtype)
+            grown[tuple(slice(0, n) for n in array.shape)] = array
+            return grown
+
+        self._same = grow(self._same, (depth, unit_number, unit_number))
+        self._up = grow(self._up, (depth, unit_number, unit_number))
+        self._down = grow(self._down, (depth, unit_number, unit_number))
+        self._unit_counts = grow(self._unit_counts, (depth, unit_number))
+
+    def _add(self, student_codes, unit_codes, dates, sign):
+        """Adds the contributions of the results of some students to the state.
+
+        :param student_codes: numpy.ndarray of the codes of the students of the results.
+        :param unit_codes: numpy.ndarray of the codes of the units of the results.
+        :param dates: numpy.ndarray of the outcome dates of the results.
+        :param sign: ``1`` to add the contributions and ``-1`` to remove them.
+        """
+        if not len(student_codes):
+            return
+
+        unit_number = len(self.units)
+
+        rows, students = pd.factorize(student_codes)
+
+        coo = _sequence_coo(rows, unit_codes, pd.Series(dates), unit_number, self.sem_separator_month)
+
+        layers = coo[0]
+        depth = int(layers.max()) + 1
+
+        self._resize(depth, unit_number)
+
+        T = _coo_to_tensor(*coo, shape=(len(students), unit_number), sparse=True)
+
+        for k in range(depth):
+            self._same[k] += sign * _transition_counts(T[k], T[k])
+
+            if k:
+                self._up[k] += sign * _transition_counts(T[k - 1], T[k])
+
+            if k + 1 < depth:
+                self._down[k] += sign * _transition_counts(T[k], T[k + 1])
+
+            self._unit_counts[k] += sign * np.bincount(coo[2][layers == k], minlength=unit_number)
@@ -0,0 +1,188 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from .tensors import _student_offsets, _projection_matrix, _projection_flows
+from .parallel import _worker_number
+from ..instrumentation import stage, array_bytes
+
+# Quantiles of the projected counts returned by default
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+def _random_targets(offsets, codes, flows):
+    """Returns the units whose projected count depends on the random draws.
+
+    A unit ``k`` sends exactly ``flows[k, i]`` students to a unit ``i`` when it always has enough students
+    not yet projected to ``i``. The students of ``k`` already projected to ``i`` are at most the students received
+    by ``i`` from the previous units, and at most the students of ``k`` that are also in another unit.
+    The count of ``i`` is the sum of its flows when this bound holds for all the units sending students to ``i``,
+    which is always the case when the units sending students to ``i`` have no students in common.
+
+    :param offsets: numpy.ndarray of the (n + 1) positions of the students of every unit in ``codes``.
+    :param codes: numpy.ndarray of the codes of the students of every unit.
+    :param flows: numpy.ndarray of (n, n) flows between the units.
+
+    :return: numpy.ndarray of the units with a random count.
+    """
+    sizes = np.diff(offsets)
+
+    # Students of every unit that are also in another unit
+    repeated = np.bincount(codes) > 1 if len(codes) else np.zeros(0, dtype=bool)
+    shared = np.bincount(np.repeat(np.arange(len(sizes)), sizes), weights=repeated[codes], minlength=len(sizes))
+
+    # Students received by every unit from the previous units
+    received = np.cumsum(flows, axis=0) - flows
+
+    short = (flows > 0) & (flows + np.minimum(received, shared[:, np.newaxis]) > sizes[:, np.newaxis])
+
+    return np.flatnonzero(short.any(axis=0))
+
+def _replicate_counts(offsets, codes, flows, targets, replicates, seed):
+    """Returns the projected counts of the units in a batch of replicates.
+
+    A unit ``k`` sends ``min(flows[k, i], free)`` students to a unit ``i``, where ``free`` is the number of
+    students of ``k`` not yet projected to ``i``. Only the students that are in several units sending students
+    to ``i`` can be projected twice, so only these students are tracked. The number of them drawn by ``k``
+    follows a hypergeometric distribution and they are then drawn at random with all the replicates together,
+    which gives the same distribution as the draws of ``projections``.
+
+    :param offsets: numpy.ndarray of the (n + 1) positions of the students of every unit in ``codes``.
+    :param codes: numpy.ndarray of the codes of the students of every unit.
+    :param flows: numpy.ndarray of (n, n) flows between the units.
+    :param targets: numpy.ndarray of the units to count.
+    :param replicates: Number of replicates.
+    :param seed: numpy.random.SeedSequence of the batch.
+
+    :return: numpy.ndarray of (replicates, len(targets)) counts.
+    """
+    rng = np.random.default_rng(seed)
+
+    counts = np.zeros((replicates, len(targets)), dtype=np.int64)
+
+    for t, i in enumerate(targets):
+        sources = np.flatnonzero(flows[:, i] > 0)
+        members = [codes[offsets[k]:offsets[k + 1]] for k in sources]
+
+        # Local codes of the students in several of the units sending students to i
+        local, inverse, repeats = np.unique(np.concatenate(members), return_inverse=True, return_counts=True)
+        tracked = np.cumsum(repeats > 1) - 1
+        is_tracked = (repeats > 1)[inverse]
+
+        taken = np.zeros((replicates, np.count_nonzero(repeats > 1)), dtype=bool)
+
+        start = 0
+        for k, student_codes in zip(sources, members):
+            unit_tracked = is_tracked[start:start + len(student_codes)]
+            columns = tracked[inverse[start:start + len(student_codes)][unit_tracked]]
+            start += len(student_codes)
+
+            # Free tracked students and students of this unit only
+            free_tracked = len(columns) - taken[:, columns].sum(axis=1)
+            free_others = len(student_codes) - len(columns)
+
+            drawn = np.minimum(flows[k, i], free_tracked + free_others)
+            counts[:, t] += drawn
+
+            if not len(columns):
+                continue
+
+            # Number of tracked students drawn, then the tracked students with the smallest keys
+            drawn_tracked = rng.hypergeometric(free_tracked, np.full(replicates, free_others), drawn)
+
+            keys = rng.random((replicates, len(columns)))
+            keys[taken[:, columns]] = 2
+
+            # Key of the last tracked student drawn, found with one partition of the replicates drawing as many
+            thresholds = np.full(replicates, -1.0)
+            for d in np.unique(drawn_tracked[drawn_tracked > 0]):
+                same = drawn_tracked == d
+                thresholds[same] = np.partition(keys[same], d - 1, axis=1)[:, d - 1]
+
+            taken[:, columns] |= keys <= thresholds[:, np.newaxis]
+
+    return counts
+
+def monte_carlo_projections(students,
+                            P,
+                            replicates=1000,
+                            quantiles=QUANTILES,
+                            level=0.9,
+                            seed=None,
+                            n_jobs=None,
+                            batch_size=1000):
+    """Returns the distribution of the projected number of students of every unit.
+
+    Every replicate is a projection of ``projections`` with its own random draws, and only the counts are kept.
+    The units whose count is the same in all the replicates are computed once,
+    and the other units are simulated for a batch of replicates at a time.
+    The batches get independent seeds spawned from ``seed`` with ``numpy.random.SeedSequence``,
+    so the results depend on ``seed`` and ``batch_size`` but not on ``n_jobs``.
+
+    :param students: A dictionary of students in every unit,
+        or the compact form returned by ``sort_students_by_units(..., compact=True)``.
+    :param P: Probability of student transitions of (n, n) dimensions for the n units of ``students``.
+    :param replicates: Number of replicates. (Default=1000)
+    :param quantiles: Quantiles of the counts. (Default=``(0.05, 0.25, 0.5, 0.75, 0.95)``)
+    :param level: Probability of the central interval of the counts. (Default=0.9)
+    :param seed: Seed of the replicates, an integer or numpy.random.SeedSequence. (Default=None)
+    :param n_jobs: Number of processes simulating the batches, ``-1`` uses all the CPUs. (Default=None)
+    :param batch_size: Number of replicates simulated together. (Default=1000)
+
+    :return: Dictionary with the ``units`` and the arrays of the ``mean``, ``std``, ``quantiles``,
+             ``lower`` and ``upper`` bounds of the interval of every unit.
+             ``quantiles`` is of (len(quantiles), n) dimensions and the other arrays of (n,) dimensions.
+
+    :raises ValueError: ``P`` is not of the size of the units, or invalid ``replicates``, ``level`` or ``n_jobs``.
+
+    :Example:
+
+    >>> import studentpathway as sp
+    >>> students_dict = sp.sort_students_by_units(T1, students1, units1)
+    >>> _P0, P0 = sp.adjacency_tensor(T0)
+    >>> distribution = sp.monte_carlo_projections(students_dict, P0, replicates=10000, seed=0)
+    >>> distribution["mean"], distribution["lower"], distribution["upper"]
+    """
+
+    units, P = _projection_matrix(students, P)
+
+    if replicates < 1 or batch_size < 1:
+        raise ValueError("replicates and batch_size must be positive.")
+
+    if not 0 < level < 1:
+        raise ValueError(f"level must be between 0 and 1, not {level}.")
+
+    workers = _worker_number(n_jobs)
+
+    with stage("monte_carlo_projections", units=len(units), replicates=replicates) as record:
+        ids, offsets, codes = _student_offsets(students)
+        flows = _projection_flows(offsets, P)
+
+        # Units with the same count in all the replicates
+        counts = np.tile(flows.sum(axis=0), (replicates, 1))
+
+        targets = _random_targets(offsets, codes, flows)
+
+        if len(targets):
+            batches = [min(batch_size, replicates - start) for start in range(0, replicates, batch_size)]
+            seeds = np.random.SeedSequence(seed).spawn(len(batches))
+
+            arguments = ([offsets] * len(batches), [codes] * len(batches), [flows] * len(batches),
+                         [targets] * len(batches), batches, seeds)
+
+            if workers == 1 or len(batches) == 1:
+                results = map(_replicate_counts, *arguments)
+                counts[:, targets] = np.concatenate(list(results))
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    counts[:, targets] = np.concatenate(list(executor.map(_replicate_counts, *arguments)))
+
+        record.update(random_units=len(targets), array_bytes=array_bytes(counts, flows))
+
+    # Probability outside the interval on every side
+    tail = (1 - level) / 2
+
+    return {"units": units,
+            "mean": counts.mean(axis=0),
+            "std": counts.std(axis=0),
+            "quantiles": np.quantile(counts, quantiles, axis=0),
+            "lower": np.quantile(counts, tail, axis=0),
+            "upper": np.quantile(counts, 1 - tail, axis=0)}
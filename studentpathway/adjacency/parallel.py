@@ -0,0 +1,170 @@
+import numpy as np
+import os
+import scipy.sparse
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+
+def _worker_number(n_jobs):
+    """Returns the number of worker processes for ``n_jobs``.
+
+    :param n_jobs: Number of processes. ``None`` is one process and ``-1`` is one process per CPU.
+
+    :return: Number of processes.
+
+    :raises ValueError: ``n_jobs`` is neither a positive integer, ``-1`` nor ``None``.
+    """
+    if n_jobs is None:
+        return 1
+
+    if n_jobs == -1:
+        return os.cpu_count() or 1
+
+    if not isinstance(n_jobs, (int, np.integer)) or n_jobs < 1:
+        raise ValueError(f"n_jobs must be a positive integer or -1, not {n_jobs}.")
+
+    return int(n_jobs)
+
+def _share_array(array, blocks):
+    """Copies an array into a new shared memory block.
+
+    :param array: numpy.ndarray.
+    :param blocks: list of the shared memory blocks, the new block is appended.
+
+    :return: name, shape and dtype of the shared array.
+    """
+    array = np.ascontiguousarray(array)
+
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    blocks.append(block)
+
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+
+    return block.name, array.shape, array.dtype.str
+
+def _attach_array(spec, blocks):
+    """Returns the array of a shared memory block created by ``_share_array``.
+
+    :param spec: name, shape and dtype of the shared array.
+    :param blocks: list of the attached shared memory blocks, the block is appended.
+
+    :return: numpy.ndarray using the shared memory.
+    """
+    name, shape, dtype = spec
+
+    block = shared_memory.SharedMemory(name=name)
+    blocks.append(block)
+
+    return np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+def _share_layers(T, blocks):
+    """Copies the matrices of a tensor into shared memory blocks.
+
+    :param T: list of dense matrices or scipy.sparse matrices.
+    :param blocks: list of the shared memory blocks, the new blocks are appended.
+
+    :return: list of the specifications of the shared matrices.
+    """
+    specs = []
+    for matrix in T:
+        if scipy.sparse.issparse(matrix):
+            matrix = matrix.tocsc()
+            specs.append(("sparse",
+                          matrix.shape,
+                          _share_array(matrix.data, blocks),
+                          _share_array(matrix.indices, blocks),
+                          _share_array(matrix.indptr, blocks)))
+        else:
+            specs.append(("dense", _share_array(matrix, blocks)))
+
+    return specs
+
+def _attach_layers(specs, blocks):
+    """Returns the matrices of a tensor shared by ``_share_layers``.
+
+    :param specs: list of the specifications of the shared matrices.
+    :param blocks: list of the attached shared memory blocks, the blocks are appended.
+
+    :return: list of numpy.ndarray or scipy.sparse.csc_matrix using the shared memory.
+    """
+    T = []
+    for spec in specs:
+        if spec[0] == "sparse":
+            shape = spec[1]
+            data, indices, indptr = (_attach_array(array_spec, blocks) for array_spec in spec[2:])
+            T.append(scipy.sparse.csc_matrix((data, indices, indptr), shape=shape, copy=False))
+        else:
+            T.append(_attach_array(spec[1], blocks))
+
+    return T
+
+def _counts_task(counts, specs, start, stop):
+    """Computes the rows ``start:stop`` of a count matrix in a worker process.
+
+    :param counts: function computing the rows of the count matrix from the tensor.
+    :param specs: list of the specifications of the shared matrices.
+    :param start: first row.
+    :param stop: row after the last row.
+
+    :return: ``start`` and the rows of the count matrix.
+    """
+    blocks = []
+    T = None
+    try:
+        T = _attach_layers(specs, blocks)
+        rows = counts(T, slice(start, stop))
+    finally:
+        # The arrays must be released before the blocks are closed
+        T = None
+        for block in blocks:
+            block.close()
+
+    return start, rows
+
+def sharded_counts(counts, T, n_jobs=None):
+    """Returns a count matrix with its rows computed by a pool of processes.
+
+    The rows of the count matrix are the units ``i`` of the transitions, so every process
+    computes a contiguous block of rows of the whole matrix.
+    The matrices of the tensor are copied once into shared memory and read by all the processes.
+    Every row is computed by a single process, so the matrix is identical to the matrix computed by one process.
+
+    :param counts: function ``counts(T, rows)`` returning the rows ``rows`` of the count matrix.
+        Must be defined at the top level of a module.
+    :param T: list of dense matrices or scipy.sparse matrices.
+    :param n_jobs: Number of processes. ``None`` or ``1`` computes the matrix in this process
+        and ``-1`` uses one process per CPU. (Default=None)
+
+    :return: count matrix of (n, n) dimensions.
+
+    :raises ValueError: ``n_jobs`` is neither a positive integer, ``-1`` nor ``None``.
+    """
+    workers = _worker_number(n_jobs)
+
+    unit_number = T[0].shape[1]
+
+    if workers == 1 or unit_number < 2:
+        return counts(T, slice(None))
+
+    # More blocks than processes balance the work of the processes
+    bounds = np.linspace(0, unit_number, min(unit_number, 4 * workers) + 1).astype(int)
+
+    _P = np.zeros((unit_number, unit_number))
+
+    blocks = []
+    try:
+        specs = _share_layers(T, blocks)
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_counts_task, counts, specs, start, stop)
+                       for start, stop in zip(bounds[:-1], bounds[1:])]
+
+            for future in futures:
+                start, rows = future.result()
+                _P[start:start + rows.shape[0]] = rows
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    return _P
@@ -1,21 +1,34 @@
 import pandas as pd
 import numpy as np
-from datetime import datetime
 import sys
-from tqdm import tqdm
+from ..dataprocessing.semester_index import semester_index, SEMESTER_HEADER
+from ..instrumentation import logger, stage, array_bytes, progress
 
 
-def sequence_matrix(data, sem_separator_month=8):
+ENGINES = ("vectorized", "loop")
+
+
+def sequence_matrix(data, sem_separator_month=8, engine="vectorized", encoder=None):
     """Return the sequence matrix.
 
+    ``engine="vectorized"`` (Default) reads the semesters of all the students from the ``semester_index`` column,
+    which ``semester_index`` adds to ``data`` when it is missing.
+    ``engine="loop"`` processes one student at a time and is kept as the reference implementation.
+    Both engines return identical results.
+    With an ``encoder``, the ``student_id`` and ``unit_name`` columns of ``data`` are the codes of the encoder
+    and the rows and columns of the matrix are the codes of all the students and units of the encoder.
+
     :param data: Pandas dataframe for which the sequence matrix is to be generated.
     :param sem_separator_month: Month number used to separate the semesters. Default value is 8 for august.
+    :param engine: engine used to compute the matrix, ``"vectorized"`` or ``"loop"``. (Default=``"vectorized"``)
+    :param encoder: Encoder of the coded ``data``. (Default=None)
 
     :returns M: sequence matrix of m x n where m = rows of students and n = columns of units.
     :returns students: list of all the students in the data.
     :returns units: list of all the units in the data.
 
     :raises TypeError: The parameter to sequence_matrix must contain pandas dataframe.
+    :raises ValueError: Unknown engine, or codes of ``data`` not in the encoder.
 
     :Example:
 
@@ -25,21 +38,88 @@ def sequence_matrix(data, sem_separator_month=8):
     >>> M, students, units = sp.sequence_matrix(data)
     """
 
-    # Calculating start time
-    start_time = datetime.now()
-
     #Checking for pandas dataframe
-    print("Checking for the input parameter is pandas dataframe...", end="")
     if not isinstance(data, pd.DataFrame):
         raise TypeError("The parameter to sequence_matrix must contain pandas dataframe.")
 
-    print(u'\N{check mark}')
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine}. Use one of {ENGINES}.")
+
+    with stage("sequence_matrix", engine=engine, rows=len(data)) as record:
+        # Checking for datetime
+        logger.debug("sequence_matrix: converting the dates to datetime objects")
+        data.outcome_date = pd.to_datetime(data.outcome_date)
+
+        if engine == "vectorized":
+            M, students, units = _sequence_matrix_vectorized(data, sem_separator_month)
+        else:
+            M, students, units = _sequence_matrix_loop(data, sem_separator_month)
+
+        if encoder is not None:
+            M, students, units = _encoded_matrix(M, students, units, encoder)
+
+        record.update(students=M.shape[0], units=M.shape[1], array_bytes=array_bytes(M))
+
+    return M, students.tolist(), units.tolist()
+
+def _encoded_matrix(M, students, units, encoder):
+    """Returns the sequence matrix with the codes of the encoder as rows and columns.
+
+    :param M: sequence matrix of the students and units of the data.
+    :param students: array of the codes of the students of the data.
+    :param units: array of the codes of the units of the data.
+    :param encoder: Encoder of the data.
+
+    :returns M: sequence matrix of all the students and units of the encoder.
+    :returns students: array of the codes of the students.
+    :returns units: array of the codes of the units.
+
+    :raises ValueError: The codes are not in the encoder.
+    """
+    encoder.check_codes("student_id", students)
+    encoder.check_codes("unit_name", units)
+
+    M_codes = np.zeros((encoder.size("student_id"), encoder.size("unit_name")))
+    M_codes[np.ix_(students.astype(np.intp), units.astype(np.intp))] = M
+
+    return M_codes, np.arange(encoder.size("student_id")), np.arange(encoder.size("unit_name"))
+
+def _sequence_matrix_vectorized(data, sem_separator_month=8):
+    """Returns the sequence matrix computed for all the students together.
+
+    :param data: Pandas dataframe with the outcome_date as datetime objects.
+    :param sem_separator_month: Month number used to separate the semesters. (Default=8)
 
-    # Checking for datetime
-    print("Converting to dates to datetime object...", end="")
-    data.outcome_date = pd.to_datetime(data.outcome_date)
+    :returns M: sequence matrix of m x n where m = rows of students and n = columns of units.
+    :returns students: array of all the students in the data.
+    :returns units: array of all the units in the data.
+    """
+
+    # Semester of every result, computed once per dataset
+    semesters = semester_index(data, sem_separator_month, inplace=True)[SEMESTER_HEADER].to_numpy()
+
+    # Codes of the students and units in the order of their appearance
+    student_codes, students = pd.factorize(data["student_id"])
+    unit_codes, units = pd.factorize(data["unit_name"])
+
+    # Generates a matrix of size m x n where m = students and n = units
+    M = np.zeros((len(students), len(units)))
 
-    print(u'\N{check mark}')
+    # A repeated unit keeps the semester of its latest result
+    np.maximum.at(M, (student_codes, unit_codes), semesters)
+
+    return M, np.asarray(students), np.asarray(units)
+
+def _sequence_matrix_loop(data, sem_separator_month=8):
+    """Returns the sequence matrix computed one student at a time.
+
+    :param data: Pandas dataframe with the outcome_date as datetime objects.
+    :param sem_separator_month: Month number used to separate the semesters. (Default=8)
+
+    :returns M: sequence matrix of m x n where m = rows of students and n = columns of units.
+    :returns students: array of all the students in the data.
+    :returns units: array of all the units in the data.
+    """
 
     # Number of units
     unit_number = data["unit_name"].nunique()
@@ -56,16 +136,8 @@ def sequence_matrix(data, sem_separator_month=8):
     # list of units with unit_name
     units = data["unit_name"].unique()
 
-    print("Initiating sequence matrix generation...", end="")
-
-    # Initiating progress bar
-    loop = tqdm(total=data.shape[0], position=0, leave=False)
-
     # Iterating through the list of students
-    for student in students:
-        # loop counter variable
-        k = 0
-
+    for student in progress(students, len(students), "sequence_matrix"):
         # Getting the dataframe of the student from students list
         student_data = data.loc[data["student_id"] == student]
 
@@ -75,10 +147,6 @@ def sequence_matrix(data, sem_separator_month=8):
         # list of units with unit_name
         student_units = student_data["unit_name"]
 
-        # getting the outcome years of the results
-        outcome_years = student_data["outcome_date"].dt.year.unique()
-        outcome_months = student_data["outcome_date"].dt.month.unique()
-
         # Initialising
         current_year = 0
         past_month = 0
@@ -107,14 +175,4 @@ def sequence_matrix(data, sem_separator_month=8):
             # Updating the sequence matrix
             M[student_index][unit_index] = semester_preference
 
-            loop.set_description("Loading...".format(k))
-            k += 1
-            loop.update(1)
-
-    loop.close()
-
-    # Calculating elapsed time
-    elapsed_time = datetime.now() - start_time
-    print(f"Time elapsed (hh:mm:ss.ms) {elapsed_time}")
-
-    return M, students.tolist(), units.tolist()
+    return M, students, units
@@ -0,0 +1,188 @@
+import pandas as pd
+import numpy as np
+import os
+from .tensors import _sequence_coo, _coo_to_tensor
+from ..instrumentation import logger
+
+# Files of the on-disk sparse store, one per array of the non-zero elements
+COO_FILES = ("layers", "students", "units", "values")
+
+COO_DTYPE = np.int64
+
+
+def sequence_tensor_stream(source,
+                           directory,
+                           units_data=None,
+                           sem_separator_month=8,
+                           unit_header="unit_code",
+                           id_header="student_id",
+                           date_header="outcome_date",
+                           units_from_students_data=True,
+                           chunksize=100000):
+    """Computes the sequence tensor of a results file too large for the memory.
+
+    The ``source`` is read in chunks of ``chunksize`` rows.
+    The rows of a student must be consecutive in the file, eg: the file is sorted by ``id_header``.
+    The last student of every chunk is carried over to the next chunk so that the semesters and
+    the repeated units of every student are computed with all the results of the student.
+    The non-zero elements of the tensor are appended to memory-mapped arrays in ``directory``
+    so that the memory used is bounded by the size of the chunks.
+    The elements are the same as the elements of ``sequence_tensor`` for the whole file.
+
+    :param source: path to the csv file or to a Parquet file (``.parquet``).
+    :param directory: Directory of the memory-mapped arrays.
+    :param units_data: Pandas dataframe of unit data. (Default=None)
+    :param sem_separator_month: Month number used to separate the semesters. (Default=8)
+    :param unit_header: Column heading for unit name. (Default="unit_code")
+    :param id_header: Column heading for student id. (Default="student_id")
+    :param date_header: Column heading for outcome date. (Default="outcome_date")
+    :param units_from_students_data: Bool (Default=True)
+    :param chunksize: Number of rows read at a time. (Default=100000)
+
+    :return coo: numpy.memmap of the layers, students, units and semesters of the non-zero elements.
+    :return students: list of all the students in the data.
+    :return units: list of all the units in the data.
+
+    :raises ValueError: The rows of a student are not consecutive, or a unit is not in the units data.
+
+    :Example:
+
+    >>> import studentpathway as sp
+    >>> units_data = pd.read_csv("units_data/engineering_data/engineering_units.csv")
+    >>> coo, students, units = sp.sequence_tensor_stream("students_data/combined_data/eng_data.csv",
+    ...                                                   "tensor_store",
+    ...                                                   units_data)
+    >>> T = sp.stream_to_tensor(coo, students, units, sparse=True)
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    fixed_units = isinstance(units_data, pd.DataFrame) and not units_from_students_data
+
+    if fixed_units:
+        units = list(units_data[unit_header].unique())
+    else:
+        units = []
+    unit_index = pd.Index(units)
+
+    students = []
+    seen = set()
+
+    files = [open(os.path.join(directory, name + ".bin"), "wb") for name in COO_FILES]
+
+    def write(chunk):
+        nonlocal unit_index
+
+        student_codes, chunk_students = pd.factorize(chunk[id_header])
+
+        if not seen.isdisjoint(chunk_students):
+            raise ValueError(f"The rows of the students are not consecutive in {source}.")
+
+        chunk_units = chunk[unit_header]
+        unit_codes = unit_index.get_indexer(chunk_units)
+
+        if (unit_codes < 0).any():
+            if fixed_units:
+                missing = chunk_units.to_numpy()[unit_codes < 0][0]
+                raise ValueError(f"{missing} is not in the units data.")
+
+            # New units are coded in the order of their first result
+            units.extend(pd.unique(chunk_units.to_numpy()[unit_codes < 0]))
+            unit_index = pd.Index(units)
+            unit_codes = unit_index.get_indexer(chunk_units)
+
+        dates = pd.to_datetime(chunk[date_header], dayfirst=True)
+
+        layers, student_codes, unit_codes, values = _sequence_coo(student_codes,
+                                                                  unit_codes,
+                                                                  dates,
+                                                                  len(units),
+                                                                  sem_separator_month)
+
+        for file, array in zip(files, (layers, student_codes + len(students), unit_codes, values)):
+            file.write(np.asarray(array, dtype=COO_DTYPE).tobytes())
+
+        students.extend(chunk_students)
+        seen.update(chunk_students)
+
+    try:
+        carry = None
+        for chunk in _read_chunks(source, [id_header, unit_header, date_header], chunksize):
+            if carry is not None:
+                chunk = pd.concat([carry, chunk], ignore_index=True)
+
+            if not len(chunk):
+                continue
+
+            # The last student can have more results in the next chunk
+            ids = chunk[id_header].to_numpy()
+            last = len(ids) - np.argmax(ids[::-1] != ids[-1]) if (ids != ids[-1]).any() else 0
+
+            carry = chunk.iloc[last:]
+            if last:
+                write(chunk.iloc[:last])
+
+        if carry is not None and len(carry):
+            write(carry)
+    finally:
+        for file in files:
+            file.close()
+
+    coo = tuple(_open_array(os.path.join(directory, name + ".bin")) for name in COO_FILES)
+
+    return coo, students, units
+
+def _read_chunks(source, columns, chunksize):
+    """Yields the chunks of a csv or Parquet file as pandas dataframes.
+
+    :param source: path to the csv file or to a Parquet file (``.parquet``).
+    :param columns: Columns to read.
+    :param chunksize: Number of rows read at a time.
+
+    :return: generator of pandas dataframes.
+    """
+    if str(source).endswith(".parquet"):
+        try:
+            import pyarrow.parquet
+        except ImportError:
+            logger.warning("sequence_tensor_stream: ImportError: reading Parquet files requires pyarrow. "
+                           "Install it with `pip install pyarrow`.")
+            raise
+
+        for batch in pyarrow.parquet.ParquetFile(source).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(source, usecols=columns, chunksize=chunksize)
+
+def _open_array(path):
+    """Returns the memory-mapped array of a file of the sparse store.
+
+    :param path: path to the file.
+
+    :return: numpy.memmap, or an empty numpy.ndarray for an empty file.
+    """
+    if not os.path.getsize(path):
+        return np.zeros(0, dtype=COO_DTYPE)
+
+    return np.memmap(path, dtype=COO_DTYPE, mode="r")
+
+def stream_to_tensor(coo, students, units, sparse=False):
+    """Returns the sequence tensor from the output of ``sequence_tensor_stream``.
+
+    :param coo: arrays of the layers, students, units and semesters of the non-zero elements.
+    :param students: list of all the students in the data.
+    :param units: list of all the units in the data.
+    :param sparse: Bool to return the matrices as scipy.sparse.csr_matrix. (Default=False)
+
+    :return: Sequence tensor as a list of matrices.
+
+    :Example:
+
+    >>> import studentpathway as sp
+    >>> coo, students, units = sp.sequence_tensor_stream("students_data/combined_data/eng_data.csv", "tensor_store")
+    >>> T = sp.stream_to_tensor(coo, students, units, sparse=True)
+    """
+    layers, student_codes, unit_codes, values = (np.asarray(array) for array in coo)
+
+    return _coo_to_tensor(layers, student_codes, unit_codes, values,
+                          shape=(len(students), len(units)),
+                          sparse=sparse)
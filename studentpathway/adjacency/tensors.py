@@ -1,9 +1,11 @@
 import pandas as pd
 import numpy as np
-from datetime import datetime
 import sys
-from tqdm import tqdm
-import random
+import scipy.sparse
+from ..dataprocessing.semester_index import _semester_ordinals, semester_index, SEMESTER_HEADER
+from .adjacency_matrix import ENGINES, _transition_counts, _transition_probabilities
+from .parallel import sharded_counts
+from ..instrumentation import stage, array_bytes
 
 
 def sequence_tensor(students_data,
@@ -12,97 +14,197 @@ def sequence_tensor(students_data,
                     unit_header="unit_code",
                     id_header="student_id",
                     date_header="outcome_date",
-                    units_from_students_data=True):
+                    units_from_students_data=True,
+                    sparse=False,
+                    encoder=None):
     """Returns a sequence tensor of the student unit selection.
 
+    The tensor is computed for all the students together after sorting the data once.
+    The semesters are read from the ``semester_index`` column, which ``semester_index`` adds to ``students_data`` when it is missing.
+    A new matrix is added to the tensor every time a student repeats a unit.
+    ``sparse=True`` returns every matrix of the tensor as a ``scipy.sparse.csr_matrix``
+    so that the dense tensor is never allocated.
+    With an ``encoder``, the ``id_header`` and ``unit_header`` columns of ``students_data`` are the codes of the encoder,
+    the rows and columns of the matrices are the codes of all the students and units of the encoder
+    and ``units_data`` is not used.
+
     :param students_data: Pandas dataframe.
     :param units_data: Pandas dataframe of unit data. (Default=None)
     :param sem_separator_month: Month  number used to separate the semesters. (Default=8)
     :param unit_header: Column heading for unit name. (Default="unit_name")
     :param id_header: Column heading for student it. (Default="student_id")
     :param units_from_students_data: Bool (Default=True)
+    :param sparse: Bool to return the matrices as scipy.sparse.csr_matrix. (Default=False)
+    :param encoder: Encoder of the coded ``students_data``. (Default=None)
 
     :return T: Sequence tensors of i x j x k where i = rows, j = columns, k = dimensions.
     :return students: list of all the students in the data.
     :return units: list of all the units in the data.
 
+    :raises ValueError: A unit in the students data is not in the units data, or a code is not in the encoder.
+
     :Example:
 
     >>> import studentpathway as sp
     >>> students_data = pd.read_csv("students_data/combined_data/eng_data.csv")
     >>> units_data = pd.read_csv("units_data/engineering_data/engineering_units.csv")
     >>> T, students, units = sp.sequence_tensor(students_data, units_data)
+    >>> T, students, units = sp.sequence_tensor(students_data, units_data, sparse=True)
     """
 
-    data = students_data.copy()
+    with stage("sequence_tensor", rows=len(students_data)) as record:
+        students_data[date_header] = pd.to_datetime(students_data[date_header], dayfirst=True)
+
+        # Semester of every result, computed once per dataset
+        semester_index(students_data, sem_separator_month, id_header, date_header, inplace=True)
+
+        # Codes and list of students
+        if encoder is not None:
+            student_codes = students_data[id_header].to_numpy()
+            encoder.check_codes(id_header, student_codes)
+            students = list(range(encoder.size(id_header)))
+        else:
+            student_codes, students = pd.factorize(students_data[id_header])
+            students = list(students)
+
+        # Codes and list of units
+        if encoder is not None:
+            unit_codes = students_data[unit_header].to_numpy()
+            encoder.check_codes(unit_header, unit_codes)
+            units = list(range(encoder.size(unit_header)))
+        elif isinstance(units_data, pd.DataFrame) and not units_from_students_data:
+            units = list(units_data[unit_header].unique())
+            unit_codes = pd.Index(units).get_indexer(students_data[unit_header])
+
+            if (unit_codes < 0).any():
+                missing = students_data[unit_header].to_numpy()[unit_codes < 0][0]
+                raise ValueError(f"{missing} is not in the units data.")
+        else:
+            unit_codes, units = pd.factorize(students_data[unit_header])
+            units = list(units)
+
+        coo = _sequence_coo(student_codes,
+                            unit_codes,
+                            students_data[date_header],
+                            len(units),
+                            sem_separator_month,
+                            students_data[SEMESTER_HEADER].to_numpy())
+
+        T = _coo_to_tensor(*coo, shape=(len(students), len(units)), sparse=sparse)
+
+        record.update(students=len(students), units=len(units), layers=len(T), array_bytes=array_bytes(T))
+
+    return T, students, units
+
+def _sequence_coo(student_codes, unit_codes, dates, unit_number, sem_separator_month=8, semesters=None):
+    """Returns the non-zero elements of the sequence tensor.
+
+    :param student_codes: numpy.ndarray of integer codes of the students.
+    :param unit_codes: numpy.ndarray of integer codes of the units.
+    :param dates: Pandas series of the outcome dates as datetime objects.
+    :param unit_number: Number of units.
+    :param sem_separator_month: Month number used to separate the semesters. (Default=8)
+    :param semesters: numpy.ndarray of the semester ordinals of the results, computed when ``None``. (Default=None)
 
-    students_data.loc[:, (date_header)] = pd.to_datetime(data.loc[:, (date_header)], dayfirst=True)
+    :return: numpy.ndarrays of the layers, students, units and semesters of the elements.
+    """
 
-    # List of students
-    students = list(students_data[id_header].unique())
+    # Sorting the results by student and then by outcome date
+    order = np.lexsort((dates.to_numpy(), student_codes))
+    student_codes = np.asarray(student_codes)[order]
+    unit_codes = np.asarray(unit_codes)[order]
 
-    # List of units
-    if not units_from_students_data:
-        units = list(units_data[unit_header].unique())
+    if semesters is None:
+        values = _semester_ordinals(student_codes, dates.iloc[order], sem_separator_month)
     else:
-        units = list(students_data[unit_header].unique())
+        values = np.asarray(semesters)[order]
 
-    if not isinstance(units_data, pd.DataFrame):
-        units = list(students_data[unit_header].unique())
+    # Every repetition of a unit by a student goes to the next layer
+    key = student_codes.astype(np.int64) * unit_number + unit_codes
+    key_order = np.argsort(key, kind="stable")
+    sorted_key = key[key_order]
 
-    # Creating a Tensor
-    T = [np.zeros((len(students), len(units)))]
+    positions = np.arange(len(key))
+    first = np.ones(len(key), dtype=bool)
+    first[1:] = sorted_key[1:] != sorted_key[:-1]
 
-    for student in students:
-        # getting the data of a single student
-        df0 = students_data.loc[students_data[id_header] == student]
-        df1 = df0.copy()
+    layers = np.empty(len(key), dtype=np.int64)
+    layers[key_order] = positions - np.maximum.accumulate(np.where(first, positions, 0))
 
-        # Re-organising the student df by unit outcome date
-        df1 = df0.sort_values(by=[date_header], ignore_index=True)
+    return layers, student_codes, unit_codes, values
 
-        years = list(df1[date_header].dt.year.unique())
-        months = list(df1[date_header].dt.month.unique())
+def _coo_to_tensor(layers, student_codes, unit_codes, values, shape, sparse=False):
+    """Returns the sequence tensor from its non-zero elements.
 
-        # A list of units taken by a student
-        s_units = list(df1[unit_header])
+    :param layers: numpy.ndarray of the layers of the elements.
+    :param student_codes: numpy.ndarray of the rows of the elements.
+    :param unit_codes: numpy.ndarray of the columns of the elements.
+    :param values: numpy.ndarray of the values of the elements.
+    :param shape: shape of every matrix of the tensor.
+    :param sparse: Bool to return the matrices as scipy.sparse.csr_matrix. (Default=False)
 
-        # Initialising for allocation of matrix
-        current_year = 0
-        past_month = 0
-        semester_preference = 0
+    :return: Sequence tensor as a list of matrices.
+    """
+    layer_number = int(layers.max()) + 1 if len(layers) else 1
 
-        for i in range(len(s_units)):
-            # Initialising updated to False to check if changes are made to the matrix.
-            updated = False
-            unit = df1.iloc[i][unit_header]
+    if sparse:
+        T = []
+        for k in range(layer_number):
+            mask = layers == k
+            T.append(scipy.sparse.csr_matrix((values[mask].astype(float),
+                                              (student_codes[mask], unit_codes[mask])),
+                                             shape=shape))
+        return T
 
-            # unit outcome year and month
-            uo_year = df1.iloc[i][date_header].year
-            uo_month = df1.iloc[i][date_header].month
+    T = np.zeros((layer_number,) + tuple(shape))
+    T[layers, student_codes, unit_codes] = values
 
-            # import pdb; pdb.set_trace()
-            if uo_year > current_year or uo_month > sem_separator_month:
-                if past_month != uo_month:
-                    semester_preference += 1
-                    past_month = uo_month
-                current_year = uo_year
+    return list(T)
 
-            student_index = students.index(student)
-            unit_index = units.index(unit)
+def _column(matrix, j):
+    """Returns the column ``j`` of a dense or sparse matrix as a numpy.ndarray.
 
-            # every matrix in the tensor T
-            for m in T:
-                if not m[student_index][unit_index]:
-                    m[student_index][unit_index] = semester_preference
-                    updated = True
-                    break
+    :param matrix: numpy.ndarray or scipy.sparse matrix.
+    :param j: index of the column.
 
-            if not updated:
-                T.append(np.zeros((len(students), len(units))))
-                T[-1][student_index][unit_index] = semester_preference
+    :return: numpy.ndarray of the column.
+    """
+    if scipy.sparse.issparse(matrix):
+        return matrix[:, j].toarray().ravel()
 
-    return T, students, units
+    return matrix[:, j]
+
+def _find_value(matrix, value):
+    """Returns the rows and columns of the elements of a dense or sparse matrix equal to ``value``.
+
+    :param matrix: numpy.ndarray or scipy.sparse matrix.
+    :param value: non-zero value to find.
+
+    :return: numpy.ndarrays of the rows and the columns.
+    """
+    if scipy.sparse.issparse(matrix):
+        coo = matrix.tocoo()
+        mask = coo.data == value
+        return coo.row[mask], coo.col[mask]
+
+    return np.nonzero(matrix == value)
+
+def _unit_totals(T):
+    """Returns the number of times every unit was taken in the sequence tensor.
+
+    :param T: Sequence tensor of dense or sparse matrices.
+
+    :return: numpy.ndarray with the count for every unit.
+    """
+    if any(scipy.sparse.issparse(m) for m in T):
+        T_concat = scipy.sparse.vstack([scipy.sparse.csr_matrix(m) for m in T])
+        return np.asarray((T_concat > 0).sum(axis=0)).ravel()
+
+    T_concat = np.concatenate(T)
+
+    Tj = np.where(T_concat > 0, 1, 0)
+
+    return np.sum(Tj, axis=0)
 
 def _compute_count(dim0, dim1, T, i, j):
     """Returns the count of students in the sequence.
@@ -115,51 +217,146 @@ def _compute_count(dim0, dim1, T, i, j):
 
     :return: Count of the students in the sequence.
     """
-    delta = T[dim0][:, j] - T[dim1][:, i]
+    Tdim = _column(T[dim0], j)
 
-    d = np.absolute(delta)
+    delta = Tdim - _column(T[dim1], i)
 
-    Tdim = T[dim0][:, j]
+    d = np.absolute(delta)
 
     count = np.sum(np.where(delta >= 0, 1, 0)
                    * np.where(d == 1, 1, 0)
                    * np.where(Tdim != 1, 1, 0))
     return count
 
-def adjacency_tensor(T):
+def _mid_dimensions(depth):
+    """Returns the layers of the tensor between the top and the bottom layers.
+
+    :param depth: Number of layers of the tensor.
+
+    :return: list of the mid layers.
+    """
+
+    # Removing the top and bottom dimensions of the Tensor.
+    mid_dimensions = [*range(depth)]
+
+    # Remove first dimension
+    mid_dimensions.pop(0)
+
+    # Remove last dimension
+    mid_dimensions.pop(-1)
+
+    return mid_dimensions
+
+def _column_sums(matrix):
+    """Returns the sum of every column of a dense or sparse matrix.
+
+    :param matrix: numpy.ndarray or scipy.sparse matrix.
+
+    :return: numpy.ndarray of the column sums.
+    """
+    return np.asarray(matrix.sum(axis=0)).ravel()
+
+def adjacency_tensor(T, engine="vectorized", n_jobs=None):
     """Returns the adjacency matrix from the sequence tensor.
 
-    :param T: Sequence tensor of (i, j, k) dimensions.
+    ``engine="vectorized"`` (Default) computes the top, mid and bottom contributions of all the units
+    at once with matrix products between the layers of the tensor.
+    ``engine="loop"`` computes every pair of units one at a time and is kept as the reference implementation.
+    In both engines, the contributions of a unit ``j`` stop at the first mid layer where nobody took ``j``.
+    ``n_jobs`` splits the rows of the vectorized engine between processes sharing ``T`` in shared memory.
+
+    :param T: Sequence tensor of (i, j, k) dimensions. The matrices can be scipy.sparse matrices.
+    :param engine: engine used to compute the matrices, ``"vectorized"`` or ``"loop"``. (Default=``"vectorized"``)
+    :param n_jobs: Number of processes of the vectorized engine, ``-1`` uses all the CPUs.
+        Must be None with the loop engine. (Default=None)
 
     :return: Adjacency matrix represting markov chain.
+
+    :raises ValueError: Unknown engine, invalid ``n_jobs``, or ``n_jobs`` with the loop engine.
     """
 
-    # Getting the dimensions for P matrix
-    P_dim = T[0].shape[1]
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine}. Use one of {ENGINES}.")
 
-    # Getting total number of students from a matrix from T.
-    total_students = T[0].shape[0]
+    if engine == "loop" and n_jobs is not None:
+        raise ValueError("n_jobs is only used by the vectorized engine.")
 
-    # Creating a zeros P matrix of size of units from T.
-    P = np.zeros((P_dim, P_dim))
+    # Column access for the sparse matrices
+    T = [m.tocsc() if scipy.sparse.issparse(m) else m for m in T]
 
-    _P = P.copy()
+    with stage("adjacency_tensor", engine=engine, layers=len(T), units=T[0].shape[1]) as record:
+        # Summing up all the columns - indicates the number of times a unit was taken.
+        Tj_total = _unit_totals(T)
 
-    # Removing the top and bottom dimensions of the Tensor.
-    mid_dimensions = [*range(len(T))]
+        if engine == "vectorized":
+            _P = sharded_counts(_adjacency_tensor_counts, T, n_jobs)
+            P = _transition_probabilities(_P, Tj_total)
+        else:
+            _P, P = _adjacency_tensor_loop(T, Tj_total)
 
-    # Remove first dimension
-    mid_dimensions.pop(0)
+        record["array_bytes"] = array_bytes(T, _P, P)
 
-    # Remove last dimension
-    mid_dimensions.pop(-1)
+    return _P, P
 
-    T_concat = np.concatenate(T)
+def _adjacency_tensor_counts(T, rows=slice(None)):
+    """Returns the count matrix of the sequence tensor computed for all the units at once.
 
-    Tj = np.where(T_concat > 0, 1, 0)
-    Tj_total = np.sum(Tj, axis=0)
+    :param T: Sequence tensor of dense matrices or scipy.sparse.csc_matrix.
+    :param rows: slice of the units ``i`` of the rows. (Default=all the units)
+
+    :return: count matrix of (len(rows), n) dimensions.
+    """
+    mid_dimensions = _mid_dimensions(len(T))
+
+    # Count top dimension
+    _P = _transition_counts(T[0][:, rows], T[0])
+
+    # Units whose contributions did not terminate yet
+    active = np.ones(T[0].shape[1], dtype=bool)
+
+    for k in mid_dimensions:
+        active &= _column_sums(T[k]) != 0
+
+        if not active.any():
+            break
+
+        columns = np.flatnonzero(active)
+
+        # Mid upwards
+        _P[:, columns] += _transition_counts(T[k - 1][:, rows], T[k][:, columns])
+
+        # Mid same
+        _P[:, columns] += _transition_counts(T[k][:, rows], T[k][:, columns])
+
+        # Mid lower
+        _P[:, columns] += _transition_counts(T[k][:, rows], T[k + 1][:, columns])
+
+    # Count bottom dimension
+    columns = np.flatnonzero(active)
+    if len(columns):
+        _P[:, columns] += _transition_counts(T[-1][:, rows], T[-1][:, columns])
+
+    return _P
+
+def _adjacency_tensor_loop(T, Tj_total):
+    """Returns the adjacency matrices computed one pair of units at a time.
+
+    :param T: Sequence tensor of dense matrices or scipy.sparse.csc_matrix.
+    :param Tj_total: number of times every unit was taken.
+
+    :return: count matrix and adjacency matrix of (n, n) dimensions.
+    """
+
+    # Getting the dimensions for P matrix
+    P_dim = T[0].shape[1]
+
+    # Creating a zeros P matrix of size of units from T.
+    P = np.zeros((P_dim, P_dim))
+
+    _P = P.copy()
+
+    mid_dimensions = _mid_dimensions(len(T))
 
-    # Summing up all the columns - indicates the number of times a unit was taken.
     for i in range(P_dim):
         for j in range(P_dim):
             count = []
@@ -169,7 +366,7 @@ def adjacency_tensor(T):
             count.append(_compute_count(0, 0, T, i, j))
 
             for k in mid_dimensions:
-                if not np.sum(T[k][:, j]):
+                if not np.sum(_column(T[k], j)):
                     terminate = True
                     break
                 # Mid upwards
@@ -194,14 +391,250 @@ def adjacency_tensor(T):
 
     return _P, P
 
-def projections(students, P):
-    """Returns the projection of students given the current students in the sequence tensor.
+def _student_offsets(students):
+    """Returns the integer codes of the students of every unit.
 
-    :param students: A dictionary of students in every unit.
+    The codes follow the sorted student ids when the ids can be sorted, and the codes of every unit are sorted,
+    so that the codes do not depend on the iteration order of the sets
+    and the dictionary and the compact form of the same students get the same codes.
+
+    :param students: A dictionary of students in every unit,
+        or the compact form returned by ``sort_students_by_units(..., compact=True)``.
+
+    :return ids: numpy.ndarray of the student ids of the codes.
+    :return offsets: numpy.ndarray of the (n + 1) positions of the students of every unit in ``codes``.
+    :return codes: numpy.ndarray of the codes of the students of every unit.
+    """
+    if isinstance(students, tuple):
+        units, ids, codes, offsets = students
+        ids = pd.Series(ids, dtype=object).to_numpy()
+        codes = np.asarray(codes, dtype=np.int64)
+        offsets = np.asarray(offsets, dtype=np.int64)
+    else:
+        sizes = np.array([len(v) for v in students.values()], dtype=np.int64)
+        offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+
+        members = pd.Series([student for v in students.values() for student in v], dtype=object)
+
+        ids = members.unique()
+        codes = pd.Index(ids, dtype=object).get_indexer(members)
+
+    try:
+        order = np.argsort(ids, kind="stable")
+    except TypeError:
+        # Ids of different types keep their order
+        order = None
+
+    if order is not None:
+        ranks = np.empty(len(ids), dtype=np.int64)
+        ranks[order] = np.arange(len(ids))
+        ids = ids[order]
+        codes = ranks[codes]
+
+    codes = codes[np.lexsort((codes, np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))))]
+
+    return ids, offsets, codes
+
+def _projection_matrix(students, P):
+    """Returns the units of the students and the matrix of transitions between them.
+
+    :param students: A dictionary of students in every unit, or its compact form.
     :param P: Probability of student transitions.
 
+    :return units: list of the units of ``students``.
+    :return P: numpy.ndarray of (n, n) dimensions.
+
+    :raises ValueError: ``P`` is not of the size of the units.
+    """
+    # Units in the new data
+    units = list(students[0]) if isinstance(students, tuple) else list(students.keys())
+
+    P = np.asarray(P)
+    if P.shape != (len(units), len(units)):
+        raise ValueError(f"P must be of ({len(units)}, {len(units)}) dimensions for the units of students.")
+
+    return units, P
+
+def _projection_flows(offsets, P):
+    """Returns the number of students moving between every pair of units.
+
+    The flow from unit ``k`` to unit ``i`` is ``round(len(students[k]) * P[k, i])``,
+    computed for all the pairs of units at once as the product of the diagonal matrix of the student counts with ``P``.
+
+    :param offsets: numpy.ndarray of the (n + 1) positions of the students of every unit.
+    :param P: Probability of student transitions of (n, n) dimensions.
+
+    :return: numpy.ndarray of (n, n) flows.
+    """
+    return np.round(np.diff(offsets)[:, np.newaxis] * P).astype(np.int64)
+
+class _PairSet:
+    """Set of integer keys of the pairs of units and students already projected.
+
+    The keys are kept in sorted arrays of decreasing sizes, merged like the digits of a binary counter,
+    so the memory is proportional to the number of pairs and every look-up is a few binary searches.
+    """
+
+    def __init__(self):
+        self.levels = []
+
+    def add(self, keys):
+        """Adds the keys.
+
+        :param keys: numpy.ndarray of the keys.
+        """
+        keys = np.unique(keys)
+
+        while self.levels and len(self.levels[-1]) <= len(keys):
+            keys = np.union1d(self.levels.pop(), keys)
+
+        if len(keys):
+            self.levels.append(keys)
+
+    def contains(self, keys):
+        """Returns True for the keys in the set.
+
+        :param keys: numpy.ndarray of the keys.
+
+        :return: numpy.ndarray of booleans.
+        """
+        found = np.zeros(keys.size, dtype=bool)
+
+        if not self.levels:
+            return found.reshape(keys.shape)
+
+        # Sorted keys are searched faster
+        order = np.argsort(keys, axis=None)
+        sorted_keys = keys.ravel()[order]
+        sorted_found = np.zeros(keys.size, dtype=bool)
+
+        for level in self.levels:
+            positions = np.minimum(np.searchsorted(level, sorted_keys), len(level) - 1)
+            sorted_found |= level[positions] == sorted_keys
+
+        found[order] = sorted_found
+
+        return found.reshape(keys.shape)
+
+def _project_codes(offsets, codes, student_number, P, rng, rounds=3):
+    """Returns the students projected to every unit.
+
+    The number of students moving from unit ``k`` to unit ``i`` is given by ``_projection_flows``.
+    The units are processed in order and every unit ``k`` draws its students for all the units ``i`` together.
+    The students of ``k`` are drawn with replacement and a draw is kept when it is the first draw of the student
+    for ``i`` and the student is not yet projected to ``i``, which keeps the students uniformly drawn among the
+    students not yet projected. The projected pairs are kept in a ``_PairSet``, so the time and the memory
+    grow with the flows and not with the number of units times the number of students.
+    The pairs sending more than half of the students of ``k``, or missing students after ``rounds`` draws,
+    are completed by ranking random keys of all the students of ``k`` not yet projected.
+
+    :param offsets: numpy.ndarray of the (n + 1) positions of the students of every unit in ``codes``.
+    :param codes: numpy.ndarray of the codes of the students of every unit.
+    :param student_number: Number of student codes.
+    :param P: Probability of student transitions of (n, n) dimensions.
+    :param rng: numpy.random.Generator drawing the students.
+    :param rounds: Number of draws with replacement before ranking the keys. (Default=3)
+
+    :return targets: numpy.ndarray of the units of the projected students.
+    :return projected: numpy.ndarray of the codes of the projected students.
+    """
+
+    # Number of students moving between every pair of units
+    flows = _projection_flows(offsets, P)
+
+    # Keys target * student_number + student of the students already projected to every unit
+    taken = _PairSet()
+
+    pair_targets = []
+    pair_students = []
+
+    for k in np.flatnonzero((flows > 0).any(axis=1)):
+        members = codes[offsets[k]:offsets[k + 1]]
+        size = len(members)
+        targets = np.flatnonzero(flows[k] > 0)
+
+        remaining = np.minimum(flows[k, targets], size)
+        exact = remaining > size // 2
+
+        # Keys pair * size + position of the students drawn by the unit
+        chosen = np.zeros(0, dtype=np.int64)
+
+        for _ in range(rounds):
+            draws = np.where(exact, 0, remaining)
+            if not draws.any():
+                break
+
+            pairs = np.repeat(np.arange(len(targets)), draws)
+            positions = rng.integers(0, size, len(pairs))
+            keys = pairs * size + positions
+
+            # First draw of every student not yet drawn by the unit nor projected to the target
+            valid = np.zeros(len(keys), dtype=bool)
+            valid[np.unique(keys, return_index=True)[1]] = True
+            valid &= ~np.isin(keys, chosen)
+            valid &= ~taken.contains(targets[pairs] * student_number + members[positions])
+
+            chosen = np.concatenate([chosen, keys[valid]])
+            remaining -= np.bincount(pairs[valid], minlength=len(targets))
+
+        exact |= remaining > 0
+
+        if exact.any():
+            rows = np.flatnonzero(exact)
+
+            # Students of the unit not yet projected to the targets nor drawn by the unit
+            free = ~taken.contains(targets[rows][:, np.newaxis] * student_number + members)
+            row_of = np.full(len(targets), -1)
+            row_of[rows] = np.arange(len(rows))
+            drawn_pairs, drawn_positions = np.divmod(chosen, size)
+            in_rows = row_of[drawn_pairs] >= 0
+            free[row_of[drawn_pairs[in_rows]], drawn_positions[in_rows]] = False
+
+            # Random order of the free students, the other students last
+            keys = rng.random(free.shape)
+            keys[~free] = 2
+            order = np.argsort(keys, axis=1)
+
+            picked = np.take_along_axis(free, order, axis=1) & (np.arange(size) < remaining[rows][:, np.newaxis])
+            picked_rows, picked_columns = np.nonzero(picked)
+            chosen = np.concatenate([chosen, rows[picked_rows] * size + order[picked_rows, picked_columns]])
+
+        pairs, positions = np.divmod(chosen, size)
+        pair_targets.append(targets[pairs])
+        pair_students.append(members[positions])
+
+        taken.add(pair_targets[-1] * student_number + pair_students[-1])
+
+    if not pair_targets:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    targets = np.concatenate(pair_targets)
+    order = np.argsort(targets, kind="stable")
+
+    return targets[order], np.concatenate(pair_students)[order]
+
+def projections(students, P, seed=None, engine="vectorized"):
+    """Returns the projection of students given the current students in the sequence tensor.
+
+    Every unit ``k`` sends ``round(len(students[k]) * P[k, i])`` of its students to every unit ``i``,
+    drawn at random among its students that are not yet projected to ``i``.
+    ``engine="vectorized"`` (Default) computes the transitions of all the units with one product
+    and draws the students on integer codes with a ``numpy.random.Generator``.
+    ``engine="loop"`` processes one pair of units at a time with sets and is kept as the reference implementation.
+    Both engines return the same counts when the sets of students of the units are disjoint.
+    The same ``seed`` returns the same projection.
+
+    :param students: A dictionary of students in every unit,
+        or the compact form returned by ``sort_students_by_units(..., compact=True)``.
+    :param P: Probability of student transitions of (n, n) dimensions for the n units of ``students``.
+    :param seed: Seed or numpy.random.Generator of the random draws. (Default=None)
+    :param engine: engine used to compute the projections, ``"vectorized"`` or ``"loop"``. (Default=``"vectorized"``)
+
     :return: Projections that indicates the student movement.
 
+    :raises ValueError: Unknown engine, or ``P`` is not of the size of the units.
+
     :Example:
 
     >>> import studentpathway as sp
@@ -210,28 +643,67 @@ def projections(students, P):
                       [0, 0, 0, 0],
                       [0, 1, 0, 1],
                       [0, 0, 0, 0]])
-    >>> projection, projection_count = sp.projections(students, P)
+    >>> projection, projection_count = sp.projections(students, P, seed=0)
     >>> print(projection)
     {'P': set(), 'C': {444, 333, 222, 111}, 'M': set(), 'B': {444, 333, 222, 111}}
     >>> print(projection_count)
     {'P': 0, 'C': 4, 'M': 0, 'B': 4}
     """
 
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine}. Use one of {ENGINES}.")
+
+    units, P = _projection_matrix(students, P)
+
+    rng = np.random.default_rng(seed)
+
+    with stage("projections", engine=engine, units=len(units)) as record:
+        if engine == "vectorized":
+            ids, offsets, codes = _student_offsets(students)
+            targets, projected = _project_codes(offsets, codes, len(ids), P, rng)
+
+            # Projected students of every unit
+            bounds = np.searchsorted(targets, np.arange(len(units) + 1))
+            projection = {unit: set(ids[projected[start:stop]]) for unit, start, stop in zip(units, bounds[:-1], bounds[1:])}
+
+            record.update(students=len(ids), array_bytes=array_bytes(codes, targets, projected))
+        else:
+            if isinstance(students, tuple):
+                ids, offsets, codes = _student_offsets(students)
+                students = {unit: set(ids[codes[start:stop]]) for unit, start, stop in zip(units, offsets[:-1], offsets[1:])}
+
+            projection = _projections_loop(students, units, P, rng)
+
+    # Counting the projection of students
+    projection_count = dict()
+    for k, v in projection.items():
+        projection_count[k] = len(v)
+
+    return projection, projection_count
+
+def _projections_loop(students, units, P, rng):
+    """Returns the projection of students computed one pair of units at a time.
+
+    :param students: A dictionary of students in every unit.
+    :param units: list of the units of ``students``.
+    :param P: Probability of student transitions of (n, n) dimensions.
+    :param rng: numpy.random.Generator drawing the students.
+
+    :return: Dictionary of the projected students of every unit.
+    """
+
     projection = dict()
 
     # Creating a dictionary of projection with units mapping to the set of students
     for k in students:
         projection[k] = set()
 
-    # Units in the new data
-    units = list(students.keys())
-
-    for k, v in students.items():
+    for index, (k, v) in enumerate(students.items()):
         # vector as per the size of the projections.
         vec = np.zeros(len(units))
 
         # Adding the student count to the vector representing a unit.
-        vec[units.index(k)] = len(v)
+        vec[index] = len(v)
 
         # Predicting the transitions.
         pred = list(np.round(np.dot(vec, P)))
@@ -240,29 +712,31 @@ def projections(students, P):
         for i in range(len(pred)):
             if pred[i] > 0:
                 unit = units[i]
-                if not projection[unit]:
-                    projection[unit] = set(random.sample(students[k], int(pred[i])))
-                else:
-                    temp_set = students[k] - projection[unit]
-                    if len(temp_set) > int(pred[i]):
-                        projection[unit] = projection[unit].union(set(random.sample(temp_set, int(pred[i]))))
-                    else:
-                        projection[unit] = projection[unit].union(temp_set)
 
-    # Counting the projection of students
-    projection_count = dict()
-    for k, v in projection.items():
-        projection_count[k] = len(list(v))
+                # Students of the unit not yet projected to the target unit
+                temp_list = list(students[k] - projection[unit])
+                if len(temp_list) > int(pred[i]):
+                    temp_list = [temp_list[j] for j in rng.choice(len(temp_list), int(pred[i]), replace=False)]
 
-    return projection, projection_count
+                projection[unit] = projection[unit].union(temp_list)
+
+    return projection
 
-def sort_students_by_units(T, students, units, sem=1):
+def sort_students_by_units(T, students, units, sem=1, compact=False):
     """Returns the dictionary of units mapping to a set of students.
 
-    :param T: Tensor. List of numpy matrix.
+    The students of a unit are the students with the value ``sem`` for the unit in one of the first ``sem`` layers.
+    All the pairs of students and units are found in the stacked layers at once and grouped by unit with a single sort.
+    ``compact=True`` returns the students in a CSR-like form instead of the dictionary:
+    the list of ``units``, an array of the ``students``, and arrays ``indices`` and ``offsets``
+    such that the students of ``units[u]`` are ``students[indices[offsets[u]:offsets[u + 1]]]``.
+    The compact form can be passed to ``projections`` instead of the dictionary.
+
+    :param T: Tensor. List of numpy matrix or scipy.sparse matrix.
     :param students: List of students.
     :param units: List of units.
     :param sem: Semester value to filter. (Default=1)
+    :param compact: Bool to return the compact form. (Default=``False``)
 
     :return: Dictonary mapping units to a set of students.
 
@@ -277,25 +751,31 @@ def sort_students_by_units(T, students, units, sem=1):
     >>> student_dict = sp.sort_students_by_units(foo, students, units, sem=2)
     >>> student_dict
     {'P': {'111'}, 'C': {'111'}, 'M': {'222'}, 'B': {'222'}}
+    >>> units, students, indices, offsets = sp.sort_students_by_units(foo, students, units, sem=2, compact=True)
     """
-    temp_tensor = []
-
-    for i in range(sem):
-        temp_tensor.append(T[i])
+    layers = T[:sem]
+    student_number = len(students)
+
+    # Pairs of students and units of all the layers, with the rows of the layers one after the other
+    if len(layers) == 0:
+        rows, unit_index = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    elif any(scipy.sparse.issparse(m) for m in layers):
+        rows, unit_index = _find_value(scipy.sparse.vstack(layers), sem)
+    else:
+        # The masks are stacked instead of the layers to copy one byte per element
+        rows, unit_index = np.nonzero(np.vstack([m == sem for m in layers]))
 
-    for t in range(len(temp_tensor)):
-        temp_tensor[t] = np.where(temp_tensor[t]==sem, sem, 0)
+    # Sorted by unit and then by student, without the pairs found in several layers
+    key = np.unique(unit_index.astype(np.int64) * student_number + rows % student_number)
+    unit_index = key // student_number
+    indices = key % student_number
 
-    student_dict = dict()
+    offsets = np.zeros(len(units) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(unit_index, minlength=len(units)))
 
-    for unit in units:
-        student_dict[unit] = set()
+    students = pd.Series(students, dtype=object).to_numpy()
 
-    for t in range(len(temp_tensor)):
-        for i in range(len(units)):
-            student_index_taken = temp_tensor[t][:,i]
-            student_index = list(np.where(student_index_taken==sem)[0])
-            for el in student_index:
-                student_dict[units[i]].add(students[el])
+    if compact:
+        return list(units), students, indices, offsets
 
-    return student_dict
+    return {unit: set(students[indices[start:stop]]) for unit, start, stop in zip(units, offsets[:-1], offsets[1:])}
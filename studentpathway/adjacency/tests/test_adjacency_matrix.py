@@ -25,3 +25,42 @@ def test_adjacency_matrix3():
     M = np.array([[1,0],[1,0],[1,0],[1,0],[1,0]])
     _P, P = adjacency_matrix(M)
     np.testing.assert_almost_equal(P, np.array([[0,0],[0,0]]))
+
+def test_adjacency_matrix4():
+    with pytest.raises(ValueError):
+        _P, P = adjacency_matrix(np.array([[1,0],[1,2]]), engine="unknown")
+
+def test_adjacency_matrix_engines1():
+    for file_name in ["test_data1.csv", "test_data2.csv", "test_data3.csv", "test_data4.csv"]:
+        data = pd.read_csv(PATH + file_name)
+        M, students, units = sequence_matrix(data)
+        _P0, P0 = adjacency_matrix(M, engine="loop")
+        _P1, P1 = adjacency_matrix(M, engine="vectorized")
+        assert (_P0 == _P1).all()
+        assert (P0 == P1).all()
+
+def test_adjacency_matrix_engines2():
+    rng = np.random.default_rng(0)
+    M = rng.integers(0, 6, size=(200, 15)).astype(float)
+    M[:, 3] = 0
+    M[:10, 4] = [-1, 0.5, 1.5, 2.5, -0.5, 7, 8, 3, 2, 1]
+    _P0, P0 = adjacency_matrix(M, engine="loop")
+    _P1, P1 = adjacency_matrix(M, engine="vectorized")
+    assert (_P0 == _P1).all()
+    assert (P0 == P1).all()
+
+def test_adjacency_matrix_n_jobs1():
+    rng = np.random.default_rng(0)
+    M = rng.integers(0, 6, size=(200, 15)).astype(float)
+    _P0, P0 = adjacency_matrix(M)
+    _P1, P1 = adjacency_matrix(M, n_jobs=2)
+    assert (_P0 == _P1).all()
+    assert (P0 == P1).all()
+
+def test_adjacency_matrix_n_jobs2():
+    with pytest.raises(ValueError):
+        _P, P = adjacency_matrix(np.array([[1,0],[1,2]]), n_jobs=0)
+
+def test_adjacency_matrix_n_jobs3():
+    with pytest.raises(ValueError):
+        _P, P = adjacency_matrix(np.array([[1,0],[1,2]]), engine="loop", n_jobs=2)
@@ -0,0 +1,47 @@
+from studentpathway.adjacency.forecast import MatrixPowers, multi_step_projections
+import numpy as np
+import scipy.sparse
+import pytest
+
+P = np.array([[0, 0.5, 0.25, 0],
+              [0, 0, 0.5, 0.5],
+              [0.3, 0.7, 0, 1],
+              [0, 0, 0.2, 0]])
+
+def test_matrix_powers1():
+    powers = MatrixPowers(P)
+    for k in [1, 2, 3, 8, 5, 13, 64, 7]:
+        np.testing.assert_allclose(powers.power(k), np.linalg.matrix_power(P, k))
+
+def test_matrix_powers2():
+    powers = MatrixPowers(scipy.sparse.csr_matrix(P))
+    assert scipy.sparse.issparse(powers.power(6))
+    np.testing.assert_allclose(powers.power(6).toarray(), np.linalg.matrix_power(P, 6))
+
+def test_matrix_powers3():
+    with pytest.raises(ValueError):
+        MatrixPowers(P[:3])
+    with pytest.raises(ValueError):
+        MatrixPowers(P).power(0)
+
+def test_multi_step_projections1():
+    students = {"P": {111, 222, 333, 444}, "C": {555, 666}, "M": set(), "B": {777}}
+    projected = multi_step_projections(students, P, horizons=4)
+
+    counts = np.array([4, 2, 0, 1])
+    assert (projected.shape == (4, 4))
+    for h in range(4):
+        counts = counts @ P
+        np.testing.assert_allclose(projected[h], counts)
+
+def test_multi_step_projections2():
+    counts = np.array([4, 2, 0, 1])
+    powers = MatrixPowers(P)
+    projected = multi_step_projections(counts, powers, horizons=[2, 8])
+
+    np.testing.assert_allclose(projected, multi_step_projections(counts, P, horizons=8)[[1, 7]])
+    assert ({2, 8} <= set(powers.powers))
+
+def test_multi_step_projections3():
+    with pytest.raises(ValueError):
+        multi_step_projections(np.array([1, 2]), P)
@@ -0,0 +1,79 @@
+from studentpathway.adjacency.incremental import *
+from studentpathway.adjacency.tensors import sequence_tensor, adjacency_tensor
+import pandas as pd
+import numpy as np
+import pytest
+import os
+
+PATH = "studentpathway/adjacency/tests/test_data_files"
+
+def test_incremental_adjacency1():
+    for test_data_file in ["test_data5.csv", "test_data6.csv"]:
+        test_data = pd.read_csv(os.path.join(PATH, test_data_file))
+        first = test_data["outcome_date"].str.endswith("2017")
+
+        state = IncrementalAdjacency()
+        state.update(test_data[first])
+        state.update(test_data[~first])
+
+        T, students, units = sequence_tensor(test_data)
+        _P0, P0 = adjacency_tensor(T)
+        _P1, P1 = state.adjacency_tensor()
+
+        assert(state.units == units)
+        assert (_P0 == _P1).all()
+        assert (P0 == P1).all()
+
+def test_incremental_adjacency2(tmp_path):
+    test_data = pd.read_csv(os.path.join(PATH, "test_data6.csv"))
+
+    state = IncrementalAdjacency()
+    for i in range(0, len(test_data), 4):
+        state.update(test_data.iloc[i:i + 4])
+        state.save(tmp_path / "state.npz")
+        state = IncrementalAdjacency.load(tmp_path / "state.npz")
+
+    T, students, units = sequence_tensor(test_data)
+    _P0, P0 = adjacency_tensor(T)
+    _P1, P1 = state.adjacency_tensor()
+
+    assert (_P0 == _P1).all()
+    assert (P0 == P1).all()
+    assert (state.Tj_total == np.sum([np.where(m > 0, 1, 0) for m in T], axis=(0, 1))).all()
+
+def test_incremental_adjacency3():
+    test_data = pd.read_csv(os.path.join(PATH, "test_data6.csv"))
+    test_unit_data = pd.read_csv(os.path.join(PATH, "test_unit_data.csv"))
+
+    state = IncrementalAdjacency(test_unit_data, units_from_students_data=False)
+    with pytest.raises(ValueError):
+        state.update(test_data.assign(unit_code=test_data["unit_code"] + 100))
+
+def test_incremental_adjacency4():
+    rng = np.random.default_rng(0)
+
+    def results(rows, year, students):
+        return pd.DataFrame({"student_id": rng.integers(0, students, rows),
+                             "unit_code": rng.integers(0, 20, rows),
+                             "outcome_date": pd.Timestamp(f"{year}-06-20")})
+
+    new_data = results(50, 2030, 10)
+
+    # Rows read by the update for small and large histories with the same results of the updated students
+    read = []
+    for history in [100, 10000]:
+        state = IncrementalAdjacency()
+        state.update(results(history, 2020, 1000).assign(student_id=lambda d: d["student_id"] + 10))
+        state.update(results(30, 2021, 10))
+        chunks = list(state._chunks)
+
+        rows = []
+        add = state._add
+        state._add = lambda student_codes, *args: (rows.append(len(student_codes)), add(student_codes, *args))
+        state.update(new_data)
+        read.append(rows)
+
+        # The stored chunks are not copied
+        assert all(c is d for c, d in zip(chunks, state._chunks))
+
+    assert (read[0] == read[1] == [30, 80])
@@ -0,0 +1,59 @@
+from studentpathway.adjacency.adjacency_matrix import adjacency_matrix
+from studentpathway.adjacency.sequence_matrix import sequence_matrix
+from studentpathway.instrumentation import (stage, array_bytes, progress, collect_metrics, add_metrics_hook,
+                                            remove_metrics_hook, logger)
+import pandas as pd
+import numpy as np
+import scipy.sparse
+import logging
+import pytest
+
+PATH = "studentpathway/adjacency/tests/test_data_files/"
+
+def test_collect_metrics1():
+    data = pd.read_csv(PATH + "test_data4.csv")
+    with collect_metrics() as records:
+        M, students, units = sequence_matrix(data)
+        _P, P = adjacency_matrix(M)
+
+    assert [record["stage"] for record in records] == ["sequence_matrix", "adjacency_matrix"]
+    assert records[0]["rows"] == len(data)
+    assert records[0]["students"] == len(students)
+    assert records[0]["array_bytes"] == M.nbytes
+    assert records[1]["units"] == len(units)
+    assert all(record["duration"] >= 0 for record in records)
+
+def test_collect_metrics2():
+    records = []
+    hook = add_metrics_hook(records.append)
+    remove_metrics_hook(hook)
+    adjacency_matrix(np.array([[1, 2], [1, 0]]))
+    assert records == []
+
+def test_stage1():
+    with stage("disabled", rows=3) as record:
+        pass
+    assert record == {"stage": "disabled", "rows": 3}
+
+def test_stage2():
+    with collect_metrics() as records:
+        with pytest.raises(ValueError):
+            with stage("failed"):
+                raise ValueError("failed")
+    assert records[0]["error"] == "ValueError"
+
+def test_stage3(caplog):
+    with caplog.at_level(logging.INFO, logger="studentpathway"):
+        adjacency_matrix(np.array([[1, 2], [1, 0]]))
+    assert "adjacency_matrix:" in caplog.text
+
+def test_progress1(caplog):
+    with caplog.at_level(logging.DEBUG, logger="studentpathway"):
+        assert list(progress(range(20), 20, "loop", steps=4)) == list(range(20))
+    assert caplog.text.count("loop:") == 4
+
+def test_array_bytes1():
+    A = np.zeros((3, 4))
+    S = scipy.sparse.csr_matrix(np.eye(3))
+    assert array_bytes(A) == 96
+    assert array_bytes([A, S]) == 96 + S.data.nbytes + S.indices.nbytes + S.indptr.nbytes
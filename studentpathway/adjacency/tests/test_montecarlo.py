@@ -0,0 +1,52 @@
+from studentpathway.adjacency.montecarlo import monte_carlo_projections
+from studentpathway.adjacency.tensors import projections
+import numpy as np
+import pytest
+
+STUDENTS = {"a": {1, 2, 3, 4, 5}, "b": {4, 5, 6}, "c": {1, 6, 7}, "d": {8}, "e": set(), "f": {2, 3}}
+
+P = np.array([[0, 0.2, 0.4, 0, 0.6, 0],
+              [0, 0, 0, 0.3, 0.7, 0],
+              [0, 0, 0, 0, 1, 0],
+              [0, 0, 0, 0, 1, 0],
+              [0, 0, 0, 0, 0, 0],
+              [0, 0, 0, 0, 1, 0.5]])
+
+def test_monte_carlo_projections1():
+    students = {"P": {111, 222, 333, 444}, "C": set(), "M": {555, 666}, "B": set()}
+    P = np.array([[0, 0.5, 0, 0.25],
+                  [0, 0, 0, 0],
+                  [0, 0.5, 0, 1],
+                  [0, 0, 0, 0]])
+
+    distribution = monte_carlo_projections(students, P, replicates=50, seed=0)
+    projection, projection_count = projections(students, P, seed=0)
+
+    assert (distribution["units"] == list(students.keys()))
+    assert (distribution["mean"] == list(projection_count.values())).all()
+    assert (distribution["std"] == 0).all()
+    assert (distribution["lower"] == distribution["upper"]).all()
+
+def test_monte_carlo_projections2():
+    distribution = monte_carlo_projections(STUDENTS, P, replicates=20000, quantiles=(0.01, 0.5), seed=1)
+    counts = np.array([list(projections(STUDENTS, P, seed=seed)[1].values()) for seed in range(2000)])
+
+    np.testing.assert_allclose(distribution["mean"], counts.mean(axis=0), atol=0.05)
+    np.testing.assert_allclose(distribution["std"], counts.std(axis=0), atol=0.05)
+    assert (distribution["quantiles"].shape == (2, len(STUDENTS)))
+    assert (distribution["quantiles"][0] == np.quantile(counts, 0.01, axis=0)).all()
+
+def test_monte_carlo_projections3():
+    distribution0 = monte_carlo_projections(STUDENTS, P, replicates=3000, seed=4, batch_size=500)
+    distribution1 = monte_carlo_projections(STUDENTS, P, replicates=3000, seed=4, batch_size=500, n_jobs=2)
+
+    for key in ("mean", "std", "quantiles", "lower", "upper"):
+        assert (distribution0[key] == distribution1[key]).all()
+
+def test_monte_carlo_projections4():
+    with pytest.raises(ValueError):
+        monte_carlo_projections(STUDENTS, P[:3, :3])
+    with pytest.raises(ValueError):
+        monte_carlo_projections(STUDENTS, P, replicates=0)
+    with pytest.raises(ValueError):
+        monte_carlo_projections(STUDENTS, P, level=1)
@@ -95,3 +95,32 @@ def test_sequence_matrix_test7():
 	assert (len(units) == 9)
 	assert (students == [12345])
 	assert (units == ["Physics", "Chemistry", "Maths", "English", "Biology", "Mechanics", "Philosophy", "History", "Geography"])
+
+def test_sequence_matrix_test8():
+	with pytest.raises(ValueError):
+		data = pd.read_csv(PATH + "test_data1.csv")
+		M, students, units = sequence_matrix(data, engine="unknown")
+
+def test_sequence_matrix_engines():
+	for file_name in ["test_data1.csv", "test_data2.csv", "test_data3.csv", "test_data4.csv", "test_data5.csv", "test_data6.csv"]:
+		for sem_separator_month in [6, 8, 10]:
+			data = pd.read_csv(PATH + file_name)
+			M0, students0, units0 = sequence_matrix(data, sem_separator_month, engine="loop")
+			M1, students1, units1 = sequence_matrix(data, sem_separator_month, engine="vectorized")
+			assert (M0 == M1).all()
+			assert (students0 == students1)
+			assert (units0 == units1)
+
+def test_sequence_matrix_encoder():
+	from studentpathway.dataprocessing.encoder import Encoder
+
+	data = pd.read_csv(PATH + "test_data1.csv")
+	encoder = Encoder()
+	coded_data = encoder.fit_transform(data)
+
+	M, students, units = sequence_matrix(data)
+	M_coded, student_codes, unit_codes = sequence_matrix(coded_data, encoder=encoder)
+
+	assert (list(encoder.decode("student_id", student_codes)) == students)
+	assert (list(encoder.decode("unit_name", unit_codes)) == units)
+	assert (M_coded == M).all()
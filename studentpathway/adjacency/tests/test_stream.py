@@ -0,0 +1,56 @@
+from studentpathway.adjacency.stream import *
+from studentpathway.adjacency.tensors import sequence_tensor
+import pandas as pd
+import numpy as np
+import pytest
+import os
+
+PATH = "studentpathway/adjacency/tests/test_data_files"
+
+def test_sequence_tensor_stream1(tmp_path):
+    test_data_file = "test_data6.csv"
+
+    test_data = pd.read_csv(os.path.join(PATH, test_data_file))
+    test_data = test_data.sort_values("student_id", kind="stable")
+    test_data.to_csv(tmp_path / "sorted.csv", index=False)
+
+    T, students, units = sequence_tensor(test_data.copy())
+
+    for chunksize in [1, 2, 5, 1000]:
+        coo, stream_students, stream_units = sequence_tensor_stream(tmp_path / "sorted.csv",
+                                                                    tmp_path / "store",
+                                                                    chunksize=chunksize)
+        assert(stream_students == students)
+        assert(stream_units == units)
+        assert(np.array_equal(np.array(stream_to_tensor(coo, stream_students, stream_units)), np.array(T)))
+
+def test_sequence_tensor_stream2(tmp_path):
+    test_data_file = "test_data5.csv"
+    test_unit_file = "test_unit_data.csv"
+
+    test_data = pd.read_csv(os.path.join(PATH, test_data_file))
+    test_unit_data = pd.read_csv(os.path.join(PATH, test_unit_file))
+    test_data = test_data.sort_values("student_id", kind="stable")
+    test_data.to_csv(tmp_path / "sorted.csv", index=False)
+
+    T, students, units = sequence_tensor(test_data.copy(), test_unit_data, units_from_students_data=False)
+
+    coo, stream_students, stream_units = sequence_tensor_stream(tmp_path / "sorted.csv",
+                                                                tmp_path / "store",
+                                                                test_unit_data,
+                                                                units_from_students_data=False,
+                                                                chunksize=3)
+    T_stream = stream_to_tensor(coo, stream_students, stream_units, sparse=True)
+    assert(len(T_stream) == len(T))
+    for k in range(len(T)):
+        assert(np.array_equal(T_stream[k].toarray(), T[k]))
+
+def test_sequence_tensor_stream3(tmp_path):
+    test_data_file = "test_data6.csv"
+
+    test_data = pd.read_csv(os.path.join(PATH, test_data_file))
+    test_data = pd.concat([test_data, test_data.iloc[:1]])
+    test_data.to_csv(tmp_path / "unsorted.csv", index=False)
+
+    with pytest.raises(ValueError):
+        sequence_tensor_stream(tmp_path / "unsorted.csv", tmp_path / "store", chunksize=2)
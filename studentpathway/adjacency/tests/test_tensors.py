@@ -3,6 +3,7 @@ import pandas as pd
 import numpy as np
 import pytest
 import os
+import scipy.sparse
 
 PATH = "studentpathway/adjacency/tests/test_data_files"
 
@@ -68,6 +69,63 @@ def test_projections():
     assert (projection_count['P'] == 0)
     assert (projection_count['C'] == 3)
 
+def test_projections_seed():
+    students = {"P": {111, 222, 333, 444}, "C": {555, 666}, "M": {111, 222, 333, 444, 777}, "B": set()}
+
+    P = np.array([[0, 0.5, 0, 0.25],
+                  [0, 0, 0.5, 0],
+                  [0, 0.4, 0, 0.6],
+                  [0, 0, 0, 0]])
+
+    projection0, projection_count0 = projections(students, P, seed=1)
+    projection1, projection_count1 = projections(students, P, seed=1)
+
+    assert (projection0 == projection1)
+    assert (projection_count0 == {"P": 0, "C": 4, "M": 1, "B": 4})
+    assert (projection0["M"] <= students["C"])
+    assert (projection0["C"] <= students["P"] | students["M"])
+
+def test_projections_engines():
+    students = {"P": {111, 222, 333, 444}, "C": {555, 666}, "M": {777, 888, 999}, "B": set()}
+
+    P = np.array([[0, 0.5, 0.25, 0],
+                  [0, 0, 0.5, 0.5],
+                  [0.3, 0.7, 0, 1],
+                  [0, 0, 0, 0]])
+
+    for seed in range(5):
+        projection0, projection_count0 = projections(students, P, seed=seed)
+        projection1, projection_count1 = projections(students, P, seed=seed, engine="loop")
+
+        assert (projection_count0 == projection_count1)
+        assert (projection_count0 == {"P": 1, "C": 4, "M": 2, "B": 4})
+        assert ({777, 888, 999} <= projection0["B"])
+
+def test_projections_shared():
+    rng = np.random.default_rng(0)
+    units = list(range(30))
+    students = {unit: set(rng.choice(60, rng.integers(1, 20), replace=False).tolist()) for unit in units}
+    P = rng.random((30, 30)) * (rng.random((30, 30)) < 0.3)
+
+    projection, projection_count = projections(students, P, seed=0)
+    flows = np.round(np.array([len(students[unit]) for unit in units])[:, np.newaxis] * P)
+
+    for i in units:
+        sources = [k for k in units if flows[k, i] > 0]
+
+        # Students come from the units sending students, at most the flows and at least the largest flow
+        assert (projection[i] <= set().union(*[students[k] for k in sources]))
+        assert (projection_count[i] <= sum(flows[k, i] for k in sources))
+        assert (projection_count[i] >= max([min(flows[k, i], len(students[k])) for k in sources] + [0]))
+
+def test_projections_errors():
+    students = {"P": {111}, "C": set()}
+
+    with pytest.raises(ValueError):
+        projections(students, np.zeros((3, 3)))
+    with pytest.raises(ValueError):
+        projections(students, np.zeros((2, 2)), engine="sets")
+
 def test_sort_students_by_units():
     foo0 = np.array([[1,2,0,0],[0,0,1,2],[0,0,1,0],[1,0,0,0],[1,1,0,0]])
     foo1 = np.array([[2,0,0,0],[0,0,2,0],[0,0,1,0],[1,0,0,0],[1,1,0,0]])
@@ -77,3 +135,151 @@ def test_sort_students_by_units():
     student_dict = sort_students_by_units(foo, students, units, sem=2)
 
     assert(len(list(student_dict.keys())) == 4)
+
+def test_sequence_tensor_sparse():
+    test_data_file = "test_data6.csv"
+    test_unit_file = "test_unit_data.csv"
+
+    test_data = pd.read_csv(os.path.join(PATH, test_data_file))
+    test_unit_data = pd.read_csv(os.path.join(PATH, test_unit_file))
+
+    T, students, units = sequence_tensor(test_data, test_unit_data)
+    T_sparse, students_sparse, units_sparse = sequence_tensor(test_data, test_unit_data, sparse=True)
+
+    assert (len(T_sparse) == 3)
+    assert all(scipy.sparse.issparse(m) for m in T_sparse)
+    assert all((m.toarray() == n).all() for m, n in zip(T_sparse, T))
+    assert (students_sparse == students)
+    assert (units_sparse == units)
+
+def test_sequence_tensor_missing_unit():
+    test_data = pd.read_csv(os.path.join(PATH, "test_data6.csv"))
+    test_unit_data = pd.read_csv(os.path.join(PATH, "test_unit_data.csv")).iloc[1:]
+
+    with pytest.raises(ValueError):
+        T, students, units = sequence_tensor(test_data, test_unit_data, units_from_students_data=False)
+
+def test_adjacency_tensor_sparse():
+    test_data = pd.read_csv(os.path.join(PATH, "test_data6.csv"))
+
+    T, students, units = sequence_tensor(test_data)
+    T_sparse, students, units = sequence_tensor(test_data, sparse=True)
+
+    _P, P = adjacency_tensor(T)
+    _P_sparse, P_sparse = adjacency_tensor(T_sparse)
+
+    assert (_P == _P_sparse).all()
+    assert (P == P_sparse).all()
+
+def test_sort_students_by_units_array():
+    foo0 = np.array([[1,2,0,0],[0,0,1,2],[0,0,1,0],[1,0,0,0],[1,1,0,0]])
+    foo1 = np.array([[2,0,0,0],[0,0,2,0],[0,0,1,0],[1,0,0,0],[1,1,0,0]])
+    foo = [foo0, foo1]
+    units = ["P", "C", "M", "B"]
+    students = ["111", "222", "333", "444", "555"]
+
+    assert (sort_students_by_units(np.array(foo), students, units, sem=2) == sort_students_by_units(foo, students, units, sem=2))
+
+def test_sort_students_by_units_sparse():
+    foo0 = np.array([[1,2,0,0],[0,0,1,2],[0,0,1,0],[1,0,0,0],[1,1,0,0]])
+    foo1 = np.array([[2,0,0,0],[0,0,2,0],[0,0,1,0],[1,0,0,0],[1,1,0,0]])
+    foo = [foo0, foo1]
+    foo_sparse = [scipy.sparse.csr_matrix(foo0), scipy.sparse.csr_matrix(foo1)]
+    units = ["P", "C", "M", "B"]
+    students = ["111", "222", "333", "444", "555"]
+
+    assert (sort_students_by_units(foo_sparse, students, units, sem=2) == sort_students_by_units(foo, students, units, sem=2))
+
+def test_sort_students_by_units_compact():
+    foo0 = np.array([[1,2,0,0],[0,0,1,2],[0,0,1,0],[1,0,0,0],[1,1,0,0]])
+    foo1 = np.array([[2,0,0,0],[0,0,2,0],[0,0,1,0],[1,0,0,0],[1,1,0,0]])
+    foo = [foo0, foo1]
+    units = ["P", "C", "M", "B"]
+    students = ["111", "222", "333", "444", "555"]
+
+    student_dict = sort_students_by_units(foo, students, units, sem=2)
+    compact_units, compact_students, indices, offsets = sort_students_by_units(foo, students, units, sem=2, compact=True)
+
+    assert (student_dict == {"P": {"111"}, "C": {"111"}, "M": {"222"}, "B": {"222"}})
+    assert (compact_units == units)
+    assert (list(offsets) == [0, 1, 2, 3, 4])
+    assert (list(compact_students[indices]) == ["111", "111", "222", "222"])
+    assert (sort_students_by_units(foo, students, units, sem=1) == {"P": {"111", "444", "555"}, "C": {"555"}, "M": {"222", "333"}, "B": set()})
+
+def test_sort_students_by_units_projections():
+    foo0 = np.array([[1,2,0,0],[0,0,1,2],[0,0,1,0],[1,0,0,0],[1,1,0,0]])
+    units = ["P", "C", "M", "B"]
+    students = [111, 222, 333, 444, 555]
+    P = np.array([[0, 0.5, 0, 0.25],
+                  [0, 0, 0.5, 0],
+                  [0, 0.4, 0, 0.6],
+                  [0, 0, 0, 0]])
+
+    student_dict = sort_students_by_units([foo0], students, units)
+    compact = sort_students_by_units([foo0], students, units, compact=True)
+
+    assert (projections(student_dict, P, seed=2) == projections(compact, P, seed=2))
+    assert (projections(compact, P, seed=2, engine="loop")[1] == projections(student_dict, P, seed=2, engine="loop")[1])
+
+def test_adjacency_tensor_engines():
+    for test_data_file in ["test_data5.csv", "test_data6.csv"]:
+        test_data = pd.read_csv(os.path.join(PATH, test_data_file))
+
+        T, students, units = sequence_tensor(test_data)
+        T_sparse, students, units = sequence_tensor(test_data, sparse=True)
+
+        _P0, P0 = adjacency_tensor(T, engine="loop")
+        _P1, P1 = adjacency_tensor(T, engine="vectorized")
+        _P2, P2 = adjacency_tensor(T_sparse, engine="vectorized")
+
+        assert (_P0 == _P1).all() and (_P0 == _P2).all()
+        assert (P0 == P1).all() and (P0 == P2).all()
+
+def test_adjacency_tensor_engines_terminate():
+    foo0 = np.array([[1,2,0,0],[0,0,1,2],[0,0,1,0],[1,0,0,0],[1,1,0,0]])
+    foo1 = np.array([[2,0,0,0],[0,0,2,0],[0,0,1,0],[1,0,0,0],[1,1,0,0]])
+    foo2 = np.array([[3,0,0,0],[0,0,0,0],[0,0,2,0],[0,0,0,0],[0,0,0,0]])
+    foo3 = np.array([[4,0,0,0],[0,0,0,0],[0,0,0,0],[0,0,0,0],[0,0,0,0]])
+    foo = [foo0, foo1, foo2, foo3]
+
+    _P0, P0 = adjacency_tensor(foo, engine="loop")
+    _P1, P1 = adjacency_tensor(foo)
+
+    assert (_P0 == _P1).all()
+    assert (P0 == P1).all()
+
+def test_adjacency_tensor_engine_unknown():
+    with pytest.raises(ValueError):
+        _P, P = adjacency_tensor([np.zeros((2, 2)), np.zeros((2, 2))], engine="unknown")
+
+def test_adjacency_tensor_n_jobs():
+    for test_data_file in ["test_data5.csv", "test_data6.csv"]:
+        test_data = pd.read_csv(os.path.join(PATH, test_data_file))
+
+        T, students, units = sequence_tensor(test_data)
+        T_sparse, students, units = sequence_tensor(test_data, sparse=True)
+
+        _P0, P0 = adjacency_tensor(T)
+        _P1, P1 = adjacency_tensor(T, n_jobs=2)
+        _P2, P2 = adjacency_tensor(T_sparse, n_jobs=2)
+
+        assert (_P0 == _P1).all() and (_P0 == _P2).all()
+        assert (P0 == P1).all() and (P0 == P2).all()
+
+def test_adjacency_tensor_n_jobs_loop():
+    with pytest.raises(ValueError):
+        _P, P = adjacency_tensor([np.zeros((2, 2)), np.zeros((2, 2))], engine="loop", n_jobs=2)
+
+def test_sequence_tensor_encoder():
+    from studentpathway.dataprocessing.encoder import Encoder
+
+    test_data = pd.read_csv(os.path.join(PATH, "test_data6.csv"))
+    encoder = Encoder()
+    coded_data = encoder.fit_transform(test_data)
+
+    T, students, units = sequence_tensor(test_data)
+    T_coded, student_codes, unit_codes = sequence_tensor(coded_data, encoder=encoder)
+
+    assert(list(encoder.decode("student_id", student_codes)) == students)
+    assert(list(encoder.decode("unit_code", unit_codes)) == units)
+    assert(np.array_equal(np.array(T_coded), np.array(T)))
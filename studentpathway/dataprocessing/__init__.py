@@ -2,8 +2,18 @@ from .filters import *
 from .get_data_frames import get_data_frames
 from .get_year_list import get_year_list
 from .data_sorting import *
+from .cache import read_csv_cached, clear_cache
+from .semester_index import semester_index
+from .encoder import Encoder
+from .pseudonymise import pseudonymise, hash_ids
+from .pipeline import combine_data
 
 import studentpathway.dataprocessing.filters
 import studentpathway.dataprocessing.get_data_frames
 import studentpathway.dataprocessing.get_year_list
 import studentpathway.dataprocessing.data_sorting
+import studentpathway.dataprocessing.cache
+import studentpathway.dataprocessing.semester_index
+import studentpathway.dataprocessing.encoder
+import studentpathway.dataprocessing.pseudonymise
+import studentpathway.dataprocessing.pipeline
@@ -0,0 +1,175 @@
+import pandas as pd
+import os
+import re
+import hashlib
+from ..instrumentation import logger
+
+# Directory of the cached copies. Can be changed with the environment variable STUDENTPATHWAY_CACHE.
+CACHE_DIRECTORY = os.environ.get("STUDENTPATHWAY_CACHE",
+                                 os.path.join(os.path.expanduser("~"), ".cache", "studentpathway"))
+
+# Maximum size in bytes of all the cached copies.
+MAX_CACHE_SIZE = 2 * 1024 ** 3
+
+CACHE_EXTENSION = ".parquet"
+
+# Name of the cached copies given by ``cache_path``, other files of the directory are never removed
+CACHE_FILE_NAME = re.compile(r"([0-9a-f]{40})-[0-9a-f]{40}" + re.escape(CACHE_EXTENSION))
+
+
+def _source_key(source):
+    """Returns the part of the cache file name identifying the source file.
+
+    :param source: path to the csv file.
+
+    :return: hexadecimal digest of the absolute path.
+    """
+    return hashlib.sha1(os.path.abspath(source).encode("utf-8")).hexdigest()
+
+def cache_path(source, date_columns=("outcome_date",), cache_directory=None):
+    """Returns the path of the cached copy of a csv file.
+
+    The path depends on the absolute path, the modification time and the size of the csv file,
+    so a modified csv file never reads a stale copy.
+
+    :param source: path to the csv file.
+    :param date_columns: Columns converted into datetime objects. (Default=``("outcome_date",)``)
+    :param cache_directory: Directory of the cached copies. (Default=``CACHE_DIRECTORY``)
+
+    :return: path of the cached copy.
+
+    :raises FileNotFoundError: The csv file does not exist.
+    """
+    stat = os.stat(source)
+
+    version = f"{stat.st_mtime_ns}:{stat.st_size}:{','.join(date_columns)}"
+    version = hashlib.sha1(version.encode("utf-8")).hexdigest()
+
+    file_name = _source_key(source) + "-" + version + CACHE_EXTENSION
+
+    return os.path.join(cache_directory or CACHE_DIRECTORY, file_name)
+
+def read_csv_cached(source,
+                    date_columns=("outcome_date",),
+                    cache_directory=None,
+                    max_cache_size=MAX_CACHE_SIZE,
+                    columns=None,
+                    filters=None):
+    """Reads the csv file through a typed columnar (Parquet) copy and returns the DataFrame.
+    The first read parses the csv file, converts the ``date_columns`` into datetime objects and writes the copy.
+    The following reads memory-map the copy until the csv file is modified.
+    The least recently used copies are removed when the copies are larger than ``max_cache_size``.
+    ``filters`` are pushed down to the Parquet reader so that only the matching rows are loaded,
+    eg: ``filters=[("student_cohort", "==", "Bachelor of Engineering")]``.
+    The rows keep the index of the csv file.
+
+    :param source: path to the csv file.
+    :param date_columns: Columns converted into datetime objects. (Default=``("outcome_date",)``)
+    :param cache_directory: Directory of the cached copies. (Default=``CACHE_DIRECTORY``)
+    :param max_cache_size: Maximum size in bytes of all the cached copies. (Default=``MAX_CACHE_SIZE``)
+    :param columns: Columns to read. (Default=None)
+    :param filters: Row filters in the format of ``pandas.read_parquet``. (Default=None)
+
+    :return: pandas DataFrame.
+
+    :raises ImportError: pyarrow is required for the cache.
+
+    :Example:
+
+    >>> import studentpathway as sp
+    >>> data = sp.read_csv_cached("students_data/combined_data/eng_data.csv")
+    """
+    try:
+        import pyarrow
+    except ImportError:
+        logger.warning("read_csv_cached: ImportError: the cache requires pyarrow. "
+                       "Install it with `pip install pyarrow`.")
+        raise
+
+    cache_directory = cache_directory or CACHE_DIRECTORY
+
+    path = cache_path(source, date_columns, cache_directory)
+
+    if os.path.exists(path):
+        # Marks the copy as recently used
+        os.utime(path)
+        return pd.read_parquet(path, columns=columns, filters=filters, memory_map=True)
+
+    data = pd.read_csv(source)
+
+    for column in date_columns:
+        data[column] = pd.to_datetime(data[column])
+
+    os.makedirs(cache_directory, exist_ok=True)
+
+    # Removes the copies of the previous versions of the csv file
+    clear_cache(source, cache_directory)
+
+    try:
+        data.to_parquet(path, index=True)
+    except (TypeError, ValueError) as e:
+        # Columns with mixed types cannot be stored, the data is returned without a copy
+        logger.warning("read_csv_cached: skipping the cache of %s: %s", source, e)
+        if os.path.exists(path):
+            os.remove(path)
+
+    _limit_cache_size(cache_directory, max_cache_size)
+
+    if filters is not None and os.path.exists(path):
+        return pd.read_parquet(path, columns=columns, filters=filters, memory_map=True)
+
+    if columns is not None:
+        return data[columns]
+
+    return data
+
+def clear_cache(source=None, cache_directory=None):
+    """Removes the cached copies of a csv file, or all the cached copies.
+    Only the files named by ``cache_path`` are removed.
+
+    :param source: path to the csv file. ``None`` removes all the copies. (Default=None)
+    :param cache_directory: Directory of the cached copies. (Default=``CACHE_DIRECTORY``)
+
+    :return: Number of copies removed.
+
+    :Example:
+
+    >>> import studentpathway as sp
+    >>> sp.clear_cache("students_data/combined_data/eng_data.csv")
+    1
+    """
+    cache_directory = cache_directory or CACHE_DIRECTORY
+
+    if not os.path.isdir(cache_directory):
+        return 0
+
+    key = _source_key(source) if source is not None else None
+
+    removed = 0
+    for file_name in os.listdir(cache_directory):
+        match = CACHE_FILE_NAME.fullmatch(file_name)
+        if match and key in (None, match.group(1)):
+            os.remove(os.path.join(cache_directory, file_name))
+            removed += 1
+
+    return removed
+
+def _limit_cache_size(cache_directory, max_cache_size):
+    """Removes the least recently used copies until the copies fit in ``max_cache_size`` bytes.
+
+    :param cache_directory: Directory of the cached copies.
+    :param max_cache_size: Maximum size in bytes of all the cached copies.
+    """
+    paths = [os.path.join(cache_directory, file_name)
+             for file_name in os.listdir(cache_directory)
+             if CACHE_FILE_NAME.fullmatch(file_name)]
+
+    paths.sort(key=os.path.getmtime)
+
+    total = sum(os.path.getsize(path) for path in paths)
+
+    for path in paths:
+        if total <= max_cache_size:
+            break
+        total -= os.path.getsize(path)
+        os.remove(path)
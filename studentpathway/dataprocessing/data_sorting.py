@@ -1,15 +1,20 @@
 import pandas as pd
 import numpy as np
-import copy
+import scipy.sparse
 
 
-def sort_units_program(data, unit_type="unit_code", header="program"):
+def sort_units_program(data, unit_type="unit_code", header="program", compact=False):
     """Reads the data as a csv file and returns a dictionary of
     unit_code sorted by program.
+    The units of all the programs are grouped in a single pass over the data.
+    ``compact=True`` returns the programs in a CSR-like form instead of the dictionary:
+    a list of ``programs``, an array of the distinct ``units``, and arrays ``indices`` and ``offsets``
+    such that the units of ``programs[p]`` are ``units[indices[offsets[p]:offsets[p + 1]]]``.
 
     :param data: path to the csv file or pandas DataFrame.
     :param unit_type: Type of unit information to store in a list. (Default=``"unit_code"``)
     :param header: header to sort the column. (Default=``"program"``)
+    :param compact: Bool to return the compact form. (Default=``False``)
 
     :return: Dictionary mapping program as keys to the units list as values.
 
@@ -17,32 +22,168 @@ def sort_units_program(data, unit_type="unit_code", header="program"):
 
     >>> import studentpathway as sp
     >>> program = sp.sort_units_program("units_data/engineering_data/engineering_units.csv")
+    >>> programs, units, indices, offsets = sp.sort_units_program("units_data/engineering_data/engineering_units.csv", compact=True)
     """
 
     # Checks if the data is not a Pandas Dataframe
     if not isinstance(data, pd.DataFrame):
         units_data = pd.read_csv(data)
     else:
-        units_data = copy.deepcopy(data)
+        units_data = data
 
-    programs = list(units_data.program.unique())
+    if compact:
+        program_codes, programs = pd.factorize(units_data[header])
+        indices, units = pd.factorize(units_data[unit_type])
 
-    program_units = dict()
+        # Rows without a program or a unit cannot be coded
+        keep = (program_codes >= 0) & (indices >= 0)
+        program_codes = program_codes[keep]
 
-    for program in programs:
-        units = list(np.where(units_data[header] == program,
-                     units_data[unit_type], False))
+        order = np.argsort(program_codes, kind="stable")
 
-        program_units[program] = [unit for unit in units if unit != 0]
+        offsets = np.zeros(len(programs) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(program_codes, minlength=len(programs)))
 
-    return program_units
+        return list(programs), np.asarray(units), indices[keep][order], offsets
+
+    program_units = units_data.groupby(header, sort=False)[unit_type].agg(list)
+
+    return program_units.to_dict()
+
+def _compact_program_units(program_units):
+    """Returns the compact form of ``sort_units_program`` from the dictionary of program units.
+
+    :param program_units: dictionary of program mapped with list of units in the program.
+
+    :return: programs, units, indices and offsets of the compact form.
+    """
+    programs = list(program_units)
+
+    units = [unit for program in programs for unit in program_units[program]]
+
+    indices, units = pd.factorize(pd.Series(units, dtype=None if units else object))
+
+    offsets = np.zeros(len(programs) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(program_units[program]) for program in programs])
+
+    return programs, np.asarray(units), indices, offsets
+
+class ProgramIndex:
+    """Index of the units of the programs built once from the output of ``sort_units_program``.
+
+    The index holds a sparse incidence matrix of units by programs, whose rows give the programs
+    that include every unit, so the program of a student is found
+    without rebuilding the sets of units of every program.
+
+    :param program_units: dictionary of program mapped with list of units in the program,
+        or the compact form returned by ``sort_units_program(..., compact=True)``.
+    :param skip_program: List of program to be skipped. (Default=``["Common"]``)
+
+    :raises KeyError: A program of ``skip_program`` is not in ``program_units``.
+
+    :Example:
+
+    >>> import studentpathway as sp
+    >>> program_units = sp.sort_units_program("units_data/engineering_data/engineering_units.csv")
+    >>> index = sp.ProgramIndex(program_units)
+    >>> student_program = sp.get_student_program(student_units, index)
+    """
+
+    def __init__(self, program_units, skip_program=["Common"]):
+        if isinstance(program_units, dict):
+            program_units = _compact_program_units(program_units)
+
+        programs, units, indices, offsets = program_units
+
+        # Programs in the order of the dictionary, which decides the ties
+        self.programs = list(programs)
+
+        # Units of all the programs
+        self.units = pd.Index(units)
+
+        # Program of every element of the compact form
+        columns = np.repeat(np.arange(len(self.programs)), np.diff(offsets))
+        rows = np.asarray(indices)
+        keep = rows >= 0
+
+        # Incidence matrix of units by programs, counting each unit once per program
+        self.incidence = scipy.sparse.csr_matrix((np.ones(np.count_nonzero(keep)), (rows[keep], columns[keep])),
+                                                 shape=(len(self.units), len(self.programs)))
+        self.incidence.sum_duplicates()
+        self.incidence.data[:] = 1
+
+        # Units of the skipped programs are not used to rank the programs
+        self.skipped = np.zeros(len(self.units), dtype=bool)
+        for program in skip_program or []:
+            if program not in self.programs:
+                raise KeyError(program)
+            self.skipped[self.incidence[:, self.programs.index(program)].nonzero()[0]] = True
+
+    def unit_codes(self, units):
+        """Returns the integer codes of the units. Units of no program have the code ``-1``.
+
+        :param units: list of units.
+
+        :return: numpy.ndarray of the codes.
+        """
+        return self.units.get_indexer(pd.Index(units))
+
+    def get_student_program(self, student_units):
+        """Returns the program of a student.
+
+        :param student_units: List of all the units taken by a student.
+
+        :return: The program of in which the student is enrolled.
+        """
+        codes = np.unique(self.unit_codes(list(student_units)))
+        codes = codes[codes >= 0]
+        codes = codes[~self.skipped[codes]]
+
+        program_rank = np.zeros(len(self.programs))
+        for code in codes:
+            program_rank[self.incidence.indices[self.incidence.indptr[code]:self.incidence.indptr[code + 1]]] += 1
+
+        return self.programs[int(np.argmax(program_rank))]
+
+    def get_student_programs(self, student_codes, unit_codes, student_number=None):
+        """Returns the index of the program of every student from integer coded data.
+
+        :param student_codes: numpy.ndarray of the integer codes of the students of every row.
+        :param unit_codes: numpy.ndarray of the codes of the units of every row given by ``unit_codes``.
+        :param student_number: Number of students. (Default=``max(student_codes) + 1``)
+
+        :return: numpy.ndarray of the index of the program in ``programs`` for every student.
+        """
+        student_codes = np.asarray(student_codes)
+        unit_codes = np.asarray(unit_codes)
+
+        if student_number is None:
+            student_number = int(student_codes.max()) + 1 if len(student_codes) else 0
+
+        # Keeps the units of a program that is not skipped
+        keep = unit_codes >= 0
+        keep[keep] = ~self.skipped[unit_codes[keep]]
+
+        # Incidence matrix of students by units, counting each unit once
+        student_units = scipy.sparse.csr_matrix((np.ones(np.count_nonzero(keep)),
+                                                 (student_codes[keep], unit_codes[keep])),
+                                                shape=(student_number, len(self.units)))
+        student_units.sum_duplicates()
+        student_units.data[:] = 1
+
+        # Ranking every program for every student at once
+        program_rank = (student_units @ self.incidence).toarray()
+
+        return np.argmax(program_rank, axis=1) if len(self.programs) else np.zeros(student_number, dtype=int)
 
 def get_student_program(student_units, program_units, skip_program=["Common"]):
     """Takes a dictionary of program units with keys are program and
     the list of units in the program as the key.
+    ``program_units`` can also be a ``ProgramIndex`` built once for all the students,
+    in which case the skipped programs of the index are used.
 
     :param student_units: List of all the units taken by a student.
-    :param program_units: dictionary of program mapped with list of units in the program.
+    :param program_units: dictionary of program mapped with list of units in the program, or a ``ProgramIndex``.
     :param skip_program: List of program to be skipped. (Default=``["Common"]``)
 
     :return: The program of in which the student is enrolled.
@@ -52,6 +193,9 @@ def get_student_program(student_units, program_units, skip_program=["Common"]):
     >>> student_units = [300480, 300035, 300487, 200238, 300021, 300761, 300762, 300763, 300764]
     >>> student_program = sp.get_student_program(student_units, program_units)
     """
+    if isinstance(program_units, ProgramIndex):
+        return program_units.get_student_program(student_units)
+
     program_rank = dict()
 
     # converts the list of units into set
@@ -82,18 +226,56 @@ def get_student_program(student_units, program_units, skip_program=["Common"]):
 
     return student_program
 
-def add_student_program(data, student_program, header="program"):
+def get_student_programs(data,
+                         program_units,
+                         skip_program=["Common"],
+                         id_header="student_id",
+                         unit_header="unit_code"):
+    """Returns the program of every student in the data.
+    The units of all the students are ranked against all the programs with a single sparse matrix product.
+    Ties are broken like ``get_student_program``, by the first program in ``program_units``.
+
+    :param data: Pandas dataframe with a row per unit taken by a student.
+    :param program_units: dictionary of program mapped with list of units in the program, or a ``ProgramIndex``.
+    :param skip_program: List of program to be skipped. (Default=``["Common"]``)
+    :param id_header: Column heading of the student id. (Default=``"student_id"``)
+    :param unit_header: Column heading of the units. (Default=``"unit_code"``)
+
+    :return: Pandas series mapping the student id to the program.
+
+    :Example:
+
+    >>> import studentpathway as sp
+    >>> program_units = sp.sort_units_program("units_data/engineering_data/engineering_units.csv")
+    >>> data = sp.get_data("students_data/combined_data/eng_data.csv")
+    >>> student_programs = sp.get_student_programs(data, program_units)
+    """
+    if not isinstance(program_units, ProgramIndex):
+        program_units = ProgramIndex(program_units, skip_program)
+
+    student_codes, students = pd.factorize(data[id_header])
+
+    unit_codes = program_units.unit_codes(data[unit_header])
+
+    program_index = program_units.get_student_programs(student_codes, unit_codes, len(students))
+
+    return pd.Series(np.asarray(program_units.programs, dtype=object)[program_index],
+                     index=students,
+                     name="program")
+
+def add_student_program(data, student_program, header="program", inplace=False):
     """Adds a new column to the pandas dataframe that outlines the program
     that student is enrolled in.
 
     :param data: Pandas dataframe.
     :param student_program: A string of student program.
     :param header: A string to indicate the name of the new column. (Default=``"program"``)
+    :param inplace: Bool to add the column to the given dataframe instead of a copy. (Default=``False``)
 
     :return: A dataframe with an additional student program column.
     """
 
-    student_data = data.copy()
+    student_data = data if inplace else data.copy()
 
     student_data[header] = student_program
 
@@ -116,18 +298,19 @@ def get_features(data, feature_columns):
 
     return feature_data
 
-def add_age(data, dob="date_of_birth", outcome_date="outcome_date", header="age"):
+def add_age(data, dob="date_of_birth", outcome_date="outcome_date", header="age", inplace=False):
     """Adds the student age column to the dataframe.
 
     :param data: Pandas dataframe.
     :param dob: A string of date of birth as given in the dataset. (Default=``"date_of_birth"``)
     :param outcome_date: A string of outcome date as given in the dataset. (Default=``"outcome_date"``)
     :param header: A string of column header. (Default=``"age"``)
+    :param inplace: Bool to add the column to the given dataframe instead of a copy. (Default=``False``)
 
     :return: Pandas dataframe with ``header`` column.
     """
     # Create a copy of dataframe
-    df = data.copy()
+    df = data if inplace else data.copy()
 
     # Converting to datetime objects
     df[outcome_date] = pd.to_datetime(data[outcome_date])
@@ -137,22 +320,25 @@ def add_age(data, dob="date_of_birth", outcome_date="outcome_date", header="age"
 
     return df
 
-def sort_by_age(data, header="age"):
+def sort_by_age(data, header="age", inplace=False):
     """Sorts the data based on age column.
 
     :param data: Pandas dataframe.
     :param header: Heading of the column to sort. (Default=``"age"``)
+    :param inplace: Bool to sort the given dataframe instead of a copy. (Default=``False``)
 
     :return: Pandas dataframe with sorted column by age.
     """
 
-    df = data.copy()
+    if inplace:
+        data.sort_values(by=[header], ignore_index=True, inplace=True)
+        return data
 
     df = data.sort_values(by=[header], ignore_index=True)
 
     return df
 
-def special_units_year(data, year_map={"AU": '4', "OE": '4'}, header="year"):
+def special_units_year(data, year_map={"AU": '4', "OE": '4'}, header="year", inplace=False):
     """Returns a pandas dataframe by changing the special category
     to the year of study.
 
@@ -161,11 +347,12 @@ def special_units_year(data, year_map={"AU": '4', "OE": '4'}, header="year"):
     :param data: Pandas dataframe of units.
     :param year_map: A dict of mapping special category of units to year.
     :param header: Column header to perform operation.
+    :param inplace: Bool to map the given dataframe instead of a copy. (Default=``False``)
 
     :return: Pandas dataframe with year mapped.
     """
 
-    df = data.copy()
+    df = data if inplace else data.copy()
 
     df.replace({header: year_map}, inplace=True)
 
@@ -201,44 +388,83 @@ def study_score(data, mark_header="mark", unit_header="unit_code", round_upto=No
 
     return score
 
-def student_scores(data, id_header="student_id", round_upto=None, sort_scores=True):
+def student_scores(data, id_header="student_id", round_upto=None, sort_scores=True, output="dict", mark_header="mark"):
     """Returns a dictionary mapping student id to their score.
 
+    The attempts and the passed units of all the students are counted in a single groupby.
+    ``output="series"`` returns a pandas Series indexed by the student id and
+    ``output="arrays"`` returns a tuple of numpy arrays of the student ids and their scores,
+    which avoids building a dictionary with an entry per student.
+
     :param data: data set with the features consisting of the column ``unit_code`` and ``mark``.
     :param id_header: Column header with student id. (Default=``"student_id"``)
     :param round_upto: Rounds the score upto the given decimal places. (Default=``None``)
     :param sort_scores: Bool to sort the score. (Default=``True``)
+    :param output: Type of the output, ``"dict"``, ``"series"`` or ``"arrays"``. (Default=``"dict"``)
+    :param mark_header: Column head to look for the marks to sort. (Default=``"mark"``)
 
     :return: A dictionary mapping the student id to their score.
 
+    :raises ValueError: Unknown output.
+
     :Example:
 
     >>> import studentpathway as sp
     >>> data = sp.get_data("students_data/combined_data/eng_data.csv")
     >>> student_scores = sp.student_scores(data, round_upto=2)
+    >>> student_scores = sp.student_scores(data, round_upto=2, output="series")
     """
 
-    score_dict = dict()
+    if output not in ("dict", "series", "arrays"):
+        raise ValueError(f"Unknown output {output}. Use one of ('dict', 'series', 'arrays').")
+
+    students = data[id_header]
 
-    students = list(data[id_header].unique())
+    attempts = students.groupby(students, sort=False).size()
 
-    for student in students:
-        student_data = None
-        student_data = data.loc[data[id_header] == student]
-        score = study_score(student_data, round_upto=round_upto)
-        score_dict[student] = score
+    passed_units = (data[mark_header] >= 50).groupby(students, sort=False).sum()
+
+    scores = passed_units.to_numpy() / attempts.to_numpy()
+
+    if round_upto:
+        scores = np.round(scores, round_upto)
+
+    scores = pd.Series(scores, index=attempts.index)
 
     if sort_scores:
-        score_dict = dict(sorted(score_dict.items(), key=lambda item: item[1]))
+        scores = scores.sort_values(kind="stable")
+
+    if output == "series":
+        return scores
 
-    return score_dict
+    if output == "arrays":
+        return scores.index.to_numpy(), scores.to_numpy()
+
+    return dict(zip(scores.index, scores.to_numpy()))
+
+def _score_arrays(student_scores):
+    """Returns the student ids and their scores as numpy arrays.
+
+    :param student_scores: Dictionary, pandas Series or tuple of arrays returned by ``student_scores``.
+
+    :return: numpy arrays of the student ids and their scores.
+    """
+    if isinstance(student_scores, pd.Series):
+        return student_scores.index.to_numpy(), student_scores.to_numpy()
+
+    if isinstance(student_scores, dict):
+        return np.array(list(student_scores.keys())), np.array(list(student_scores.values()))
+
+    students, scores = student_scores
+
+    return np.asarray(students), np.asarray(scores)
 
 def sort_students_by_score(data, score, student_score_dict, id_header="student_id"):
     """Returns the dataframe of the students from the given score.
 
     :param data: Pandas DataFrame of students.
     :param score: score to sort.
-    :param student_score_dict: Dictionary mapping student id to score.
+    :param student_score_dict: Dictionary, pandas Series or tuple of arrays mapping student id to score.
     :param id_header: Column heading of the dataframe to sort the student id.
 
     :return: Pandas DataFrame with the students with the given score.
@@ -251,11 +477,9 @@ def sort_students_by_score(data, score, student_score_dict, id_header="student_i
     >>> score_data = sp.get_score_students(data, score=0, student_score_dict=student_scores)
     """
 
-    score_student = []
+    students, scores = _score_arrays(student_score_dict)
 
-    for key, value in student_score_dict.items():
-        if value == score:
-            score_student.append(key)
+    score_student = students[scores == score]
 
     score_data = data.loc[data[id_header].isin(score_student)]
 
@@ -264,7 +488,7 @@ def sort_students_by_score(data, score, student_score_dict, id_header="student_i
 def score_frequency(student_scores, key="student_id", value="score", sort_scores=True):
     """Returns a dictionary mapping score to the frequency of students getting the score.
 
-    :param student_score_dict: Dictionary of student id mapped to the score.
+    :param student_score_dict: Dictionary, pandas Series or tuple of arrays of student id mapped to the score.
 
     :return: A dictionary mapped score to the frequency.
 
@@ -276,7 +500,9 @@ def score_frequency(student_scores, key="student_id", value="score", sort_scores
     >>> score_freq = sp.score_frequency(student_scores)
     """
 
-    scores_df = pd.DataFrame({key: student_scores.keys(), value: student_scores.values()})
+    students, scores = _score_arrays(student_scores)
+
+    scores_df = pd.DataFrame({key: students, value: scores})
 
     scores = scores_df[value].value_counts().to_dict()
 
@@ -323,7 +549,7 @@ def remove_score(students_data,
 
     feature_data = get_features(df, feature_col)
 
-    student_score = student_scores(feature_data, round_upto=2)
+    student_score = student_scores(feature_data, round_upto=2, output="series")
 
     score_student_df = sort_students_by_score(feature_data,
                                               score=score,
@@ -0,0 +1,213 @@
+import pandas as pd
+import numpy as np
+
+# Columns coded by default
+ENCODED_COLUMNS = ("student_id", "unit_code", "unit_name")
+
+
+class Encoder:
+    """Dense integer codes of the students and units.
+
+    Every distinct value of a column gets the next code in the order of its first appearance,
+    so the codes of a column go from 0 to the number of values - 1 and can index the rows or columns of a matrix.
+    The codes of the values already coded never change when the encoder is fitted with more data.
+    The coded dataframes use ``int32`` columns instead of the ids and names of the students and units.
+
+    :param columns: Columns to code. (Default=``("student_id", "unit_code", "unit_name")``)
+    :param dtype: Integer type of the codes. (Default=``numpy.int32``)
+
+    :Example:
+
+    >>> import studentpathway as sp
+    >>> data = pd.read_csv("students_data/combined_data/eng_data.csv")
+    >>> encoder = sp.Encoder()
+    >>> coded_data = encoder.fit_transform(data)
+    >>> M, students, units = sp.sequence_matrix(coded_data, encoder=encoder)
+    >>> unit_names = list(encoder.decode("unit_name", units))
+    """
+
+    def __init__(self, columns=ENCODED_COLUMNS, dtype=np.int32):
+        self.columns = list(columns)
+        self.dtype = np.dtype(dtype)
+
+        # Values of every column in the order of their codes
+        self.categories = {column: pd.Index([]) for column in self.columns}
+
+    def size(self, column):
+        """Returns the number of values of a column.
+
+        :param column: Column heading.
+
+        :return: Number of codes of the column.
+        """
+        return len(self.categories[column])
+
+    def fit(self, data):
+        """Adds the new values of the columns of the dataframe.
+
+        :param data: Pandas dataframe.
+
+        :return: the encoder.
+
+        :raises ValueError: A column has more values than the codes of ``dtype``.
+        """
+        for column in self.columns:
+            if column not in data.columns:
+                continue
+
+            values = data[column]
+            known = self.categories[column]
+
+            new = pd.unique(values.to_numpy()[known.get_indexer(values) < 0])
+
+            if not len(new):
+                continue
+
+            self.categories[column] = pd.Index(new) if not len(known) else known.append(pd.Index(new))
+
+            if len(self.categories[column]) - 1 > np.iinfo(self.dtype).max:
+                raise ValueError(f"{column} has too many values for codes of type {self.dtype}.")
+
+        return self
+
+    def encode(self, column, values):
+        """Returns the codes of values of a column.
+
+        :param column: Column heading.
+        :param values: list, numpy.ndarray or Pandas series of values.
+
+        :return: numpy.ndarray of the codes.
+
+        :raises ValueError: A value is not in the encoder.
+        """
+        codes = self.categories[column].get_indexer(pd.Index(values))
+
+        if (codes < 0).any():
+            missing = np.asarray(values, dtype=object)[codes < 0][0]
+            raise ValueError(f"{missing} is not in the {column} codes.")
+
+        return codes.astype(self.dtype)
+
+    def decode(self, column, codes):
+        """Returns the values of the codes of a column.
+
+        :param column: Column heading.
+        :param codes: list or numpy.ndarray of codes.
+
+        :return: numpy.ndarray of the values.
+        """
+        return self.categories[column].take(np.asarray(codes, dtype=np.intp)).to_numpy()
+
+    def codes(self, column):
+        """Returns the dictionary mapping the values of a column to their codes.
+
+        :param column: Column heading.
+
+        :return: Dictionary of the codes.
+        """
+        return dict(zip(self.categories[column], range(self.size(column))))
+
+    def values(self, column):
+        """Returns the dictionary mapping the codes of a column to their values.
+
+        :param column: Column heading.
+
+        :return: Dictionary of the values.
+        """
+        return dict(enumerate(self.categories[column]))
+
+    def transform(self, data, inplace=False):
+        """Replaces the values of the columns by their codes.
+
+        :param data: Pandas dataframe.
+        :param inplace: Bool to code ``data`` instead of a copy. (Default=False)
+
+        :return: Pandas dataframe with the coded columns.
+
+        :raises ValueError: A value is not in the encoder.
+        """
+        if not inplace:
+            data = data.copy()
+
+        for column in self.columns:
+            if column in data.columns:
+                data[column] = self.encode(column, data[column])
+
+        return data
+
+    def fit_transform(self, data, inplace=False):
+        """Adds the new values of the columns and replaces the values by their codes.
+
+        :param data: Pandas dataframe.
+        :param inplace: Bool to code ``data`` instead of a copy. (Default=False)
+
+        :return: Pandas dataframe with the coded columns.
+        """
+        return self.fit(data).transform(data, inplace)
+
+    def inverse_transform(self, data, inplace=False):
+        """Replaces the codes of the columns by their values.
+
+        :param data: Pandas dataframe with coded columns.
+        :param inplace: Bool to decode ``data`` instead of a copy. (Default=False)
+
+        :return: Pandas dataframe with the values.
+        """
+        if not inplace:
+            data = data.copy()
+
+        for column in self.columns:
+            if column in data.columns:
+                data[column] = self.decode(column, data[column])
+
+        return data
+
+    def check_codes(self, column, codes):
+        """Checks that the codes of a column are codes of the encoder.
+
+        :param column: Column heading.
+        :param codes: numpy.ndarray of codes.
+
+        :raises ValueError: A code is not a code of the column.
+        """
+        codes = np.asarray(codes)
+
+        if len(codes) and (codes.min() < 0 or codes.max() >= self.size(column)):
+            raise ValueError(f"The {column} column has codes that are not in the encoder.")
+
+    def save(self, path):
+        """Saves the values of the columns in a ``.npz`` file.
+
+        :param path: path to the file.
+
+        :raises TypeError: A column has both numbers and strings.
+        """
+        values = dict()
+        for i, column in enumerate(self.columns):
+            column_values = self.categories[column].to_numpy()
+
+            # Strings are saved as unicode arrays so that the file can be loaded without pickle
+            if column_values.dtype == object:
+                if pd.api.types.infer_dtype(column_values) not in ("string", "empty"):
+                    raise TypeError(f"The {column} values must be all numbers or all strings to be saved.")
+                column_values = column_values.astype(str)
+
+            values["values_" + str(i)] = column_values
+
+        np.savez(path, columns=np.array(self.columns), dtype=np.array(self.dtype.str), **values)
+
+    @classmethod
+    def load(cls, path):
+        """Returns the encoder saved in a ``.npz`` file.
+
+        :param path: path to the file.
+
+        :return: Encoder.
+        """
+        with np.load(path) as data:
+            encoder = cls(data["columns"].tolist(), str(data["dtype"]))
+
+            for i, column in enumerate(encoder.columns):
+                encoder.categories[column] = pd.Index(data["values_" + str(i)])
+
+        return encoder
@@ -2,14 +2,21 @@ import pandas as pd
 import numpy as np
 import copy
 import numbers
+from .cache import read_csv_cached
 
 
-def get_data(data):
+def get_data(data, use_cache=False, cache_directory=None, inplace=False):
     """Reads the data as a csv or a pandas DataFrame and returns the DataFrame.
     Although this function is used in other functions to import the data from a csv file,
     this can also work as a stand-alone function for reading a csv file.
+    ``use_cache=True`` reads the csv file through a typed columnar copy that is written on the first read
+    (see ``read_csv_cached``).
+    A pandas DataFrame is copied unless ``inplace=True``, which returns the same DataFrame.
 
     :param data: path to the csv file or pandas DataFrame
+    :param use_cache: Bool to read the csv file through the columnar cache. (Default=False)
+    :param cache_directory: Directory of the cached copies. (Default=``CACHE_DIRECTORY``)
+    :param inplace: Bool to return the DataFrame without copying it. (Default=False)
 
     :return: pandas DataFrame.
 
@@ -25,12 +32,16 @@ def get_data(data):
 
     try:
         # Checks if the data is not a Pandas Dataframe
-        if not isinstance(data, pd.DataFrame):
+        if not isinstance(data, pd.DataFrame) and use_cache:
+            final_data = read_csv_cached(data, cache_directory=cache_directory)
+        elif not isinstance(data, pd.DataFrame):
             # Reads the csv file
             final_data = pd.read_csv(data)
 
             # Converts the outcome_date into datetime objects
             final_data['outcome_date'] = pd.to_datetime(final_data.outcome_date)
+        elif inplace:
+            final_data = data
         else:
             final_data = copy.deepcopy(data)
 
@@ -39,7 +50,47 @@ def get_data(data):
         print("ValueError: " + str(e))
         raise
 
-def cohort_filter(data, student_cohort, unit_list=None, exclusive_search=True):
+def _unit_codes(unit_list):
+    """Returns the list of unit codes of a unit list.
+
+    :param unit_list: csv datafile or pandas DataFrame of the unit list with the column unit_code.
+
+    :return: list of the unit codes.
+    """
+    if isinstance(unit_list, pd.DataFrame):
+        return unit_list["unit_code"].to_list()
+
+    return pd.read_csv(unit_list, usecols=["unit_code"])["unit_code"].to_list()
+
+def _filter_cohort(data, student_cohort, unit_code=None, exclusive_search=True):
+    """Returns the rows of the ``student_cohort`` taking the units of ``unit_code``.
+
+    :param data: Pandas dataframe.
+    :param student_cohort: student cohort to filter.
+    :param unit_code: list of the unit codes to keep. ``None`` keeps all the units. (Default=None)
+    :param exclusive_search: Boolean that determines to search the student_cohort exclusively or partially (Default=True)
+
+    :return: Pandas dataframe with filtered data.
+    """
+    # Sort the data with the student_cohort
+    if exclusive_search:
+        mask = data["student_cohort"] == student_cohort
+    else:
+        mask = data["student_cohort"].str.contains(student_cohort) == True
+
+    # Checks for filtering units
+    if unit_code is not None:
+        mask &= data["unit_code"].isin(unit_code)
+
+    return data.loc[mask]
+
+def cohort_filter(data,
+                  student_cohort,
+                  unit_list=None,
+                  exclusive_search=True,
+                  use_cache=False,
+                  cache_directory=None,
+                  chunksize=100000):
     """Returns pandas dataframe having the ``student_cohort`` value in the column student_cohort.
     The filter also allows the process to filter the units from a list of units provided by ``unit_list``.
     ``unit_list`` is by default ``None``, but also reads a csv file which has two columns: unit_code and unit_name.
@@ -47,11 +98,17 @@ def cohort_filter(data, student_cohort, unit_list=None, exclusive_search=True):
     ``exclusive_search=True`` (Default) allows to filter by exact string provided by ``student_cohort``.
     ``exclusive_search=False`` considers almost similar string. eg: ``Bachelor of Engineering`` and ``Bachelor of Engineering (Honours)
     will be included in the ``filtered_data``.
+    A csv file is read in chunks of ``chunksize`` rows and only the matching rows of every chunk are kept,
+    so the memory does not grow with the size of the file.
+    With ``use_cache=True`` the filters are pushed down to the reader of the columnar copy of the file.
 
-    :param data: csv datafile of the cohort-wise data (example: data='students_data/combined_data/final_data.csv')
+    :param data: csv datafile of the cohort-wise data (example: data='students_data/combined_data/final_data.csv') or pandas DataFrame
     :param student_cohort: student cohort to filter (example: student_cohort='Bachelor of Engineering (Honours)')
-    :param unit_list: csv datafile of the unit list as per cohort (example: unit_list='units_data/engineering_data/engineering_units.csv') (Default=None)
+    :param unit_list: csv datafile or pandas DataFrame of the unit list as per cohort (example: unit_list='units_data/engineering_data/engineering_units.csv') (Default=None)
     :param exclusive_search: Boolean that determines to search the student_cohort exclusively or partially (Default=True)
+    :param use_cache: Bool to read the csv file through the columnar cache. (Default=False)
+    :param cache_directory: Directory of the cached copies. (Default=``CACHE_DIRECTORY``)
+    :param chunksize: Number of rows of the csv file read at a time. (Default=100000)
 
     :return: Pandas dataframe with filtered data.
 
@@ -61,54 +118,57 @@ def cohort_filter(data, student_cohort, unit_list=None, exclusive_search=True):
     >>> data = sp.cohort_filter("students_data/combined_data/final_data.csv", student_cohort="Bachelor of Engineering", unit_list="units_data/engineering_data/engineering_units.csv" ,exclusive_search=False)
     >>> data.shape
     (11379, 20)
+    >>> data = sp.grades_filter(sp.cohort_filter(data, student_cohort="Bachelor of Engineering (Honours)"))
     """
 
-    # Reads the data from the csv file
     try:
-        final_data = pd.read_csv(data)
+        unit_code = _unit_codes(unit_list) if unit_list is not None else None
 
-        # Converts the outcome_date into datetime objects
-        final_data['outcome_date'] = pd.to_datetime(final_data.outcome_date)
+        if isinstance(data, pd.DataFrame):
+            filtered_data = _filter_cohort(data, student_cohort, unit_code, exclusive_search)
+        elif use_cache:
+            filters = []
+            if exclusive_search:
+                filters.append(("student_cohort", "==", student_cohort))
+            if unit_code is not None:
+                filters.append(("unit_code", "in", unit_code))
 
-        # Sort the data with the student_cohort
-        if exclusive_search:
-            filtered_data = final_data.loc[final_data["student_cohort"] == student_cohort]
+            final_data = read_csv_cached(data, cache_directory=cache_directory, filters=filters or None)
+
+            filtered_data = _filter_cohort(final_data, student_cohort, unit_code, exclusive_search)
         else:
-            filtered_data = final_data.loc[final_data["student_cohort"].str.contains(student_cohort) == True]
+            # Reads the data from the csv file one chunk at a time
+            chunks = [_filter_cohort(chunk, student_cohort, unit_code, exclusive_search)
+                      for chunk in pd.read_csv(data, chunksize=chunksize)]
+
+            filtered_data = pd.concat(chunks) if chunks else pd.read_csv(data, nrows=0)
+
+        # Converts the outcome_date into datetime objects
+        filtered_data = filtered_data.assign(outcome_date=pd.to_datetime(filtered_data.outcome_date))
 
     except ValueError as e:
         print("ValueError: " + str(e))
         raise
 
-    # Checks for filtering units
-    if unit_list is not None:
-        try:
-            units_data = pd.read_csv(unit_list)
-
-            unit_code = units_data["unit_code"].to_list()
-
-            filtered_data = filtered_data[filtered_data["unit_code"].isin(unit_code)]
-
-            return filtered_data
-
-        except ValueError as e:
-            print("ValueError: " + str(e))
-            raise
-    else:
-        return filtered_data
+    return filtered_data
 
-def grades_filter(data, grades = {85:"H", 75: "D", 65:"C", 50: "P", np.NaN: "S", 0: "F"}, avoid={'S'}, remove_missing=False):
+def grades_filter(data, grades = {85:"H", 75: "D", 65:"C", 50: "P", np.NaN: "S", 0: "F"}, avoid={'S'}, remove_missing=False, use_cache=False, cache_directory=None, inplace=False):
     """Returns pandas dataframe with grades categorised.
     ``grades_filter`` maps the ``grades`` with key as the lower threshold for the value of the respective grades.
     The ``grades`` has a default input and it is optional argument.
     ``avoid`` is a set of all the grades that must be avoided during the filtering process
     and avoids mapping the respective grade column with any the mapping.
     ``remove_missing`` is a boolean, if true, allows to remove the entire row from the dataframe.
+    The thresholds are checked in the order of the ``grades`` dictionary for all the rows at once.
+    ``inplace=True`` updates the marks and grades of the given DataFrame instead of a copy.
 
     :param data: csv datafile of the cohort-wise data (example: data='students_data/combined_data/final_data.csv')
     :param grades: dict of grades and lower threshold to the grades. (Default={85:"H", 75: "D", 65:"C", 50: "P", np.NaN: "S", 0: "F"})
     :param avoid: set of grades to be avoided while filtering. (Default={'S'})
     :param remove_missing: boolean to remove the rows whose marks and grades are missing. (Default=False)
+    :param use_cache: Bool to read the csv file through the columnar cache. (Default=False)
+    :param cache_directory: Directory of the cached copies. (Default=``CACHE_DIRECTORY``)
+    :param inplace: Bool to update the given DataFrame instead of a copy. (Default=False)
 
     :return: Pandas dataframe with filtered data
 
@@ -118,47 +178,53 @@ def grades_filter(data, grades = {85:"H", 75: "D", 65:"C", 50: "P", np.NaN: "S",
     >>> data = sp.grades_filter("students_data/combined_data/eng_data.csv")
     """
 
-    final_data = get_data(data)
-    # Creating a deepcopy of the data
-    filtered_data = copy.deepcopy(final_data)
-
-    # List of all the grades
-    grade_list = list(grades.values())
-
-    # List of all the marks threshold for grades
-    mark_list = list(grades.keys())
-    mark_list = [mark for mark in mark_list if not np.isnan(mark)]
-
-    for index, row in filtered_data.iterrows():
-        # Checks if the grade is to be avoided
-        if row['grade'] in avoid:
-            filtered_data.loc[index, 'mark'] = None
-            continue
-
-        # Checks if the value is not a NaN
-        if not np.isnan(row['mark']):
-            for mark in mark_list:
-                if row['mark'] >= mark:
-                    filtered_data.loc[index, 'grade'] = grades[mark]
-                    break
-        else:
-            filtered_data.loc[index, 'mark'] = np.NaN
-            filtered_data.loc[index, 'grade'] = None
+    # A csv file is read into a new DataFrame and a DataFrame is copied once unless inplace
+    filtered_data = get_data(data, use_cache=use_cache, cache_directory=cache_directory, inplace=inplace)
+
+    # List of all the marks threshold for grades in the order of the grades dictionary
+    mark_list = [mark for mark in grades if not np.isnan(mark)]
+
+    # Rows with a grade to be avoided keep their grade and lose their mark
+    avoided = filtered_data['grade'].isin(list(avoid)).to_numpy()
+
+    # Rows with a missing mark lose their grade
+    marks = filtered_data['mark'].to_numpy(dtype=float)
+    missing = np.isnan(marks) & ~avoided
+
+    grade_values = filtered_data['grade'].to_numpy(dtype=object, copy=True)
+    grade_values[missing] = None
+
+    # Assigns the grade of the first threshold reached by the mark
+    ungraded = ~(avoided | missing)
+    for mark in mark_list:
+        reached = ungraded & (marks >= mark)
+        grade_values[reached] = grades[mark]
+        ungraded &= ~reached
+
+    if avoided.any():
+        filtered_data.loc[avoided, 'mark'] = None
+
+    filtered_data['grade'] = grade_values
 
     # removes the missing data rows
     if remove_missing:
-            filtered_data = filtered_data.drop(filtered_data[pd.isnull(filtered_data.grade) & np.isnan(filtered_data.mark)].index).reset_index(drop=True)
+        missing_rows = pd.isnull(filtered_data.grade) & np.isnan(filtered_data.mark)
+        filtered_data = filtered_data.loc[~missing_rows].reset_index(drop=True)
 
     return filtered_data
 
-def categorical_filter(data, categorical_columns=["course_attempt_status" ,"gender", "campus_code", "citizenship", "indigenous_type"], set_codes=True):
+def categorical_filter(data, categorical_columns=["course_attempt_status" ,"gender", "campus_code", "citizenship", "indigenous_type"], set_codes=True, use_cache=False, cache_directory=None, inplace=False):
     """Returns pandas dataframe with categorical variables from the columns.
     It takes ``categorical_columns`` as an argument which is to be converted to the categorical variable.
     The categorical variable can be converted into the numerical value by ensuring ``set_codes`` is True.
+    ``inplace=True`` converts the columns of the given DataFrame instead of a copy.
 
     :param data: csv file of the data (example: data='students_data/combined_data/final_data.csv') or pandas DataFrame
     :param categorical_columns: list of columns in the data that requires categorical filtering
     :param set_codes: Boolean to set the categorical column with numerical value (Default=True)
+    :param use_cache: Bool to read the csv file through the columnar cache. (Default=False)
+    :param cache_directory: Directory of the cached copies. (Default=``CACHE_DIRECTORY``)
+    :param inplace: Bool to convert the columns of the given DataFrame instead of a copy. (Default=False)
 
     :return: filtered data with the columns as categorical variables.
 
@@ -183,9 +249,9 @@ def categorical_filter(data, categorical_columns=["course_attempt_status" ,"gend
     Name: gender, Length: 11379, dtype: int8
     """
 
-    data = get_data(data)
+    data = get_data(data, use_cache=use_cache, cache_directory=cache_directory, inplace=inplace)
 
-    filtered_data = copy.deepcopy(data)
+    filtered_data = data
 
     for column in categorical_columns:
         if column in data.columns:
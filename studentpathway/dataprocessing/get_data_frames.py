@@ -1,36 +1,111 @@
 import pandas as pd
+import os
+from concurrent.futures import ThreadPoolExecutor
 
-def get_data_frames(data_name, root_directory, years):
+def get_data_frames(data_name,
+                    root_directory,
+                    years,
+                    dtype=None,
+                    usecols=None,
+                    parse_dates=None,
+                    dayfirst=False,
+                    concat=False,
+                    year_header="year",
+                    max_workers=None,
+                    names=None):
     """Returns a list of dataframe of the requested ``data_name``.
     The argument ``data_name`` takes the type of data. eg: ``data_name="enrolments"`` or ``data_name="results"``.
     The function navigates to the ``root_directory`` and navigates every sub directory named after year of the dataset.
     The subdirectories consist of year-wise directories which consists of the data as per the year.
     The ``years`` argument is a list of all the years whose subdirectories are named after in the root directory of the dataset.
+    The files of the years are read concurrently by a pool of ``max_workers`` threads.
+    ``dtype``, ``usecols`` and ``parse_dates`` are passed to ``pandas.read_csv`` so that the columns are typed while reading,
+    eg: ``dtype={"unit_code": "category"}`` and ``parse_dates=["outcome_date"]``.
+    ``concat=True`` returns a single dataframe with a ``year_header`` column instead of the list.
+    ``names`` replaces the column headings of the files, so that the files of all the years have the same columns.
 
     :param data_name: The name of the data to be imported (example: data_name=enrolments).
     :param root_directory: The path to data directory where all the csv files are present (example: root_directory=students_data).
     :param years: A list of years which is the subfolder inside the root_directory.
+    :param dtype: dtype of the columns passed to ``pandas.read_csv``. (Default=None)
+    :param usecols: Columns to read passed to ``pandas.read_csv``. (Default=None)
+    :param parse_dates: Columns to parse as datetime objects passed to ``pandas.read_csv``. (Default=None)
+    :param dayfirst: Bool to parse the dates with the day first. (Default=False)
+    :param concat: Bool to return a single dataframe of all the years. (Default=False)
+    :param year_header: Column heading of the year when ``concat=True``. (Default="year")
+    :param max_workers: Number of threads reading the files. ``1`` reads the files one after another. (Default=None)
+    :param names: Column headings replacing the headings of the files. (Default=None)
 
     :return: list of all the pandas dataframe of the data_name.
 
+    :raises FileNotFoundError: A file of the years does not exist.
+    :raises ValueError: A file could not be read with the given options.
+
     :Example:
 
     >>> import studentpathway as sp
     >>> years = [2015, 2016, 2017, 2018]
     >>> result_data = sp.get_data_frames("results", "students_data", years)
+    >>> results = sp.get_data_frames("results",
+    ...                              "students_data",
+    ...                              years,
+    ...                              dtype={"unit_code": "category"},
+    ...                              parse_dates=["outcome_date"],
+    ...                              concat=True)
     """
 
-    data = []
+    paths = []
+    for year in years:
+        file_name = str(data_name) + str(year) + ".csv"
+        paths.append(os.path.join(str(root_directory), str(year), file_name))
+
+    def read(path):
+        return pd.read_csv(path,
+                           header=0,
+                           names=names,
+                           dtype=dtype,
+                           usecols=usecols,
+                           parse_dates=parse_dates,
+                           dayfirst=dayfirst)
+
     try:
-        for i in range(len(years)):
-            file_name = str(data_name) + str(years[i]) + ".csv"
-            path = root_directory + "/" + str(years[i]) + "/" + file_name
-            data.append(pd.read_csv(path))
-        return data
-    except TypeError as e:
-        print(e)
-    except ValueError as e:
-        print(e)
-    except:
-        print("Unexpected error!")
+        if max_workers == 1:
+            data = [read(path) for path in paths]
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                data = list(executor.map(read, paths))
+    except (TypeError, ValueError) as e:
+        print(type(e).__name__ + ": " + str(e))
         raise
+
+    if not concat:
+        return data
+
+    return _concat_years(data, years, year_header)
+
+def _concat_years(data, years, year_header="year"):
+    """Returns a single dataframe from the dataframes of the years.
+
+    The categorical columns keep the category dtype with the union of the categories of the years.
+
+    :param data: list of pandas dataframe.
+    :param years: list of years of the dataframes.
+    :param year_header: Column heading of the year. (Default="year")
+
+    :return: Pandas dataframe.
+    """
+
+    if not data:
+        return pd.DataFrame(columns=[year_header])
+
+    for frame, year in zip(data, years):
+        frame[year_header] = int(year)
+
+    for column in data[0].columns:
+        if all(isinstance(frame[column].dtype, pd.CategoricalDtype) for frame in data if column in frame):
+            categories = pd.api.types.union_categoricals([frame[column] for frame in data if column in frame]).categories
+            for frame in data:
+                if column in frame:
+                    frame[column] = frame[column].cat.set_categories(categories)
+
+    return pd.concat(data, axis=0, ignore_index=True, sort=False)
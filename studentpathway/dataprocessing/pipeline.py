@@ -0,0 +1,172 @@
+import pandas as pd
+import numpy as np
+import os
+import time
+import tracemalloc
+from .get_data_frames import get_data_frames, _concat_years
+from .get_year_list import get_year_list
+from .pseudonymise import pseudonymise
+from ..instrumentation import logger
+
+# Column headings of the results files
+RESULTS_HEADERS = ["student_id", "course_code", "unit_cohort", "unit_code", "unit_name", "outcome_date",
+                   "teaching_calendar", "grade", "mark"]
+
+# Column headings of the enrolments files
+ENROLMENTS_HEADERS = ["student_id", "course_code", "student_cohort", "school_name", "course_start_date",
+                      "course_attempt_status", "gender", "campus_code", "campus_name", "citizenship",
+                      "indigenous_type", "date_of_birth", "discontinued_date", "lapsed_date"]
+
+# Columns of the enrolments files repeated in the results files
+ENROLMENTS_DROPPED = ["course_code", "school_name"]
+
+
+def _read_years(data_name, root_directory, years, names, usecols=None, parse_dates=None, dtype=None):
+    """Returns the deduplicated data of all the years.
+
+    The years are read one at a time and the duplicates of every year are removed before the next year is read.
+
+    :param data_name: The name of the data to be imported.
+    :param root_directory: The path to data directory.
+    :param years: list of years.
+    :param names: Column headings of the files.
+    :param usecols: Columns to read. (Default=None)
+    :param parse_dates: Columns to parse as datetime objects. (Default=None)
+    :param dtype: dtype of the columns. (Default=None)
+
+    :return: Pandas dataframe without duplicates.
+    """
+    data = []
+    for year in years:
+        year_data = get_data_frames(data_name,
+                                    root_directory,
+                                    [year],
+                                    dtype=dtype,
+                                    usecols=usecols,
+                                    parse_dates=parse_dates,
+                                    names=names,
+                                    max_workers=1)[0]
+
+        data.append(year_data.drop_duplicates(ignore_index=True))
+
+    data = _concat_years(data, years)
+
+    # The same rows can be in several years
+    return data.drop(columns="year").drop_duplicates(ignore_index=True)
+
+def combine_data(root_directory,
+                 output_file=None,
+                 years=None,
+                 results_name="results",
+                 enrolments_name="enrolments",
+                 id_header="student_id",
+                 results_dtype=None,
+                 enrolments_dtype=None,
+                 pseudonymise_ids=True,
+                 key=None,
+                 lookup_file=None,
+                 measure_memory=False):
+    """Returns the results of all the years combined with the enrolments of the students.
+
+    The results and the enrolments of every year are read with the column headings
+    ``RESULTS_HEADERS`` and ``ENROLMENTS_HEADERS``, with the dates parsed while reading,
+    and the duplicated rows are removed from every year before the years are combined.
+    The results are joined to the enrolments of their student with a hash join on integer codes of the student ids.
+    The combined data is sorted by student id, the student ids are pseudonymised with ``pseudonymise``,
+    and the data is written to the Parquet file ``output_file``.
+    The data has the same rows as the ``examples/data_processing.py`` script without its duplicates.
+    The wall time of the pipeline is logged and returned, with its peak memory when ``measure_memory`` is True.
+    The peak memory is measured with ``tracemalloc``, which slows down the pipeline.
+
+    :param root_directory: The path to data directory where the year directories are present.
+    :param output_file: path to the Parquet file of the combined data, or None. (Default=None)
+    :param years: list of years, or None for all the years of ``root_directory``. (Default=None)
+    :param results_name: The name of the results data. (Default="results")
+    :param enrolments_name: The name of the enrolments data. (Default="enrolments")
+    :param id_header: Column heading for student id. (Default="student_id")
+    :param results_dtype: dtype of the columns of the results passed to ``pandas.read_csv``. (Default=None)
+    :param enrolments_dtype: dtype of the columns of the enrolments passed to ``pandas.read_csv``. (Default=None)
+    :param pseudonymise_ids: Bool to pseudonymise the student ids. (Default=True)
+    :param key: secret key of the HMAC of the pseudonyms. (Default=None)
+    :param lookup_file: path to the csv file of the surrogate keys of the pseudonyms. (Default=None)
+    :param measure_memory: Bool to measure the peak memory of the pipeline. (Default=False)
+
+    :return data: Pandas dataframe of the combined data.
+    :return report: Dictionary with the wall time in seconds and the peak memory in bytes, or None when not measured.
+
+    :Example:
+
+    >>> import studentpathway as sp
+    >>> data, report = sp.combine_data("students_data", "students_data/combined_data/final_data.parquet", measure_memory=True)
+    >>> report
+    {'wall_time': 41.51, 'peak_memory': 2480343045}
+    """
+
+    start_time = time.perf_counter()
+
+    peak_memory = None
+
+    tracing = tracemalloc.is_tracing()
+    if measure_memory:
+        if not tracing:
+            tracemalloc.start()
+        elif hasattr(tracemalloc, "reset_peak"):
+            # Python 3.9+: the peak of a trace started by the caller is reset to the start of the pipeline
+            tracemalloc.reset_peak()
+
+    try:
+        if years is None:
+            years = get_year_list(root_directory)
+
+        results = _read_years(results_name,
+                              root_directory,
+                              years,
+                              RESULTS_HEADERS,
+                              parse_dates=["outcome_date"],
+                              dtype=results_dtype)
+
+        enrolments = _read_years(enrolments_name,
+                                 root_directory,
+                                 years,
+                                 ENROLMENTS_HEADERS,
+                                 usecols=[column for column in ENROLMENTS_HEADERS if column not in ENROLMENTS_DROPPED],
+                                 parse_dates=["course_start_date", "date_of_birth"],
+                                 dtype=enrolments_dtype)
+
+        # Integer codes of the students of both tables
+        codes, students = pd.factorize(pd.concat([results[id_header], enrolments[id_header]], ignore_index=True))
+
+        results.insert(0, "_student_code", codes[:len(results)])
+        enrolments[id_header] = codes[len(results):]
+        enrolments = enrolments.rename(columns={id_header: "_student_code"})
+
+        # Every result with every enrolment of its student
+        data = results.merge(enrolments, on="_student_code", how="left", sort=False)
+
+        # Sorting the students by id
+        student_order = np.empty(len(students), dtype=np.int64)
+        student_order[np.argsort(students.to_numpy(), kind="stable")] = np.arange(len(students))
+
+        order = np.argsort(student_order[data["_student_code"].to_numpy()], kind="stable")
+        data = data.drop(columns="_student_code").take(order).reset_index(drop=True)
+
+        if pseudonymise_ids:
+            data = pseudonymise(data, id_header, key=key, lookup_file=lookup_file, inplace=True)
+
+        if output_file is not None:
+            directory = os.path.dirname(output_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            data.to_parquet(output_file, index=False)
+
+        if measure_memory:
+            peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        if measure_memory and not tracing:
+            tracemalloc.stop()
+
+    wall_time = time.perf_counter() - start_time
+
+    logger.info("combine_data: %.3fs rows=%d peak_memory=%s", wall_time, len(data), peak_memory)
+
+    return data, {"wall_time": wall_time, "peak_memory": peak_memory}
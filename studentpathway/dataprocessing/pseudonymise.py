@@ -0,0 +1,128 @@
+import pandas as pd
+import numpy as np
+import os
+import hashlib
+import hmac
+from concurrent.futures import ProcessPoolExecutor
+
+# Column of the hashed ids in the lookup table of the surrogate keys
+PSEUDONYM_HEADER = "pseudonym"
+
+
+def _hash_chunk(values, key=None):
+    """Returns the sha1 hexadecimal digests of the values.
+
+    :param values: list of ids.
+    :param key: secret key of the HMAC as bytes, or None for a plain sha1 hash. (Default=None)
+
+    :return: list of the digests.
+    """
+    if key is None:
+        return [hashlib.sha1(str(value).encode("ASCII")).hexdigest() for value in values]
+
+    return [hmac.new(key, str(value).encode("ASCII"), hashlib.sha1).hexdigest() for value in values]
+
+def hash_ids(ids, key=None, max_workers=1):
+    """Returns the sha1 hexadecimal digests of a sequence of ids.
+
+    The digest of an id is ``hashlib.sha1(str(id).encode("ASCII")).hexdigest()``,
+    or the HMAC-SHA1 of ``str(id)`` with a secret ``key``.
+
+    :param ids: list or numpy.ndarray of ids.
+    :param key: secret key of the HMAC as str or bytes, or None for a plain sha1 hash. (Default=None)
+    :param max_workers: Number of processes hashing the ids. ``1`` hashes the ids in this process. (Default=1)
+
+    :return: numpy.ndarray of the digests.
+
+    :Example:
+
+    >>> import studentpathway as sp
+    >>> sp.hash_ids([111, 222])
+    array(['6216f8a75fd5bb3d5f22b6f9958cdede3fc086c2',
+           '1c6637a8f2e1f75e06ff9984894d6bd16a3a36a9'], dtype=object)
+    """
+    if isinstance(key, str):
+        key = key.encode("utf-8")
+
+    ids = list(ids)
+
+    if max_workers == 1 or len(ids) < 2:
+        return np.array(_hash_chunk(ids, key), dtype=object)
+
+    # More chunks than processes balance the work of the processes
+    chunk_number = 4 * (max_workers or os.cpu_count() or 1)
+    bounds = np.linspace(0, len(ids), min(len(ids), chunk_number) + 1).astype(int)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        chunks = executor.map(_hash_chunk,
+                              [ids[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])],
+                              [key] * (len(bounds) - 1))
+        digests = [digest for chunk in chunks for digest in chunk]
+
+    return np.array(digests, dtype=object)
+
+def pseudonymise(data,
+                 id_header="student_id",
+                 key=None,
+                 lookup_file=None,
+                 max_workers=1,
+                 inplace=False):
+    """Replaces the student ids by pseudonyms.
+
+    Only the distinct ids are hashed, and the digests are mapped back to the rows with their codes,
+    so the cost of hashing depends on the number of students and not on the number of results.
+    The pseudonym of an id is ``hashlib.sha1(str(id).encode("ASCII")).hexdigest()``,
+    or the HMAC-SHA1 of the id with a secret ``key`` so that the ids cannot be found by hashing all the possible ids.
+    With a ``lookup_file``, the ids are replaced by ``int32`` surrogate keys instead of the digests,
+    and the csv file maps every surrogate key to its digest.
+    The surrogate keys already in the ``lookup_file`` are kept and the new students get the next keys,
+    so the keys of a student do not change between the datasets pseudonymised with the same file.
+
+    :param data: Pandas dataframe.
+    :param id_header: Column heading for student id. (Default="student_id")
+    :param key: secret key of the HMAC as str or bytes, or None for a plain sha1 hash. (Default=None)
+    :param lookup_file: path to the csv file of the surrogate keys, or None to use the digests. (Default=None)
+    :param max_workers: Number of processes hashing the ids. ``1`` hashes the ids in this process. (Default=1)
+    :param inplace: Bool to replace the ids in ``data`` instead of a copy. (Default=False)
+
+    :return: Pandas dataframe with the pseudonyms.
+
+    :Example:
+
+    >>> import studentpathway as sp
+    >>> data = sp.pseudonymise(data)
+    >>> data = sp.pseudonymise(data, key="secret key", lookup_file="students_data/combined_data/student_keys.csv")
+    """
+    if not inplace:
+        data = data.copy()
+
+    codes, ids = pd.factorize(data[id_header], use_na_sentinel=False)
+
+    digests = hash_ids(ids, key, max_workers)
+
+    if lookup_file is None:
+        data[id_header] = digests.take(codes)
+        return data
+
+    if os.path.exists(lookup_file):
+        lookup = pd.read_csv(lookup_file, dtype={PSEUDONYM_HEADER: str})
+    else:
+        lookup = pd.DataFrame({id_header: np.zeros(0, dtype=np.int32), PSEUDONYM_HEADER: np.zeros(0, dtype=object)})
+
+    # Keys of the students already in the lookup table
+    found = pd.Index(lookup[PSEUDONYM_HEADER]).get_indexer(digests)
+    keys = np.full(len(digests), -1, dtype=np.int64)
+    keys[found >= 0] = lookup[id_header].to_numpy()[found[found >= 0]]
+
+    new = keys < 0
+    if new.any():
+        start = int(lookup[id_header].max()) + 1 if len(lookup) else 0
+        keys[new] = np.arange(start, start + np.count_nonzero(new))
+
+        lookup = pd.concat([lookup, pd.DataFrame({id_header: keys[new], PSEUDONYM_HEADER: digests[new]})],
+                           ignore_index=True)
+        lookup.to_csv(lookup_file, index=False)
+
+    data[id_header] = keys.astype(np.int32).take(codes)
+
+    return data
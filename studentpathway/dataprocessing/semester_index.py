@@ -0,0 +1,116 @@
+import pandas as pd
+import numpy as np
+
+# Column of the semester ordinals added by ``semester_index``
+SEMESTER_HEADER = "semester_index"
+
+
+def _semester_ordinals(student_codes, dates, sem_separator_month=8):
+    """Returns the semester ordinal of every result.
+
+    The results must be sorted by student and then by ``dates``.
+    A new semester starts when the outcome year increases or the outcome month is past ``sem_separator_month``,
+    unless the month is the same as the month that started the previous semester of the student.
+
+    :param student_codes: numpy.ndarray of integer codes of the students.
+    :param dates: Pandas series of datetime objects.
+    :param sem_separator_month: Month number used to separate the semesters. (Default=8)
+
+    :return: numpy.ndarray of semester ordinals starting at 1 for every student.
+    """
+    n = len(student_codes)
+
+    if not n:
+        return np.zeros(0, dtype=int)
+
+    years = dates.dt.year.to_numpy()
+    months = dates.dt.month.to_numpy()
+    positions = np.arange(n)
+
+    # First result of every student
+    first = np.ones(n, dtype=bool)
+    first[1:] = student_codes[1:] != student_codes[:-1]
+
+    # A result can start a new semester in a later year or past the separator month
+    starts = first.copy()
+    starts[1:] |= years[1:] > years[:-1]
+    starts |= months > sem_separator_month
+
+    # Month of the latest result that could start a semester before each result
+    latest = np.maximum.accumulate(np.where(starts, positions, 0))
+    past_month = np.zeros(n, dtype=months.dtype)
+    past_month[1:] = months[latest[:-1]]
+
+    increments = (starts & (first | (months != past_month))).astype(int)
+
+    # Counting the semesters within every student
+    total = np.cumsum(increments)
+    offset = (total - increments)[np.maximum.accumulate(np.where(first, positions, 0))]
+
+    return total - offset
+
+def semester_index(data,
+                   sem_separator_month=8,
+                   id_header="student_id",
+                   date_header="outcome_date",
+                   dayfirst=False,
+                   inplace=False):
+    """Adds the ``semester_index`` column with the semester ordinal of every result.
+
+    The semesters of every student are numbered from 1 in the order of the outcome dates.
+    A new semester starts when the outcome year increases or the outcome month is past ``sem_separator_month``,
+    unless the month is the same as the month that started the previous semester of the student.
+    The semesters of all the students are computed together after sorting the data once.
+    The column is memoized on the dataframe: a second call with the same parameters returns it without sorting again
+    while the student ids and the outcome dates of the rows are unchanged, which is checked with a hash of the two columns.
+    The column is computed again when the ids, the dates or the rows change.
+
+    :param data: Pandas dataframe.
+    :param sem_separator_month: Month number used to separate the semesters. (Default=8)
+    :param id_header: Column heading for student id. (Default="student_id")
+    :param date_header: Column heading for outcome date. (Default="outcome_date")
+    :param dayfirst: Bool to parse the dates with the day first when they are not datetime objects. (Default=False)
+    :param inplace: Bool to add the column to ``data`` instead of a copy. (Default=False)
+
+    :return: Pandas dataframe with the ``semester_index`` column.
+
+    :Example:
+
+    >>> import studentpathway as sp
+    >>> data = pd.read_csv("students_data/combined_data/eng_data.csv")
+    >>> data = sp.semester_index(data, sem_separator_month=8)
+    >>> data.groupby("semester_index").size()
+    """
+
+    # Parameters and fingerprint of the ids and dates of the rows
+    key = {"sem_separator_month": sem_separator_month,
+           "id_header": id_header,
+           "date_header": date_header,
+           "rows": len(data),
+           "hash": int(pd.util.hash_pandas_object(data[[id_header, date_header]]).sum())}
+
+    cached = SEMESTER_HEADER in data.columns and data.attrs.get(SEMESTER_HEADER) == key
+
+    if not inplace:
+        data = data.copy()
+
+    if cached:
+        data.attrs[SEMESTER_HEADER] = key
+        return data
+
+    dates = data[date_header]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, dayfirst=dayfirst)
+
+    student_codes, students = pd.factorize(data[id_header])
+
+    # Sorting the results by student and then by outcome date
+    order = np.lexsort((dates.to_numpy(), student_codes))
+
+    semesters = np.empty(len(data), dtype=np.int64)
+    semesters[order] = _semester_ordinals(student_codes[order], dates.iloc[order], sem_separator_month)
+
+    data[SEMESTER_HEADER] = semesters
+    data.attrs[SEMESTER_HEADER] = key
+
+    return data
@@ -0,0 +1,79 @@
+from studentpathway.dataprocessing.cache import read_csv_cached, clear_cache, cache_path
+from studentpathway.dataprocessing.filters import get_data, grades_filter, cohort_filter
+import pandas as pd
+import os
+import shutil
+import pytest
+
+pytest.importorskip("pyarrow")
+
+PATH = "studentpathway/dataprocessing/tests/test_data_files/test_cohort"
+
+data = PATH + "/test_data.csv"
+
+def test_read_csv_cached1(tmp_path):
+    cached_data = read_csv_cached(data, cache_directory=str(tmp_path))
+    assert(os.path.exists(cache_path(data, cache_directory=str(tmp_path))))
+    assert(cached_data.equals(get_data(data)))
+
+def test_read_csv_cached2(tmp_path):
+    read_csv_cached(data, cache_directory=str(tmp_path))
+    cached_data = read_csv_cached(data, cache_directory=str(tmp_path))
+    assert(cached_data.equals(get_data(data)))
+    assert(cached_data["outcome_date"].dtype == "datetime64[ns]")
+
+def test_read_csv_cached3(tmp_path):
+    source = str(tmp_path / "data.csv")
+    shutil.copy(data, source)
+    cache_directory = str(tmp_path / "cache")
+
+    read_csv_cached(source, cache_directory=cache_directory)
+
+    # Modifying the csv file replaces the cached copy
+    df = pd.read_csv(source).iloc[:5]
+    df.to_csv(source, index=False)
+    cached_data = read_csv_cached(source, cache_directory=cache_directory)
+
+    assert(cached_data.shape[0] == 5)
+    assert(len(os.listdir(cache_directory)) == 1)
+
+def test_read_csv_cached4(tmp_path):
+    read_csv_cached(data, cache_directory=str(tmp_path), max_cache_size=0)
+    assert(os.listdir(str(tmp_path)) == [])
+
+def test_clear_cache1(tmp_path):
+    read_csv_cached(data, cache_directory=str(tmp_path))
+    assert(clear_cache(data, cache_directory=str(tmp_path)) == 1)
+    assert(clear_cache(cache_directory=str(tmp_path)) == 0)
+
+def test_filters_cache1(tmp_path):
+    assert(get_data(data, use_cache=True, cache_directory=str(tmp_path)).equals(get_data(data)))
+    assert(grades_filter(data, use_cache=True, cache_directory=str(tmp_path)).equals(grades_filter(data)))
+    assert(cohort_filter(data, "Engineering", use_cache=True, cache_directory=str(tmp_path)).equals(cohort_filter(data, "Engineering")))
+
+def test_clear_cache2(tmp_path):
+    # Files of the directory not named by cache_path are kept
+    foreign = tmp_path / "final_data.parquet"
+    pd.DataFrame({"a": [1, 2]}).to_parquet(foreign)
+
+    read_csv_cached(data, cache_directory=str(tmp_path), max_cache_size=0)
+    assert(os.listdir(str(tmp_path)) == ["final_data.parquet"])
+
+    read_csv_cached(data, cache_directory=str(tmp_path))
+    assert(clear_cache(cache_directory=str(tmp_path)) == 1)
+    assert(os.listdir(str(tmp_path)) == ["final_data.parquet"])
+
+def test_read_csv_cached5(tmp_path, monkeypatch, caplog, capsys):
+    def to_parquet(*args, **kwargs):
+        raise ValueError("mixed types")
+
+    monkeypatch.setattr(pd.DataFrame, "to_parquet", to_parquet)
+
+    # The data is returned without a copy and the message is logged
+    with caplog.at_level("WARNING", logger="studentpathway"):
+        cached_data = read_csv_cached(data, cache_directory=str(tmp_path))
+
+    assert(cached_data.equals(get_data(data)))
+    assert(os.listdir(str(tmp_path)) == [])
+    assert("skipping the cache" in caplog.text)
+    assert(capsys.readouterr().out == "")
@@ -0,0 +1,86 @@
+from studentpathway.dataprocessing.data_sorting import *
+import pandas as pd
+import numpy as np
+import pytest
+
+PATH = "studentpathway/dataprocessing/tests/test_data_files/test_cohort"
+
+data = pd.read_csv(PATH + "/test_data.csv")
+
+def test_student_scores1():
+    scores = student_scores(data, sort_scores=False)
+    for student, score in scores.items():
+        assert(score == study_score(data.loc[data["student_id"] == student]))
+
+def test_student_scores2():
+    scores = student_scores(data, round_upto=2)
+    assert(list(scores.values()) == sorted(scores.values()))
+
+def test_student_scores3():
+    scores = student_scores(data, round_upto=2)
+    scores_series = student_scores(data, round_upto=2, output="series")
+    students, scores_array = student_scores(data, round_upto=2, output="arrays")
+    assert(isinstance(scores_series, pd.Series))
+    assert(scores_series.to_dict() == scores)
+    assert(dict(zip(students, scores_array)) == scores)
+
+def test_student_scores4():
+    with pytest.raises(ValueError):
+        scores = student_scores(data, output="list")
+
+def test_score_frequency1():
+    scores = student_scores(data, round_upto=2)
+    scores_series = student_scores(data, round_upto=2, output="series")
+    assert(score_frequency(scores) == score_frequency(scores_series))
+    assert(sum(score_frequency(scores).values()) == data["student_id"].nunique())
+
+def test_sort_students_by_score1():
+    scores = student_scores(data, round_upto=2)
+    scores_series = student_scores(data, round_upto=2, output="series")
+    score = list(scores.values())[0]
+    score_data = sort_students_by_score(data, score, scores)
+    assert(score_data.equals(sort_students_by_score(data, score, scores_series)))
+
+program_units = {"Common": [100, 200], "Civil": [300, 400, 500], "Electrical": [200, 400, 600], "Mechanical": [700]}
+
+def test_program_index1():
+    index = ProgramIndex(program_units)
+    for student_units in [[100, 300, 400], [400, 600], [100, 200], [700, 300], [800], [400, 400, 600, 700]]:
+        assert(index.get_student_program(student_units) == get_student_program(student_units, program_units))
+        assert(get_student_program(student_units, index) == get_student_program(student_units, program_units))
+
+def test_program_index2():
+    with pytest.raises(KeyError):
+        index = ProgramIndex(program_units, skip_program=["Science"])
+
+def test_get_student_programs1():
+    student_programs = get_student_programs(data, program_units)
+    for student in data["student_id"].unique():
+        student_units = list(data.loc[data["student_id"] == student, "unit_code"])
+        assert(student_programs[student] == get_student_program(student_units, program_units))
+
+def test_get_student_programs2():
+    for skip_program in [[], ["Common", "Civil"]]:
+        student_programs = get_student_programs(data, ProgramIndex(program_units, skip_program))
+        for student in data["student_id"].unique():
+            student_units = list(data.loc[data["student_id"] == student, "unit_code"])
+            assert(student_programs[student] == get_student_program(student_units, program_units, skip_program))
+
+units_data = pd.DataFrame({"program": ["Common", "Common", "Civil", "Civil", "Electrical", "Electrical"],
+                           "unit_code": [0, 100, 300, 400, 100, 400]})
+
+def test_sort_units_program1():
+    program = sort_units_program(units_data)
+    assert(program == {"Common": [0, 100], "Civil": [300, 400], "Electrical": [100, 400]})
+
+def test_sort_units_program2():
+    program = sort_units_program(units_data)
+    programs, units, indices, offsets = sort_units_program(units_data, compact=True)
+    assert(programs == list(program))
+    for p, name in enumerate(programs):
+        assert(list(units[indices[offsets[p]:offsets[p + 1]]]) == program[name])
+
+def test_program_index3():
+    index = ProgramIndex(sort_units_program(units_data, compact=True))
+    for student_units in [[0, 300], [100, 400], [0], [500]]:
+        assert(index.get_student_program(student_units) == get_student_program(student_units, sort_units_program(units_data)))
@@ -0,0 +1,38 @@
+from studentpathway.dataprocessing.encoder import *
+import pandas as pd
+import numpy as np
+import pytest
+
+PATH = "studentpathway/dataprocessing/tests/test_data_files/test_cohort"
+
+data = pd.read_csv(PATH + "/test_data.csv")
+
+def test_encoder1():
+    encoder = Encoder()
+    coded_data = encoder.fit_transform(data)
+    for column in ["student_id", "unit_code", "unit_name"]:
+        assert(coded_data[column].dtype == np.int32)
+        assert(coded_data[column].max() == data[column].nunique() - 1)
+    assert(encoder.inverse_transform(coded_data).equals(data))
+
+def test_encoder2():
+    encoder = Encoder()
+    encoder.fit(data.iloc[:10])
+    codes = encoder.codes("student_id")
+    encoder.fit(data)
+    assert(all(encoder.codes("student_id")[student] == code for student, code in codes.items()))
+    values = encoder.values("unit_name")
+    assert(all(encoder.codes("unit_name")[value] == code for code, value in values.items()))
+
+def test_encoder3():
+    encoder = Encoder().fit(data.iloc[:10])
+    missing = data.loc[~data["student_id"].isin(data["student_id"].iloc[:10])]
+    assert(len(missing))
+    with pytest.raises(ValueError):
+        encoder.transform(missing)
+
+def test_encoder4(tmp_path):
+    encoder = Encoder().fit(data)
+    encoder.save(tmp_path / "encoder.npz")
+    loaded = Encoder.load(tmp_path / "encoder.npz")
+    assert(loaded.transform(data).equals(encoder.transform(data)))
@@ -95,3 +95,37 @@ def test_categorical_filter0():
 def test_categorical_filter1():
     filtered_data = categorical_filter(data, set_codes=False)
     assert(filtered_data["course_attempt_status"].dtype == 'category')
+
+def test_grades_filter9():
+    data_df = pd.DataFrame({"mark": [90.0, -5.0, np.nan, 40.0, 70.0],
+                            "grade": ["P", "X", None, "S", np.nan]})
+    filtered_data = grades_filter(data_df)
+    assert(filtered_data['grade'].tolist() == ['H', 'X', None, 'S', 'C'])
+    assert(np.isnan(filtered_data['mark'].tolist()[3]))
+    assert(data_df['grade'].tolist()[0] == 'P')
+
+def test_cohort_filter8():
+    data_df = pd.read_csv(data)
+    filtered_data = cohort_filter(data_df, "Science", unit_list=unit_list, exclusive_search=False)
+    assert(filtered_data.equals(cohort_filter(data, "Science", unit_list=unit_list, exclusive_search=False)))
+    assert(filtered_data["outcome_date"].dtype == "datetime64[ns]")
+
+def test_cohort_filter9():
+    for exclusive_search in [True, False]:
+        filtered_data = cohort_filter(data, "Engineering", unit_list=unit_list, exclusive_search=exclusive_search)
+        filtered_chunks = cohort_filter(data, "Engineering", unit_list=unit_list, exclusive_search=exclusive_search, chunksize=4)
+        assert(filtered_chunks.equals(filtered_data))
+
+def test_cohort_filter10():
+    units_df = pd.read_csv(unit_list)
+    filtered_data = cohort_filter(grades_filter(data), "Engineering", unit_list=units_df)
+    assert(filtered_data.shape[0] == 8)
+
+def test_cohort_filter11(tmp_path):
+    pytest.importorskip("pyarrow")
+    for exclusive_search in [True, False]:
+        filtered_data = cohort_filter(data, "Engineering", unit_list=unit_list, exclusive_search=exclusive_search)
+        for i in range(2):
+            filtered_cache = cohort_filter(data, "Engineering", unit_list=unit_list, exclusive_search=exclusive_search,
+                                           use_cache=True, cache_directory=str(tmp_path))
+            assert(filtered_cache.equals(filtered_data))
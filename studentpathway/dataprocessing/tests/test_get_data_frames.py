@@ -17,3 +17,33 @@ def test_get_data_frames2():
     assert(isinstance(data, list))
     assert(isinstance(data[0], pd.DataFrame))
     assert(len(data) == 3)
+
+def test_get_data_frames3():
+    data = get_data_frames(DATA_NAME, PATH, years, max_workers=1)
+    data_threads = get_data_frames(DATA_NAME, PATH, years)
+
+    assert(all(frame.equals(frame_threads) for frame, frame_threads in zip(data, data_threads)))
+
+def test_get_data_frames4():
+    data = get_data_frames(DATA_NAME,
+                           PATH,
+                           years,
+                           dtype={"unit_name": "category", "student_cohort": "category"},
+                           usecols=["student_id", "unit_name", "outcome_date", "student_cohort"],
+                           parse_dates=["outcome_date"],
+                           concat=True)
+
+    assert(isinstance(data, pd.DataFrame))
+    assert(data.shape[0] == sum(frame.shape[0] for frame in get_data_frames(DATA_NAME, PATH, years)))
+    assert(list(data.columns) == ["student_id", "unit_name", "outcome_date", "student_cohort", "year"])
+    assert(sorted(data["year"].unique()) == years)
+    assert(data["unit_name"].dtype == "category")
+    assert(data["outcome_date"].dtype == "datetime64[ns]")
+
+def test_get_data_frames5():
+    with pytest.raises(FileNotFoundError):
+        data = get_data_frames(DATA_NAME, PATH, years + [2030])
+
+def test_get_data_frames6():
+    with pytest.raises(ValueError):
+        data = get_data_frames(DATA_NAME, PATH, years, usecols=["not_a_column"])
@@ -0,0 +1,62 @@
+from studentpathway.dataprocessing.filters import get_data, grades_filter, categorical_filter
+from studentpathway.dataprocessing.data_sorting import add_age, add_student_program, special_units_year
+import pandas as pd
+import numpy as np
+import tracemalloc
+
+ROWS = 200000
+
+def students_data(rows=ROWS):
+    rng = np.random.default_rng(0)
+    mark = rng.uniform(0, 100, rows)
+    mark[rng.random(rows) < 0.05] = np.nan
+    return pd.DataFrame({"student_id": rng.integers(0, rows // 20, rows),
+                         "unit_code": rng.integers(300000, 300400, rows),
+                         "outcome_date": pd.Timestamp("2017-06-20") + pd.to_timedelta(rng.integers(0, 1500, rows), unit="D"),
+                         "date_of_birth": pd.Timestamp("1995-01-01") + pd.to_timedelta(rng.integers(0, 3000, rows), unit="D"),
+                         "grade": rng.choice(["H", "D", "C", "P", "F", "S"], rows).astype(object),
+                         "mark": mark,
+                         "course_attempt_status": rng.choice(["ENROLLED", "COMPLETED"], rows).astype(object),
+                         "gender": rng.choice(["F", "M"], rows).astype(object),
+                         "campus_code": rng.choice(["PA", "KW", "CA"], rows).astype(object),
+                         "citizenship": rng.choice(["AUS", "INT"], rows).astype(object),
+                         "indigenous_type": rng.choice(["Y", "N"], rows).astype(object)})
+
+def peak_memory(function, data):
+    tracemalloc.start()
+    function(data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def pipeline(data, inplace=True):
+    df = get_data(data, inplace=inplace)
+    df = grades_filter(df, inplace=inplace)
+    df = categorical_filter(df, inplace=inplace)
+    df = add_age(df, inplace=inplace)
+    df = add_student_program(df, "Civil", inplace=inplace)
+    return df
+
+def test_pipeline_inplace1():
+    data = students_data(1000)
+    expected = pipeline(data, inplace=False)
+    assert(not data.equals(expected))
+    assert(pipeline(data, inplace=True).equals(expected))
+
+def test_pipeline_memory1():
+    data = students_data()
+    input_size = data.memory_usage(deep=True).sum()
+
+    peak = peak_memory(pipeline, data)
+
+    # The input and the peak of the memory allocated by the pipeline
+    assert(input_size + peak < 1.5 * input_size)
+
+def test_pipeline_memory2():
+    data = students_data()
+    peak_inplace = peak_memory(pipeline, data)
+
+    data = students_data()
+    peak_copy = peak_memory(lambda df: pipeline(df, inplace=False), data)
+
+    assert(peak_inplace < peak_copy)
@@ -0,0 +1,79 @@
+from studentpathway.dataprocessing.pipeline import *
+from studentpathway.dataprocessing.pseudonymise import pseudonymise
+import pandas as pd
+import tracemalloc
+import numpy as np
+import os
+import pytest
+
+results = {2015: [["111", "C1", "U", "100", "Physics", "2015-06-06", "Autumn", "P", 55],
+                  ["111", "C1", "U", "100", "Physics", "2015-06-06", "Autumn", "P", 55],
+                  ["222", "C1", "U", "200", "Chemistry", "2015-11-06", "Spring", "H", 85],
+                  ["333", "C2", "U", "300", "Maths", "2015-11-06", "Spring", "F", 40]],
+           2016: [["111", "C1", "U", "100", "Physics", "2015-06-06", "Autumn", "P", 55],
+                  ["222", "C1", "U", "300", "Maths", "2016-06-06", "Autumn", "D", 75],
+                  ["444", "C1", "U", "100", "Physics", "2016-06-06", "Autumn", "P", 50]]}
+
+enrolments = {2015: [["111", "C1", "Engineering", "SE", "2015-02-01", "ENROLLED", "M", "1", "A", "AU", "N", "1997-01-01", "", ""],
+                     ["222", "C1", "Engineering", "SE", "2015-02-01", "ENROLLED", "F", "1", "A", "AU", "N", "1996-05-01", "", ""]],
+              2016: [["111", "C1", "Engineering", "SE", "2015-02-01", "ENROLLED", "M", "1", "A", "AU", "N", "1997-01-01", "", ""],
+                     ["222", "C1", "Engineering", "SE", "2015-02-01", "COMPLETED", "F", "1", "A", "AU", "N", "1996-05-01", "", ""],
+                     ["444", "C1", "Science", "SS", "2016-02-01", "ENROLLED", "F", "2", "B", "AU", "N", "1998-05-01", "", ""]]}
+
+def write_data(root):
+    for year in results:
+        os.makedirs(os.path.join(root, str(year)))
+        pd.DataFrame(results[year]).to_csv(os.path.join(root, str(year), f"results{year}.csv"), index=False)
+        pd.DataFrame(enrolments[year]).to_csv(os.path.join(root, str(year), f"enrolments{year}.csv"), index=False)
+
+def script_data(root):
+    """Combined data of the steps of examples/data_processing.py."""
+    results_data = [pd.read_csv(os.path.join(root, str(year), f"results{year}.csv")) for year in results]
+    for frame in results_data:
+        frame.columns = RESULTS_HEADERS
+    enrolment_data = [pd.read_csv(os.path.join(root, str(year), f"enrolments{year}.csv")) for year in results]
+    for frame in enrolment_data:
+        frame.columns = ENROLMENTS_HEADERS
+
+    results_frame = pd.concat(results_data, axis=0, sort=False).reset_index(drop=True)
+    enrolments_frame = pd.concat(enrolment_data, axis=0, sort=False).reset_index(drop=True)
+    enrolments_frame = enrolments_frame.drop(["course_code", "school_name"], axis=1)
+
+    final_data = results_frame.join(enrolments_frame.set_index('student_id'), on="student_id")
+    final_data = final_data.sort_values(by=['student_id']).reset_index(drop=True)
+    for column in ["outcome_date", "course_start_date", "date_of_birth"]:
+        final_data[column] = pd.to_datetime(final_data[column])
+
+    return final_data.drop_duplicates().reset_index(drop=True)
+
+def test_combine_data1(tmp_path):
+    write_data(tmp_path)
+
+    data, report = combine_data(tmp_path, tmp_path / "combined" / "final_data.parquet", pseudonymise_ids=False,
+                                measure_memory=True)
+    expected = script_data(tmp_path)
+
+    sort_columns = list(expected.columns)
+    data = data.sort_values(sort_columns).reset_index(drop=True)
+    expected = expected.sort_values(sort_columns).reset_index(drop=True)
+
+    pd.testing.assert_frame_equal(data, expected)
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / "combined" / "final_data.parquet")
+                                  .sort_values(sort_columns).reset_index(drop=True), expected)
+    assert(report["wall_time"] > 0 and report["peak_memory"] > 0)
+
+def test_combine_data2(tmp_path):
+    write_data(tmp_path)
+
+    data, report = combine_data(tmp_path)
+    expected = script_data(tmp_path)
+
+    assert(list(data["student_id"]) == list(pseudonymise(expected)["student_id"]))
+
+def test_combine_data3(tmp_path):
+    write_data(tmp_path)
+
+    data, report = combine_data(tmp_path, pseudonymise_ids=False)
+
+    assert(report["peak_memory"] is None)
+    assert(not tracemalloc.is_tracing())
@@ -0,0 +1,38 @@
+from studentpathway.dataprocessing.pseudonymise import *
+import pandas as pd
+import numpy as np
+import hashlib
+import hmac
+import pytest
+
+PATH = "studentpathway/dataprocessing/tests/test_data_files/test_cohort"
+
+data = pd.read_csv(PATH + "/test_data.csv")
+
+def test_pseudonymise1():
+    pseudonymised = pseudonymise(data)
+    encrypted_id = [hashlib.sha1(str(student).encode('ASCII')).hexdigest() for student in data["student_id"]]
+    assert(list(pseudonymised["student_id"]) == encrypted_id)
+    assert(pseudonymised.drop(columns="student_id").equals(data.drop(columns="student_id")))
+
+def test_pseudonymise2():
+    pseudonymised = pseudonymise(data, key="secret")
+    encrypted_id = [hmac.new(b"secret", str(student).encode('ASCII'), hashlib.sha1).hexdigest() for student in data["student_id"]]
+    assert(list(pseudonymised["student_id"]) == encrypted_id)
+    assert(pseudonymise(data, key="secret", max_workers=2)["student_id"].equals(pseudonymised["student_id"]))
+
+def test_pseudonymise3(tmp_path):
+    lookup_file = tmp_path / "keys.csv"
+    first = data.loc[data["student_id"] == data["student_id"].iloc[-1]]
+
+    pseudonymised_first = pseudonymise(first, lookup_file=lookup_file)
+    assert((pseudonymised_first["student_id"] == 0).all())
+
+    pseudonymised = pseudonymise(data, lookup_file=lookup_file)
+    assert(pseudonymised["student_id"].dtype == np.int32)
+    assert((pseudonymised.loc[first.index, "student_id"] == 0).all())
+    assert(pseudonymised["student_id"].nunique() == data["student_id"].nunique())
+
+    lookup = pd.read_csv(lookup_file)
+    digests = dict(zip(lookup["student_id"], lookup["pseudonym"]))
+    assert([digests[key] for key in pseudonymised["student_id"]] == list(pseudonymise(data)["student_id"]))
@@ -0,0 +1,44 @@
+from studentpathway.dataprocessing.semester_index import *
+import pandas as pd
+import numpy as np
+import pytest
+
+PATH = "studentpathway/adjacency/tests/test_data_files"
+
+data = pd.read_csv(PATH + "/test_data6.csv")
+
+def test_semester_index1():
+    semester_data = semester_index(data, dayfirst=True)
+    assert(SEMESTER_HEADER not in data.columns)
+    student_data = semester_data.loc[semester_data["student_id"] == 111]
+    assert(list(student_data[SEMESTER_HEADER]) == [1, 2, 3, 4, 5])
+    student_data = semester_data.loc[semester_data["student_id"] == 222]
+    assert(list(student_data[SEMESTER_HEADER]) == [1, 2, 2, 2])
+
+def test_semester_index2():
+    semester_data = semester_index(data, dayfirst=True)
+
+    # The memoized column is not computed again
+    semester_data[SEMESTER_HEADER] = 0
+    assert((semester_index(semester_data, dayfirst=True, inplace=True)[SEMESTER_HEADER] == 0).all())
+
+    # The column is computed again for other parameters or rows
+    assert((semester_index(semester_data, sem_separator_month=5, dayfirst=True)[SEMESTER_HEADER] > 0).all())
+    assert((semester_index(semester_data.iloc[1:], dayfirst=True)[SEMESTER_HEADER] > 0).all())
+
+def test_semester_index3():
+    shuffled = data.sample(frac=1, random_state=0)
+    semester_data = semester_index(data, dayfirst=True)
+    shuffled = semester_index(shuffled, dayfirst=True)
+    assert(shuffled[SEMESTER_HEADER].equals(semester_data[SEMESTER_HEADER].loc[shuffled.index]))
+
+def test_semester_index4():
+    semester_data = semester_index(data, dayfirst=True)
+    semester_data["outcome_date"] = pd.to_datetime(semester_data["outcome_date"], dayfirst=True)
+    semester_data = semester_index(semester_data, inplace=True)
+
+    # Editing the dates in place computes the column again
+    rows = semester_data["student_id"] == 111
+    semester_data.loc[rows, "outcome_date"] = semester_data.loc[rows, "outcome_date"].iloc[0]
+    semester_data = semester_index(semester_data, inplace=True)
+    assert(list(semester_data.loc[rows, SEMESTER_HEADER]) == [1, 1, 1, 1, 1])
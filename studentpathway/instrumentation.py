@@ -0,0 +1,174 @@
+import logging
+import time
+import contextlib
+import numpy as np
+import scipy.sparse
+
+# Logger of all the modules of studentpathway. Nothing is displayed until a handler is added,
+# eg: with ``log_to_console()`` or ``logging.basicConfig(level=logging.INFO)``.
+logger = logging.getLogger("studentpathway")
+logger.addHandler(logging.NullHandler())
+
+# Functions called with the record of every stage
+_metrics_hooks = []
+
+
+def log_to_console(level=logging.INFO):
+    """Displays the messages of studentpathway in the console.
+
+    ``logging.INFO`` displays the duration of every stage and ``logging.DEBUG`` also displays the checks and the progress.
+
+    :param level: Lowest level of the messages displayed. (Default=``logging.INFO``)
+
+    :return: the handler added to the logger.
+
+    :Example:
+
+    >>> import studentpathway as sp
+    >>> handler = sp.log_to_console()
+    >>> M, students, units = sp.sequence_matrix(data)
+    sequence_matrix: 0.036s rows=11379 students=1220 units=96 array_bytes=936960
+    """
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+
+    logger.addHandler(handler)
+    logger.setLevel(level)
+
+    return handler
+
+def add_metrics_hook(hook):
+    """Calls ``hook(record)`` at the end of every stage.
+
+    The record is a dictionary with the ``stage`` name, the ``duration`` in seconds
+    and the measures of the stage such as ``rows`` and ``array_bytes``.
+
+    :param hook: function called with the record of every stage.
+
+    :return: ``hook``.
+
+    :Example:
+
+    >>> import studentpathway as sp
+    >>> records = []
+    >>> sp.add_metrics_hook(records.append)
+    >>> _P, P = sp.adjacency_matrix(M)
+    >>> records
+    [{'stage': 'adjacency_matrix', 'engine': 'vectorized', 'units': 96, 'array_bytes': 147456, 'duration': 0.012}]
+    """
+    _metrics_hooks.append(hook)
+
+    return hook
+
+def remove_metrics_hook(hook):
+    """Stops calling a hook added with ``add_metrics_hook``.
+
+    :param hook: function to remove.
+    """
+    _metrics_hooks.remove(hook)
+
+@contextlib.contextmanager
+def collect_metrics():
+    """Collects the records of the stages run inside the ``with`` block.
+
+    :return: list of the records.
+
+    :Example:
+
+    >>> import studentpathway as sp
+    >>> with sp.collect_metrics() as records:
+    ...     M, students, units = sp.sequence_matrix(data)
+    ...     _P, P = sp.adjacency_matrix(M)
+    >>> [record["stage"] for record in records]
+    ['sequence_matrix', 'adjacency_matrix']
+    """
+    records = []
+    add_metrics_hook(records.append)
+    try:
+        yield records
+    finally:
+        remove_metrics_hook(records.append)
+
+def array_bytes(*arrays):
+    """Returns the number of bytes of dense or sparse arrays, or lists of arrays.
+
+    :param arrays: numpy.ndarray, scipy.sparse matrices or lists of them.
+
+    :return: Number of bytes.
+    """
+    total = 0
+    for array in arrays:
+        if isinstance(array, (list, tuple)):
+            total += array_bytes(*array)
+        elif scipy.sparse.issparse(array):
+            total += sum(getattr(array, name).nbytes for name in ("data", "indices", "indptr", "row", "col")
+                         if hasattr(array, name))
+        else:
+            total += np.asarray(array).nbytes
+
+    return total
+
+def enabled(level=logging.INFO):
+    """Returns True if the stages are logged at ``level`` or collected by a hook."""
+    return bool(_metrics_hooks) or logger.isEnabledFor(level)
+
+@contextlib.contextmanager
+def stage(name, **measures):
+    """Measures the duration of a stage.
+
+    The ``with`` block receives the record of the stage and can add measures to it.
+    At the end of the block, the record is logged at the ``INFO`` level and passed to the metrics hooks.
+    The record of a block stopped by an exception has the name of the exception in ``error``.
+    Nothing is measured when the ``INFO`` level is disabled and there is no hook.
+
+    :param name: Name of the stage.
+    :param measures: Measures of the stage known at the start, eg: ``rows=len(data)``.
+
+    :return: Dictionary of the record.
+
+    :Example:
+
+    >>> from studentpathway.instrumentation import stage
+    >>> with stage("semester_index", rows=len(data)) as record:
+    ...     record["students"] = data["student_id"].nunique()
+    """
+    record = {"stage": name, **measures}
+
+    if not enabled():
+        yield record
+        return
+
+    start = time.perf_counter()
+    try:
+        yield record
+    except Exception as e:
+        record["error"] = type(e).__name__
+        raise
+    finally:
+        record["duration"] = time.perf_counter() - start
+
+        logger.info("%s: %.3fs %s", name, record["duration"],
+                    " ".join(f"{key}={value}" for key, value in record.items() if key not in ("stage", "duration")))
+
+        for hook in list(_metrics_hooks):
+            hook(record)
+
+def progress(iterable, total, name, steps=10):
+    """Yields the items of ``iterable`` and logs the progress ``steps`` times at the ``DEBUG`` level.
+
+    :param iterable: items of a loop.
+    :param total: Number of items.
+    :param name: Name of the loop.
+    :param steps: Number of progress messages. (Default=10)
+
+    :return: generator of the items.
+    """
+    if not logger.isEnabledFor(logging.DEBUG) or not total:
+        yield from iterable
+        return
+
+    every = max(total // steps, 1)
+    for i, item in enumerate(iterable, 1):
+        yield item
+        if i % every == 0 or i == total:
+            logger.debug("%s: %d/%d", name, i, total)